@@ -42,22 +42,29 @@ import astropy.constants as ac
 import astropy.units     as u
 import astropy.table     as astro_table
 import requests
-from collections import Counter
 import subprocess
 from tqdm import tqdm
 from scipy.io.idl import readsav
 from astropy.table import Table
 from astropy.io import fits
-import copy
-from multiprocessing import Pool, Process, cpu_count
-from scipy.interpolate import interp1d
+from multiprocessing import Pool, cpu_count
 import tarfile
+import h5py
+import hashlib
+import json
+import shutil
+import tempfile
+import time
+import traceback
 import requests
 from bs4 import BeautifulSoup
 
 
 ## Functions
 
+## In-process cache of halo mass function tables, keyed by `hmf_table_key`
+_HMF_CACHE = {}
+
 ## ---------| Reading input arguments and other main functions |--------- ##
 
 class SortingHelpFormatter(HelpFormatter):
@@ -194,6 +201,79 @@ def get_parser():
                         type=int,
                         choices=[1,2],
                         default=2)
+    ## CLF engine
+    parser.add_argument('-clf_engine',
+                        dest='clf_engine',
+                        help="""
+                        Engine used for the CLF assignment.
+                        Options: (c) = External `CLF_with_ftread` executable,
+                        (numpy) = In-process vectorized CLF assignment""",
+                        type=str,
+                        choices=['c', 'numpy'],
+                        default='c')
+    ## FoF engine
+    parser.add_argument('-fof_engine',
+                        dest='fof_engine',
+                        help="""
+                        Engine used for finding galaxy groups.
+                        Options: (c) = External `fof9_ascii` executable,
+                        (numpy) = In-process KD-tree friends-of-friends""",
+                        type=str,
+                        choices=['c', 'numpy'],
+                        default='c')
+    ## Output format of the catalogues
+    parser.add_argument('-outfmt',
+                        dest='outfmt',
+                        help="""
+                        Output format of the mock catalogues.
+                        Options: (hdf5) = pandas HDF5 files, (parquet) = 
+                        Apache Parquet files, (h5py) = HDF5 files with one 
+                        dataset per column""",
+                        type=str,
+                        choices=['hdf5', 'parquet', 'h5py'],
+                        default='hdf5')
+    ## PyTables format of the `hdf5` catalogues
+    parser.add_argument('-hdf5_format',
+                        dest='hdf5_format',
+                        help="""
+                        PyTables format of the mock catalogues, when 
+                        `outfmt` is `hdf5`.
+                        Options: (fixed) = Fast to write and read in full,
+                        (table) = Queryable by column and row""",
+                        type=str,
+                        choices=['fixed', 'table'],
+                        default='fixed')
+    ## Compression level of the catalogues
+    parser.add_argument('-complevel',
+                        dest='complevel',
+                        help="""
+                        Compression level of the mock catalogues.
+                        If not given, the default level of each output 
+                        format is used""",
+                        type=int,
+                        default=None)
+    ## Compression library of the catalogues
+    parser.add_argument('-complib',
+                        dest='complib',
+                        help="""
+                        Compression library of the mock catalogues, e.g. 
+                        `zlib` or `blosc:lz4` (hdf5), `zstd` or `lz4` 
+                        (parquet), `lzf` or `gzip` (h5py).
+                        If not given, the default library of each output 
+                        format is used""",
+                        type=str,
+                        default=None)
+    ## Rendering of the figure of the catalogues in the simulation box
+    parser.add_argument('-box_render',
+                        dest='box_render',
+                        help="""
+                        Rendering of the mock catalogues in the figure of 
+                        the simulation box.
+                        Options: (points) = One marker per galaxy,
+                        (density) = One occupancy image per panel""",
+                        type=str,
+                        choices=['points', 'density'],
+                        default='points')
     ## Redshift-space distortions
     parser.add_argument('-zspace',
                         dest='zspace',
@@ -296,6 +376,21 @@ def add_to_dict(param_dict):
     hod_dict['alpha'   ] = 1.05
     hod_dict['zmed_val'] = 'z0p000'
     hod_dict['znow'    ] = 0
+    ## CLF Parameters - Used by the `numpy` CLF engine
+    # Best-fit CLF of Cacciato et al. (2009), MNRAS, 394, 929, with 
+    # `Ls* = 0.562 Lc`, for each `clf_type` that has a parameter set.
+    # `znow` is the redshift at which the parameters apply. The minimum
+    # luminosity of satellites is set by `hod_dict['logMmin']`.
+    # There is no LasDamas best-fit set (`clf_type` 2) for this engine
+    clf_dict             = {}
+    clf_dict[1]          = {'logL0'   : 10.17,
+                            'logM1'   : 11.24,
+                            'gamma1'  : 3.18 ,
+                            'gamma2'  : 0.245,
+                            'sigma_c' : 0.157,
+                            'alpha_s' : -1.18,
+                            'ls_frac' : 0.562,
+                            'znow'    : 0    }
     ## Choice of Survey
     choice_survey = 2
     ###
@@ -318,12 +413,15 @@ def add_to_dict(param_dict):
         survey_name = 'RESOLVE_{0}'.format(param_dict['survey'])
     ## README url
     readme_url = 'https://goo.gl/Xo317R'
+    ## Extension of the mock catalogues
+    catl_ext = cu.outfmt_extension(param_dict['outfmt'])
     ##
     ## Adding to `param_dict`
     param_dict['cens'         ] = cens
     param_dict['sats'         ] = sats
     param_dict['url_catl'     ] = url_catl
     param_dict['hod_dict'     ] = hod_dict
+    param_dict['clf_dict'     ] = clf_dict
     param_dict['choice_survey'] = choice_survey
     param_dict['plot_dict'    ] = plot_dict
     param_dict['const_dict'   ] = const_dict
@@ -331,6 +429,7 @@ def add_to_dict(param_dict):
     param_dict['l_para'       ] = l_para
     param_dict['survey_name'  ] = survey_name
     param_dict['readme_url'   ] = readme_url
+    param_dict['catl_ext'     ] = catl_ext
 
     return param_dict
 
@@ -548,25 +647,6 @@ def url_checker(url_str):
     else:
         pass
 
-def Mr_group_calc(gal_mr_arr):
-    """
-    Calculated total r-band absolute magnitude of the group
-
-    Parameters
-    ----------
-    gal_mr_arr: array_like
-        array of r-band absolute magnitudes of member galaxies of the group
-
-    Returns
-    -------
-    group_mr: float
-        total r-band absolute magnitude of the group
-    """
-    group_lum = num.sum(10.**cu.absolute_magnitude_to_luminosity(gal_mr_arr, 'r'))
-    group_mr  = cu.luminosity_to_absolute_mag(group_lum, 'r')
-
-    return group_mr
-
 def cosmo_create(param_dict, H0=100., Om0=0.25, Ob0=0.04, Tcmb0=2.7255):
     """
     Creates instance of the cosmology used throughout the project.
@@ -626,20 +706,60 @@ def cosmo_create(param_dict, H0=100., Om0=0.25, Ob0=0.04, Tcmb0=2.7255):
 
     return param_dict
 
+def hmf_table_key(cosmo_model, hmf_model, Mmin, Mmax, dlog10m):
+    """
+    Computes the key of a halo mass function table from the inputs that 
+    determine it.
+
+    Parameters
+    ----------
+    cosmo_model: astropy cosmology object
+        cosmology used throughout the project
+
+    hmf_model: string
+        Halo Mass Function choice
+
+    Mmin, Mmax, dlog10m: float
+        limits and spacing of the `log10` mass grid
+
+    Returns
+    ----------
+    hmf_key: string
+        MD5 hash of the cosmological parameters, HMF fitting function, 
+        mass grid and version of `hmf`
+    """
+    key_str = '|'.join([repr(cosmo_model),
+                        str(hmf_model),
+                        repr(float(Mmin)),
+                        repr(float(Mmax)),
+                        repr(float(dlog10m)),
+                        str(hmf.__version__)])
+    hmf_key = hashlib.md5(key_str.encode('utf-8')).hexdigest()
+
+    return hmf_key
+
 def hmf_calc(cosmo_model, proj_dict, param_dict, Mmin=10, Mmax=16, 
-    dlog10m=1e-3, hmf_model='warren', ext='csv', sep=',', 
+    dlog10m=1e-3, hmf_model='warren', ext='npz', 
     Prog_msg='1 >>   '):
     # Prog_msg=cu.Program_Msg(__file__)):
     """
-    Creates file with the desired mass function
+    Computes the desired mass function, or loads it from the cache.
+
+    Tables are stored in `mf_dir` under the key given by `hmf_table_key`, 
+    so they are computed only once per cosmology, HMF fitting function 
+    and mass grid, and are kept in memory for the rest of the process.
 
     Parameters
     ----------
     cosmo_model: astropy cosmology object
         cosmology used throughout the project
 
-    hmf_out: string
-        path to the output file for the halo mass function
+    proj_dict: python dictionary
+        dictionary with info of the project that uses the
+        `Data Science` Cookiecutter template.
+
+    param_dict: python dictionary
+        dictionary with `project` variables
 
     Mmin: float, optional (default = 10)
         minimum halo mass to evaluate
@@ -656,11 +776,8 @@ def hmf_calc(cosmo_model, proj_dict, param_dict, Mmin=10, Mmax=16,
             - 'warren': Uses Warren et al. (2006) HMF
             = 'tinker08': Uses Tinker et al. (2008) HMF
 
-    ext: string, optional (default = 'csv')
-        extension of output file
-
-    sep: string, optional (default = ',')
-        delimiter used for reading/writing the file
+    ext: string, optional (default = 'npz')
+        extension of the cache file
 
     Returns
     ----------
@@ -670,16 +787,6 @@ def hmf_calc(cosmo_model, proj_dict, param_dict, Mmin=10, Mmax=16,
                     DataFrame of `log10 masses` and `cumulative number 
                     densities` for halos of mass > M.
     """
-    ## HMF Output file
-    hmf_outfile = os.path.join( proj_dict['mf_dir'],
-                                '{0}_H0_{1}_HMF_{2}.{3}'.format(
-                                    param_dict['cosmo_choice'],
-                                    cosmo_model.H0.value,
-                                    hmf_model,
-                                    ext))
-    if os.path.exists(hmf_outfile):
-        # Removing file
-        os.remove(hmf_outfile)
     ## Halo mass function - Fitting function
     if hmf_model == 'warren':
         hmf_choice_fit = hmf.fitting_functions.Warren
@@ -689,16 +796,43 @@ def hmf_calc(cosmo_model, proj_dict, param_dict, Mmin=10, Mmax=16,
         msg = '{0} hmf_model `{1}` not supported! Exiting'.format(
             Prog_msg, hmf_model)
         raise ValueError(msg)
-    # Calculating HMF
-    mass_func = hmf.MassFunction(Mmin=Mmin, Mmax=Mmax, dlog10m=dlog10m,
-        cosmo_model=cosmo_model, hmf_model=hmf_choice_fit)
-    ## Log10(Mass) and cumulative number density of haloes
-    # HMF Pandas DataFrame
-    hmf_pd = pd.DataFrame({ 'logM':num.log10(mass_func.m), 
-                            'ngtm':mass_func.ngtm})
-    # Saving to output file
-    hmf_pd.to_csv(hmf_outfile, sep=sep, index=False,
-        columns=['logM','ngtm'])
+    ## HMF Cache file
+    hmf_key     = hmf_table_key(cosmo_model, hmf_model, Mmin, Mmax, dlog10m)
+    hmf_outfile = os.path.join( proj_dict['mf_dir'],
+                                '{0}_HMF_{1}_{2}.{3}'.format(
+                                    param_dict['cosmo_choice'],
+                                    hmf_model,
+                                    hmf_key,
+                                    ext))
+    if param_dict['remove_files']:
+        _HMF_CACHE.pop(hmf_key, None)
+        if os.path.exists(hmf_outfile):
+            # Removing file
+            os.remove(hmf_outfile)
+    ## Loading or computing the table
+    if hmf_key in _HMF_CACHE:
+        hmf_pd = _HMF_CACHE[hmf_key]
+    elif os.path.exists(hmf_outfile):
+        with num.load(hmf_outfile) as hmf_npz:
+            hmf_pd = pd.DataFrame({ 'logM':hmf_npz['logM'],
+                                    'ngtm':hmf_npz['ngtm']},
+                                    columns=['logM','ngtm'])
+    else:
+        # Calculating HMF
+        mass_func = hmf.MassFunction(Mmin=Mmin, Mmax=Mmax, dlog10m=dlog10m,
+            cosmo_model=cosmo_model, hmf_model=hmf_choice_fit)
+        ## Log10(Mass) and cumulative number density of haloes
+        # HMF Pandas DataFrame
+        hmf_pd = pd.DataFrame({ 'logM':num.log10(mass_func.m), 
+                                'ngtm':mass_func.ngtm},
+                                columns=['logM','ngtm'])
+        # Saving to cache file - Written to a temporary file first, so 
+        # that an interrupted run does not leave a partial table behind
+        hmf_tmpfile = hmf_outfile + '.tmp.npz'
+        num.savez(hmf_tmpfile, logM=hmf_pd['logM'].values,
+            ngtm=hmf_pd['ngtm'].values)
+        os.replace(hmf_tmpfile, hmf_outfile)
+    _HMF_CACHE[hmf_key] = hmf_pd
     # Saving to `param_dict`
     param_dict['hmf_pd'] = hmf_pd
 
@@ -844,7 +978,7 @@ def download_files(param_dict, proj_dict, hb_ii):
     return param_dict
 
 def z_comoving_calc(param_dict, proj_dict, 
-    zmin=0, zmax=0.5, dz=1e-3, ext='csv', sep=','):
+    zmin=0, zmax=0.5, dz=1e-3):
     """
     Computes the comoving distance of an object based on its redshift
     
@@ -860,46 +994,42 @@ def z_comoving_calc(param_dict, proj_dict,
     Returns
     ------------
     param_dict: python dictionary
-        updated dictionary with `project` variables + `z_como_pd`, which 
-        is the DataFrame with `z, d_comoving` in units of Mpc
+        updated dictionary with `project` variables + 
+            - `cosmo_dist`: `cu.ComovingDistance` object with the 
+                vectorized `z_to_d` and `d_to_z` conversions
+            - `z_como_pd`: DataFrame with `z, d_comoving` in units of Mpc
     """
     ## Constants
     Prog_msg = param_dict['Prog_msg']
     if param_dict['verbose']:
         print('{0} Comoving Distance Table Calc ....'.format(Prog_msg))
-    ## Cosmological model
-    cosmo_model = param_dict['cosmo_model']
-    ## File
-    z_comoving_file = os.path.join( proj_dict['cosmo_dir'],
-                                    '{0}_H0_{1}_z_comoving.{2}'.format(
-                                        param_dict['cosmo_choice'],
-                                        param_dict['cosmo_params']['H0'],
-                                        ext))
-    if (os.path.exists(z_comoving_file)) and (param_dict['remove_files']):
-        ## Removing file
-        os.remove(z_comoving_file)
-    if not os.path.exists(z_comoving_file):
-        ## Calculating comoving distance
-        # `z_arr`     : Unitless
-        # `d_comoving`:
-        z_arr     = num.arange(zmin, zmax, dz)
-        d_como    = cosmo_model.comoving_distance(z_arr).to(u.Mpc).value
-        z_como_pd = pd.DataFrame({'z':z_arr, 'd_como':d_como})
-        ## Saving to file
-        z_como_pd.to_csv(z_comoving_file, sep=sep, index=False)
-        cu.File_Exists(z_comoving_file)
-    else:
-        z_como_pd = pd.read_csv(z_comoving_file, sep=sep)
+    ## Cached table of comoving distances
+    cosmo_dist = cu.comoving_distance_table(param_dict['cosmo_model'],
+                    proj_dict['cosmo_dir'], zmin=zmin, zmax=zmax, dz=dz,
+                    prefix='{0}_H0_{1}'.format(
+                        param_dict['cosmo_choice'],
+                        param_dict['cosmo_params']['H0']),
+                    remove_files=param_dict['remove_files'])
+    z_como_pd  = pd.DataFrame({ 'z':cosmo_dist.z_arr,
+                                'd_como':cosmo_dist.d_arr},
+                                columns=['z', 'd_como'])
     ## Saving to `param_dict`
-    param_dict['z_como_pd'] = z_como_pd
+    param_dict['cosmo_dist'] = cosmo_dist
+    param_dict['z_como_pd' ] = z_como_pd
     if param_dict['verbose']:
         print('{0} Comoving Distance Table Calc .... Done'.format(Prog_msg))
 
     return param_dict
 
-def tarball_create(param_dict, proj_dict, catl_ext='hdf5'):
+def tarball_create(param_dict, proj_dict, catl_path_arr):
     """
-    Creates TAR object with mock catalogues, figures and README file
+    Creates TAR object with mock catalogues, figures and README file.
+
+    This is a consumer of `mocks_postprocess`, i.e. a generator that 
+    receives the catalogues through `send`. See `mocks_postprocess` for 
+    the protocol. The figures are added once all the catalogues have been 
+    received, so this consumer must be finished after the ones that 
+    create the figures.
 
     Parameters
     -----------
@@ -910,13 +1040,18 @@ def tarball_create(param_dict, proj_dict, catl_ext='hdf5'):
         dictionary with info of the project that uses the
         `Data Science` Cookiecutter template.
 
-    catl_ext: string, optional (default = 'hdf5')
-        file extension of the `mock` catalogues created.
+    catl_path_arr: array_like
+        paths to the `mock` catalogues that will be streamed
 
+    Notes
+    -----------
+    The TAR file is not created again if none of the catalogues changed 
+    since the last time it was created, according to the manifest of the 
+    mock catalogues. The figures are not part of this check, since they 
+    are derived from the catalogues.
+    In that case, the generator finishes without receiving any catalogue.
     """
     Prog_msg   = param_dict['Prog_msg' ]
-    ## List of Mock catalogues
-    catl_path_arr = cu.Index(proj_dict['mock_cat_mc'], catl_ext)
     ## README file
     # Downloading working README file
     readme_file   = os.path.join(   proj_dict['base_dir'],
@@ -943,28 +1078,62 @@ def tarball_create(param_dict, proj_dict, catl_ext='hdf5'):
                                     '{0}_{1}_catls.tar.gz'.format(
                                         param_dict['survey_name'],
                                         param_dict['halotype']))
-    # Opening file
-    with tarfile.open(tar_file_path, mode='w:gz') as tf:
-        # README file
-        tf.add(readme_file, arcname=os.path.basename(readme_file))
-        # Figures
-        tf.add(cart_pos_fig, arcname=os.path.basename(cart_pos_fig))
-        tf.add(lum_func_catls, arcname=os.path.basename(lum_func_catls))
-        for file_kk in catl_path_arr:
-            ## Reading in DataFrame
-            gal_pd_kk = cu.read_hdf5_file_to_pandas_DF(file_kk)
+    ## Checking manifest
+    manifest_file = mocks_manifest_file(param_dict, proj_dict)
+    manifest_dict = mocks_manifest_read(manifest_file, param_dict)
+    tar_inputs    = mock_outputs_stat(sorted(catl_path_arr))
+    tar_hash      = hashlib.md5(json.dumps(tar_inputs,
+                        sort_keys=True).encode('utf-8')).hexdigest()
+    tar_entry     = manifest_dict['tarball']
+    if ((not param_dict['remove_files']) and
+        (tar_entry.get('status'     ) == 'done'  ) and
+        (tar_entry.get('inputs_hash') == tar_hash) and
+        (mock_outputs_valid(tar_entry.get('outputs', {})))):
+        print('{0} TAR file is up to date: {1}'.format(Prog_msg, tar_file_path))
+        return
+    # Opening file - Written to a temporary file, so that an interrupted 
+    # run does not leave a partial TAR file behind
+    tar_tmp_path = tar_file_path + '.tmp'
+    tf = tarfile.open(tar_tmp_path, mode='w:gz')
+    try:
+        ## All the columns are needed
+        catl_item = (yield None)
+        while catl_item is not None:
+            (   kk       ,
+                file_kk  ,
+                gal_pd_kk) = catl_item
             ## DataFrame `without` certain columns
             gal_pd_mod = catl_drop_cols(gal_pd_kk)
             ## Saving modified DataFrame to file
             file_mod_kk = file_kk+'.mod'
-            cu.pandas_df_to_hdf5_file(gal_pd_mod, file_mod_kk, key='\gal_catl')
+            cu.pandas_df_to_file(gal_pd_mod, file_mod_kk, key='\gal_catl',
+                outfmt=param_dict['outfmt'], complevel=param_dict['complevel'],
+                complib=param_dict['complib'],
+                hdf5_format=param_dict['hdf5_format'])
             cu.File_Exists(file_mod_kk)
             # Saving to Tar-file
             tf.add(file_mod_kk, arcname=os.path.basename(file_kk))
             # Deleting extra file
             os.remove(file_mod_kk)
-    tf.close()
+            catl_item = (yield)
+        # README file
+        tf.add(readme_file, arcname=os.path.basename(readme_file))
+        # Figures
+        tf.add(cart_pos_fig, arcname=os.path.basename(cart_pos_fig))
+        tf.add(lum_func_catls, arcname=os.path.basename(lum_func_catls))
+        tf.close()
+    except BaseException:
+        tf.close()
+        if os.path.exists(tar_tmp_path):
+            os.remove(tar_tmp_path)
+        raise
+    os.replace(tar_tmp_path, tar_file_path)
     cu.File_Exists(tar_file_path)
+    ## Updating manifest
+    manifest_dict['tarball'] = {'status'     : 'done',
+                                'inputs_hash': tar_hash,
+                                'outputs'    : mock_outputs_stat([tar_file_path])}
+    mocks_manifest_write(manifest_dict, manifest_file)
     if param_dict['verbose']:
         print('{0} TAR file saved as: {1}'.format(Prog_msg, tar_file_path))
 
@@ -1010,7 +1179,8 @@ def hb_file_construction_extras(param_dict, proj_dict):
     ---------
     param_dict: python dictionary
         dictionary with updated 'hb_file_mod' key, which is the 
-        path to the file with number of galaxies per halo ID.
+        path to the file with number of galaxies per halo ID, and 
+        'hb_obj' key, which is the memory-mapped `cu.HalobiasFile` object.
     """
     Prog_msg = param_dict['Prog_msg']
     ## Local halobias file
@@ -1020,59 +1190,9 @@ def hb_file_construction_extras(param_dict, proj_dict):
                                     os.path.basename(hb_local)+'.mod')
     ## Reading in file
     print('{0} Reading in `hb_file`...'.format(Prog_msg))
-    with open(hb_local,'rb') as hb:
-        idat    = cu.fast_food_reader('int'  , 5, hb)
-        fdat    = cu.fast_food_reader('float', 9, hb)
-        znow    = cu.fast_food_reader('float', 1, hb)[0]
-        ngal    = int(idat[1])
-        lbox    = int(fdat[0])
-        x_arr   = cu.fast_food_reader('float' , ngal, hb)
-        y_arr   = cu.fast_food_reader('float' , ngal, hb)
-        z_arr   = cu.fast_food_reader('float' , ngal, hb)
-        vx_arr  = cu.fast_food_reader('float' , ngal, hb)
-        vy_arr  = cu.fast_food_reader('float' , ngal, hb)
-        vz_arr  = cu.fast_food_reader('float' , ngal, hb)
-        if 'Resolve_plk_5001' in os.path.basename(hb_local):
-            halom   = cu.fast_food_reader('float' , ngal, hb)
-            cs_flag = cu.fast_food_reader('int'   , ngal, hb)
-            haloid  = cu.fast_food_reader('int'   , ngal, hb)
-        else:
-            halom   = cu.fast_food_reader('double' , ngal, hb)
-            cs_flag = cu.fast_food_reader('int'   , ngal, hb)
-            haloid  = cu.fast_food_reader('long'   , ngal, hb)
-    ##
-    ## Counter of HaloIDs
-    haloid_counts = Counter(haloid)
-    # Array of `gals` in each `haloid`
-    haloid_ngal = [[] for x in range(ngal)]
-    for kk, halo_kk in enumerate(haloid):
-        haloid_ngal[kk] = haloid_counts[halo_kk]
-    haloid_ngal = num.asarray(haloid_ngal).astype(int)
-    ## Converting to Pandas DataFrame
-    # Dictionary
-    hb_dict = {}
-    hb_dict['x'          ] = x_arr
-    hb_dict['y'          ] = y_arr
-    hb_dict['z'          ] = z_arr
-    hb_dict['vx'         ] = vx_arr
-    hb_dict['vy'         ] = vy_arr
-    hb_dict['vz'         ] = vz_arr
-    hb_dict['halom'      ] = halom
-    hb_dict['loghalom'   ] = num.log10(halom)
-    hb_dict['cs_flag'    ] = cs_flag
-    hb_dict['haloid'     ] = haloid
-    hb_dict['haloid_ngal'] = haloid_ngal
-    # To DataFrame
-    hb_cols = ['x','y','z','vx','vy','vz','halom','loghalom',
-                'cs_flag','haloid','haloid_ngal']
-    hb_pd   = pd.DataFrame(hb_dict)[hb_cols]
-    ## Saving to file
-    hb_pd.to_csv(hb_file_mod, sep=" ", columns=hb_cols, 
-        index=False, header=False)
-    cu.File_Exists(hb_file_mod)
-    ## Assigning to `param_dict`
-    param_dict['hb_file_mod'] = hb_file_mod
-    param_dict['hb_cols'    ] = hb_cols
+    # Columns are memory-mapped and only loaded when accessed
+    hb_obj = cu.HalobiasFile(hb_local)
+    lbox   = hb_obj.lbox
     ## Testing `lbox`
     try:
         assert(lbox==param_dict['size_cube'])
@@ -1080,6 +1200,42 @@ def hb_file_construction_extras(param_dict, proj_dict):
         msg = '{0} `lbox` ({1}) does not match `size_cube` ({2})!'.format(
             Prog_msg, lbox, param_dict['size_cube'])
         raise ValueError(msg)
+    # Columns
+    hb_cols = ['x','y','z','vx','vy','vz','halom','loghalom',
+                'cs_flag','haloid','haloid_ngal']
+    ## Saving to file - Only needed by the CLF executable. The `numpy`
+    ## engine reads the columns directly from `hb_obj`
+    if param_dict['clf_engine'] == 'numpy':
+        hb_file_mod = None
+    else:
+        haloid = hb_obj.haloid
+        ##
+        ## Array of `gals` in each `haloid`
+        haloid_ngal = cu.group_multiplicity(haloid).astype(int)
+        ## Converting to Pandas DataFrame
+        # Dictionary
+        hb_dict = {}
+        hb_dict['x'          ] = hb_obj.x
+        hb_dict['y'          ] = hb_obj.y
+        hb_dict['z'          ] = hb_obj.z
+        hb_dict['vx'         ] = hb_obj.vx
+        hb_dict['vy'         ] = hb_obj.vy
+        hb_dict['vz'         ] = hb_obj.vz
+        hb_dict['halom'      ] = hb_obj.halom
+        hb_dict['loghalom'   ] = num.log10(hb_obj.halom)
+        hb_dict['cs_flag'    ] = hb_obj.cs_flag
+        hb_dict['haloid'     ] = haloid
+        hb_dict['haloid_ngal'] = haloid_ngal
+        # ASCII file
+        hb_pd = pd.DataFrame(hb_dict)[hb_cols]
+        hb_pd.to_csv(hb_file_mod, sep=" ", columns=hb_cols, 
+            index=False, header=False)
+    if hb_file_mod is not None:
+        cu.File_Exists(hb_file_mod)
+    ## Assigning to `param_dict`
+    param_dict['hb_file_mod'] = hb_file_mod
+    param_dict['hb_cols'    ] = hb_cols
+    param_dict['hb_obj'     ] = hb_obj
     # Message
     print('\n{0} Halo_ngal file: {1}'.format(Prog_msg, hb_file_mod))
     print('{0} Creating file with Ngals in each halo ... Complete'.format(Prog_msg))
@@ -1112,56 +1268,53 @@ def cen_sat_distance_calc(clf_pd, param_dict):
         Updated version of `clf_pd` with new columns of distances
         New key: `dist_c` --> Distance to the satellite's central galaxy
     """
-    ##
-    ## TO DO: Fix issue with central and satellite being really close to 
-    ##        the box boundary, therefore having different final distances
-    ##
     Prog_msg = param_dict['Prog_msg']
     if param_dict['verbose']:
         print('{0} Distance-Central Assignment ....'.format(Prog_msg))
     ## Centrals and Satellites
-    cens            = param_dict['cens']
-    sats            = param_dict['sats']
-    dist_c_label    = 'dist_c'
-    dist_sq_c_label = 'dist_c_sq'
+    cens         = param_dict['cens']
+    sats         = param_dict['sats']
+    dist_c_label = 'dist_c'
+    size_cube    = float(param_dict['size_cube'])
     ## Galaxy coordinates
-    coords  = ['x'   ,'y'   , 'z'  ]
-    coords2 = ['x_sq','y_sq','z_sq']
-    ## Unique HaloIDs
-    haloid_unq = num.unique(clf_pd.loc[clf_pd['halo_ngal'] != 1,'haloid'])
-    n_halo_unq = len(haloid_unq)
-    ## CLF columns
-    clf_cols = ['x','z','y','haloid','cs_flag']
-    ## Copy of `clf_pd`
-    clf_pd_mod = clf_pd[clf_cols].copy()
-    ## Initializing new column in `clf_pd`
-    clf_pd_mod.loc[:,dist_sq_c_label] = num.zeros(clf_pd.shape[0])
-    ## Positions squared
-    clf_pd_mod.loc[:,'x_sq'] = clf_pd_mod['x']**2
-    clf_pd_mod.loc[:,'y_sq'] = clf_pd_mod['y']**2
-    clf_pd_mod.loc[:,'z_sq'] = clf_pd_mod['z']**2
-    ## Looping over number of halos
-    # ProgressBar properties
-    for ii, halo_ii in enumerate(tqdm(haloid_unq)):
-        ## Halo ID subsample
-        halo_ii_pd   = clf_pd_mod.loc[clf_pd_mod['haloid']==halo_ii]
-        ## Cens and Sats DataFrames
-        cens_coords = halo_ii_pd.loc[halo_ii_pd['cs_flag']==cens, coords]
-        sats_coords = halo_ii_pd.loc[halo_ii_pd['cs_flag']==sats, coords]
-        sats_idx    = sats_coords.index.values
-        ## Distances from central galaxy
-        cens_coords_mean = cens_coords.mean(axis=0).values
-        ## Difference in coordinates
-        dist_sq_arr = num.sum(
-            sats_coords.subtract(cens_coords_mean, axis=1).values**2, axis=1)
-        ## Assigning distances to each satellite
-        clf_pd_mod.loc[sats_idx, dist_sq_c_label] = dist_sq_arr
-    ##
-    ## Taking the square root of distances
-    clf_pd_mod.loc[:,dist_c_label] = (clf_pd_mod[dist_sq_c_label].values)**.5
+    coords     = clf_pd[['x','y','z']].values.astype(float)
+    cs_flag    = clf_pd['cs_flag'].values
+    ## Index of each galaxy's halo
+    (   _         ,
+        _         ,
+        haloid_inv,
+        _         ) = cu.group_multiplicity(clf_pd['haloid'].values,
+                                            return_groups=True)
+    n_halo     = haloid_inv.max() + 1 if (len(haloid_inv) > 0) else 0
+    ## Mean position of the central(s) of each halo
+    cens_mask  = (cs_flag == cens)
+    cens_inv   = haloid_inv[cens_mask]
+    cens_n     = num.bincount(cens_inv, minlength=n_halo).astype(float)
+    cens_pos   = num.full((n_halo, 3), num.nan)
+    with num.errstate(invalid='ignore', divide='ignore'):
+        for kk in range(3):
+            ## Centrals close to the box boundary are unwrapped around 
+            ## the first central of the halo before averaging
+            cens_ref_kk = num.full(n_halo, num.nan)
+            cens_ref_kk[cens_inv[::-1]] = coords[cens_mask, kk][::-1]
+            cens_dx_kk  = coords[cens_mask, kk] - cens_ref_kk[cens_inv]
+            cens_dx_kk -= size_cube * num.round(cens_dx_kk / size_cube)
+            cens_pos[:, kk] = cens_ref_kk + (num.bincount(cens_inv,
+                                weights=cens_dx_kk, minlength=n_halo) / cens_n)
+    ## Broadcasting central positions to satellites
+    sats_mask  = (cs_flag == sats)
+    sats_dx    = coords[sats_mask] - cens_pos[haloid_inv[sats_mask]]
+    ## Minimum-image distances - Periodic boundaries of the box
+    sats_dx   -= size_cube * num.round(sats_dx / size_cube)
+    ##
+    ## Assigning distances to each satellite
+    dist_c_arr            = num.zeros(len(clf_pd))
+    dist_c_arr[sats_mask] = num.sum(sats_dx**2, axis=1)**.5
+    # Galaxies that are alone in their halo
+    dist_c_arr[clf_pd['halo_ngal'].values == 1] = 0.
     ##
     ## Assigning it to `clf_pd`
-    clf_pd.loc[:, dist_c_label] = clf_pd_mod[dist_c_label].values
+    clf_pd.loc[:, dist_c_label] = dist_c_arr
     if param_dict['verbose']:
         print('{0} Distance-Central Assignment .... Done'.format(Prog_msg))
 
@@ -1290,16 +1443,119 @@ def clf_assignment(param_dict, proj_dict, choice_survey=2):
 
     return clf_pd
 
-def mr_survey_matching(clf_pd, param_dict, proj_dict):
+def clf_assignment_numpy(param_dict, proj_dict):
     """
-    Finds the closest r-band absolute magnitude from ECO catalogue 
-    and assigns them to mock galaxies
+    Computes the conditional luminosity function on the halobias file, 
+    in-process, without calling the `CLF_with_ftread` executable.
+
+    Luminosities are drawn from the CLF of each galaxy's host halo, and 
+    r-band absolute magnitudes are assigned by abundance matching the 
+    luminosities to the ECO luminosity function.
 
     Parameters
-    -------------
+    ----------
+    param_dict: python dictionary
+        dictionary with `project` variables
+
+    proj_dict: python dictionary
+        dictionary with info of the project that uses the
+        `Data Science` Cookiecutter template.
+
+    Returns
+    ----------
     clf_pd: pandas DataFrame
-        DataFrame containing information from Halobias + CLF procedures
-    
+        DataFrame with information from the CLF process.
+        Same format as the output of `clf_assignment`.
+    """
+    Prog_msg = param_dict['Prog_msg']
+    if param_dict['verbose']:
+        print('{0} CLF Assignment (numpy) ....'.format(Prog_msg))
+    ## CLF parameters
+    if param_dict['clf_type'] not in param_dict['clf_dict']:
+        msg  = '{0} `clf_type` ({1}) has no parameters for the `numpy` CLF '
+        msg += 'engine! Options: {2}. Use `-clf_engine c`.'
+        msg  = msg.format(Prog_msg, param_dict['clf_type'],
+                    sorted(param_dict['clf_dict'].keys()))
+        raise ValueError(msg)
+    ## HOD parameters
+    hod_dict = param_dict['hod_dict']
+    clf_dict = dict(param_dict['clf_dict'][param_dict['clf_type']])
+    if hod_dict['znow'] != clf_dict['znow']:
+        msg  = '{0} `znow` ({1}) does not match the redshift of the CLF '
+        msg += 'parameters ({2})! Use `-clf_engine c`.'
+        msg  = msg.format(Prog_msg, hod_dict['znow'], clf_dict['znow'])
+        raise ValueError(msg)
+    # Satellites are drawn above the luminosity of a central in the 
+    # least massive halo of the HOD, i.e. `logMmin`
+    clf_dict['logL_min'] = cu.clf_central_lum(hod_dict['logMmin'], clf_dict)
+    ## Halobias columns
+    hb_obj   = param_dict['hb_obj']
+    loghalom = num.log10(hb_obj.halom)
+    cs_flag  = num.asarray(hb_obj.cs_flag)
+    haloid   = num.asarray(hb_obj.haloid)
+    ## ECO luminosity function
+    eco_lum_pd = pd.read_csv(param_dict['files_dict']['eco_lum_file_local'],
+                    sep='\s+', header=None, names=['M_r', 'n_dens'],
+                    comment='#')
+    ## Luminosities and r-band absolute magnitudes
+    n_proc   = max(int(cpu_count() * param_dict['cpu_frac']), 1)
+    logL_arr = cu.clf_lum_assign(   loghalom,
+                                    cs_flag,
+                                    clf_dict,
+                                    seed=param_dict['seed'],
+                                    cens=param_dict['cens'],
+                                    n_proc=n_proc)
+    mr_arr   = cu.lum_abundance_matching(   logL_arr,
+                                            param_dict['size_cube']**3,
+                                            eco_lum_pd['M_r'].values,
+                                            eco_lum_pd['n_dens'].values)
+    ##
+    ## Removing galaxies fainter than the ECO luminosity function.
+    ## Halos whose central is removed are removed as a whole, so that
+    ## every halo left keeps its central
+    mr_nan   = num.isnan(mr_arr)
+    halo_rm  = num.unique(haloid[mr_nan & (cs_flag == param_dict['cens'])])
+    gal_keep = ~(mr_nan | num.isin(haloid, halo_rm))
+    if not gal_keep.all():
+        msg  = '{0} {1} galaxies fainter than the ECO luminosity function '
+        msg += 'were removed, along with the satellites of {2} halos'
+        print(msg.format(Prog_msg, (~gal_keep).sum(), len(halo_rm)))
+    ##
+    ## Constructing CLF DataFrame
+    clf_cols = ['x','y','z','vx','vy','vz',
+                'loghalom','cs_flag','haloid','halo_ngal','M_r','galid']
+    clf_dict_pd = {}
+    for coord_zz in ['x','y','z','vx','vy','vz']:
+        clf_dict_pd[coord_zz] = num.asarray(hb_obj[coord_zz])[gal_keep]
+    clf_dict_pd['loghalom' ] = loghalom[gal_keep]
+    clf_dict_pd['cs_flag'  ] = cs_flag [gal_keep]
+    clf_dict_pd['haloid'   ] = haloid  [gal_keep]
+    clf_dict_pd['halo_ngal'] = cu.group_multiplicity(haloid[gal_keep])
+    clf_dict_pd['M_r'      ] = mr_arr  [gal_keep]
+    clf_dict_pd['galid'    ] = num.where(gal_keep)[0].astype(int)
+    clf_pd = pd.DataFrame(clf_dict_pd)[clf_cols]
+    ## Copy of galaxy positions
+    for coord_zz in ['x','y','z']:
+        clf_pd.loc[:, coord_zz+'_orig'] = clf_pd[coord_zz].values
+    ## Galaxy indices
+    clf_pd.loc[:,'idx'] = clf_pd.index.values
+    if param_dict['verbose']:
+        print('{0} CLF Assignment (numpy) .... Done'.format(Prog_msg))
+
+    return clf_pd
+
+def survey_phot_load(param_dict, proj_dict):
+    """
+    Reads the ECO and RESOLVE-B photometry catalogues used for assigning
+    galaxy properties to mock galaxies.
+    The filtered, column-pruned catalogues are cached in an HDF5 file
+    under `phot_dir`, keyed by the checksum of the source files and the
+    magnitude limits, and they are read from it on subsequent runs.
+    The checksum of a source file is only recomputed when its size or
+    modification time change.
+
+    Parameters
+    -------------
     param_dict: python dictionary
         dictionary with `project` variables
 
@@ -1309,33 +1565,47 @@ def mr_survey_matching(clf_pd, param_dict, proj_dict):
 
     Returns
     -------------
-    clf_galprop_pd: pandas DataFrame
-        DataFrame with updated values.
-        New values included:
-            - Morphology
-            - Stellar mass
-            - r-band apparent magnitude
-            - u-band apparent magnitude
-            - FSMGR
-            - `Match_Flag`:
-            - MHI
-            - Survey flag: {1 == ECO, 0 == Resolve B}
+    eco_phot_mod_pd: pandas DataFrame
+        DataFrame with the ECO galaxies brighter than `mr_limit`
+
+    res_phot_mod_pd: pandas DataFrame
+        DataFrame with the RESOLVE-B galaxies between `mr_eco` and
+        `mr_res_b`
     """
     Prog_msg   = param_dict['Prog_msg']
-    if param_dict['verbose']:
-        print('{0} ECO/Resolve Galaxy Prop. Assign. ....'.format(Prog_msg))
     ## Constants
     failval    = 0.
-    ngal_mock  = len(clf_pd)
-    ## Survey flags
-    eco_flag = 1
-    res_flag = 0
-    ## Copy of `clf_pd`
-    clf_pd_mod = clf_pd.copy()
+    ## Galaxy properties column names
+    eco_cols = ['goodnewabsr', 'goodmorph','rpsmoothrestrmagnew',
+                'rpsmoothrestumagnew', 'rpgoodmstarsnew','rpmeanssfr', 'MHI']
+    res_cols = ['ABSMAGR', 'MORPH', 'SMOOTHRESTRMAG','SMOOTHRESTUMAG',
+                'MSTARS', 'MODELFSMGR', 'MHI']
     ## Filenames
     eco_phot_file   = param_dict['files_dict']['eco_phot_file_local']
     eco_mhi_file    = param_dict['files_dict']['mhi_file_local']
     res_b_phot_file = param_dict['files_dict']['res_b_phot_file_local']
+    ## Cache file
+    phot_checksum   = cu.File_Checksum(
+                        [eco_phot_file, eco_mhi_file, res_b_phot_file],
+                        extra=[ param_dict['mr_limit'],
+                                param_dict['mr_eco'  ],
+                                param_dict['mr_res_b']],
+                        stat_file=os.path.join( proj_dict['phot_dir'],
+                                                'survey_phot_stat.json'))
+    phot_cache_file = os.path.join( proj_dict['phot_dir'],
+                                    'survey_phot_cache_{0}.h5'.format(
+                                        phot_checksum))
+    if (os.path.exists(phot_cache_file)) and (param_dict['remove_files']):
+        ## Removing file
+        os.remove(phot_cache_file)
+    if os.path.exists(phot_cache_file):
+        if param_dict['verbose']:
+            print('{0} Reading cached photometry: {1}'.format(
+                Prog_msg, phot_cache_file))
+        eco_phot_mod_pd = pd.read_hdf(phot_cache_file, key='eco')
+        res_phot_mod_pd = pd.read_hdf(phot_cache_file, key='resolve_b')
+
+        return eco_phot_mod_pd, res_phot_mod_pd
     ## ECO Photometry catalogue
     #  - reading in dictionary
     eco_phot_dict = readsav(eco_phot_file, python_dict=True)
@@ -1357,7 +1627,7 @@ def mr_survey_matching(clf_pd, param_dict, proj_dict):
     ## Cleaning up DataFrame - r-band absolute magnitudes
     eco_phot_mod_pd = eco_phot_pd.loc[(eco_phot_pd['goodnewabsr'] != failval) &
                       (eco_phot_pd['goodnewabsr'] < param_dict['mr_limit'])]
-    eco_phot_mod_pd.reset_index(inplace=True, drop=True)
+    eco_phot_mod_pd = eco_phot_mod_pd[eco_cols].reset_index(drop=True)
     ##
     ## Reading in `RESOLVE B` catalogue - r-band absolute magnitudes
     res_phot_pd = Table(fits.getdata(res_b_phot_file)).to_pandas()
@@ -1365,16 +1635,79 @@ def mr_survey_matching(clf_pd, param_dict, proj_dict):
                         (res_phot_pd['ABSMAGR'] != failval) &
                         (res_phot_pd['ABSMAGR'] <= param_dict['mr_res_b']) &
                         (res_phot_pd['ABSMAGR'] >  param_dict['mr_eco'  ])]
-    res_phot_mod_pd.reset_index(inplace=True, drop=True)
+    res_phot_mod_pd = res_phot_mod_pd[res_cols].reset_index(drop=True)
     ##
-    ## Initializing arrays
-    morph_arr       = [[] for x in range(ngal_mock)]
-    dex_rmag_arr    = [[] for x in range(ngal_mock)]
-    dex_umag_arr    = [[] for x in range(ngal_mock)]
-    logmstar_arr    = [[] for x in range(ngal_mock)]
-    fsmgr_arr       = [[] for x in range(ngal_mock)]
-    survey_flag_arr = [[] for x in range(ngal_mock)]
-    mhi_arr         = [[] for x in range(ngal_mock)]
+    ## Saving to cache file
+    eco_phot_mod_pd.to_hdf(phot_cache_file, key='eco', mode='w')
+    res_phot_mod_pd.to_hdf(phot_cache_file, key='resolve_b', mode='a')
+    cu.File_Exists(phot_cache_file)
+
+    return eco_phot_mod_pd, res_phot_mod_pd
+
+def morph_str_convert(morph_arr):
+    """
+    Converts the morphologies of a survey catalogue to strings
+
+    Parameters
+    -------------
+    morph_arr: array_like
+        array of morphologies, as `str` or `bytes` objects
+
+    Returns
+    -------------
+    morph_str_arr: numpy.ndarray
+        object array of `str` morphologies
+    """
+    morph_str_arr = num.array([ morph_ii.decode('utf-8')
+                                if isinstance(morph_ii, bytes)
+                                else str(morph_ii) for morph_ii in morph_arr],
+                                dtype=object)
+
+    return morph_str_arr
+
+def mr_survey_matching(clf_pd, param_dict, proj_dict):
+    """
+    Finds the closest r-band absolute magnitude from ECO catalogue 
+    and assigns them to mock galaxies
+
+    Parameters
+    -------------
+    clf_pd: pandas DataFrame
+        DataFrame containing information from Halobias + CLF procedures
+    
+    param_dict: python dictionary
+        dictionary with `project` variables
+
+    proj_dict: python dictionary
+        dictionary with info of the project that uses the
+        `Data Science` Cookiecutter template.
+
+    Returns
+    -------------
+    clf_galprop_pd: pandas DataFrame
+        DataFrame with updated values.
+        New values included:
+            - Morphology (empty string if there is no match)
+            - Stellar mass
+            - r-band apparent magnitude
+            - u-band apparent magnitude
+            - FSMGR
+            - `Match_Flag`:
+            - MHI
+            - Survey flag: {1 == ECO, 0 == Resolve B, -1 == No match}
+    """
+    Prog_msg   = param_dict['Prog_msg']
+    if param_dict['verbose']:
+        print('{0} ECO/Resolve Galaxy Prop. Assign. ....'.format(Prog_msg))
+    ## Constants
+    ngal_mock  = len(clf_pd)
+    ## Survey flags
+    eco_flag = 1
+    res_flag = 0
+    ## Copy of `clf_pd`
+    clf_pd_mod = clf_pd.copy()
+    ## ECO and RESOLVE-B photometry catalogues
+    eco_phot_mod_pd, res_phot_mod_pd = survey_phot_load(param_dict, proj_dict)
     ##
     ## Assigning galaxy properties to mock galaxies
     #
@@ -1386,44 +1719,66 @@ def mr_survey_matching(clf_pd, param_dict, proj_dict):
                 'rpgoodmstarsnew','rpmeanssfr']
     res_cols = ['MORPH', 'SMOOTHRESTRMAG','SMOOTHRESTUMAG','MSTARS',
                 'MODELFSMGR']
-    # Looping over all galaxies
-    for ii in tqdm(range(ngal_mock)):
-        ## Galaxy r-band absolute magnitude
-        gal_mr = clf_mr_arr[ii]
-        ## Choosing which catalogue to use
-        if gal_mr <= param_dict['mr_eco']:
-            idx_match  = cu.closest_val(gal_mr, eco_mr_arr)
-            survey_tag = eco_flag
-            ## Galaxy Properties
-            (   morph_val,
-                rmag_val ,
-                umag_val ,
-                logmstar_val,
-                fsmgr_val) = eco_phot_mod_pd.loc[idx_match, eco_cols].values
-            # MHI value
-            mhi_val   = 10**(eco_phot_mod_pd['MHI'][idx_match] + logmstar_val)
-        elif (gal_mr > param_dict['mr_eco']) and (gal_mr <= param_dict['mr_res_b']):
-            idx_match  = cu.closest_val(gal_mr, res_mr_arr)
-            survey_tag = res_flag
-            ## Galaxy Properties
-            (   morph_val,
-                rmag_val ,
-                umag_val ,
-                mstar_val,
-                fsmgr_val) = res_phot_mod_pd.loc[idx_match, res_cols]
-            ## MHI value
-            mhi_val = res_phot_mod_pd.loc[idx_match, 'MHI']
-            ## Fixing issue with units
-            logmstar_val = num.log10(mstar_val)
-        ##
-        ## Assigning them to arrays
-        morph_arr       [ii] = morph_val
-        dex_rmag_arr    [ii] = rmag_val
-        dex_umag_arr    [ii] = umag_val
-        logmstar_arr    [ii] = logmstar_val
-        fsmgr_arr       [ii] = fsmgr_val
-        mhi_arr         [ii] = mhi_val
-        survey_flag_arr [ii] = survey_tag
+    ## Choosing which catalogue to use
+    eco_mask = clf_mr_arr <= param_dict['mr_eco']
+    res_mask = ((clf_mr_arr >  param_dict['mr_eco']) &
+                (clf_mr_arr <= param_dict['mr_res_b']))
+    ## Closest magnitudes - Candidates
+    (   eco_sort_idx ,
+        eco_tie_start,
+        eco_tie_count) = cu.closest_val_arr(clf_mr_arr[eco_mask], eco_mr_arr,
+                            return_ties=True)
+    (   res_sort_idx ,
+        res_tie_start,
+        res_tie_count) = cu.closest_val_arr(clf_mr_arr[res_mask], res_mr_arr,
+                            return_ties=True)
+    ## Random tie-breaking, in the order of the mock galaxies
+    tie_count = num.zeros(ngal_mock, dtype=int)
+    tie_count[eco_mask] = eco_tie_count
+    tie_count[res_mask] = res_tie_count
+    tie_offset = num.zeros(ngal_mock, dtype=int)
+    tie_bool   = tie_count > 1
+    if tie_bool.any():
+        tie_offset[tie_bool] = num.random.randint(0, tie_count[tie_bool])
+    eco_idx = eco_sort_idx[eco_tie_start + tie_offset[eco_mask]]
+    res_idx = res_sort_idx[res_tie_start + tie_offset[res_mask]]
+    ##
+    ## Initializing arrays
+    #  Galaxies fainter than `mr_res_b` are not matched. Their morphology
+    #  is an empty string, so that the column only holds strings
+    morph_arr       = num.full(ngal_mock, '', dtype=object)
+    dex_rmag_arr    = num.full(ngal_mock, num.nan)
+    dex_umag_arr    = num.full(ngal_mock, num.nan)
+    logmstar_arr    = num.full(ngal_mock, num.nan)
+    fsmgr_arr       = num.full(ngal_mock, num.nan)
+    mhi_arr         = num.full(ngal_mock, num.nan)
+    survey_flag_arr = num.full(ngal_mock, -1, dtype=int)
+    ##
+    ## ECO - Galaxy Properties
+    eco_prop_pd = eco_phot_mod_pd.loc[eco_idx, eco_cols + ['MHI']]
+    morph_arr      [eco_mask] = morph_str_convert(
+                                    eco_prop_pd['goodmorph'].values)
+    dex_rmag_arr   [eco_mask] = eco_prop_pd['rpsmoothrestrmagnew'].values
+    dex_umag_arr   [eco_mask] = eco_prop_pd['rpsmoothrestumagnew'].values
+    logmstar_arr   [eco_mask] = eco_prop_pd['rpgoodmstarsnew'    ].values
+    fsmgr_arr      [eco_mask] = eco_prop_pd['rpmeanssfr'         ].values
+    # MHI value
+    mhi_arr        [eco_mask] = 10**(eco_prop_pd['MHI'].values +
+                                     logmstar_arr[eco_mask])
+    survey_flag_arr[eco_mask] = eco_flag
+    ##
+    ## RESOLVE-B - Galaxy Properties
+    res_prop_pd = res_phot_mod_pd.loc[res_idx, res_cols + ['MHI']]
+    morph_arr      [res_mask] = morph_str_convert(
+                                    res_prop_pd['MORPH'].values)
+    dex_rmag_arr   [res_mask] = res_prop_pd['SMOOTHRESTRMAG'].values
+    dex_umag_arr   [res_mask] = res_prop_pd['SMOOTHRESTUMAG'].values
+    ## Fixing issue with units
+    logmstar_arr   [res_mask] = num.log10(res_prop_pd['MSTARS'].values)
+    fsmgr_arr      [res_mask] = res_prop_pd['MODELFSMGR'    ].values
+    ## MHI value
+    mhi_arr        [res_mask] = res_prop_pd['MHI'].values
+    survey_flag_arr[res_mask] = res_flag
     ##
     ## Assigning them to `clf_pd_mod`
     clf_pd_mod.loc[:,'morph'      ] = morph_arr
@@ -1471,6 +1826,11 @@ def resolve_a_geometry_mocks(clf_pd, param_dict, proj_dict):
     proj_dict: python dictionary
         dictionary with info of the project that uses the
         `Data Science` Cookiecutter template.
+
+    Returns
+    -------------
+    catl_fail_dict: python dictionary
+        dictionary with the traceback of each mock catalogue that failed
     """
     ## Constants
     Prog_msg = param_dict['Prog_msg']
@@ -1484,7 +1844,7 @@ def resolve_a_geometry_mocks(clf_pd, param_dict, proj_dict):
     ##########################################
     ###### ----- 1st Set of Mocks  -----######
     ##########################################
-    clf_1_pd     = copy.deepcopy(clf_pd)
+    coord_1_perm = ('x', 'y', 'z')
     coord_1_dict = coord_dict.copy()
     # Coordinates
     x_init_1  =  56.
@@ -1513,18 +1873,14 @@ def resolve_a_geometry_mocks(clf_pd, param_dict, proj_dict):
             for cc in z_pos_1_arr:
                 ## Appending positions
                 pos_coords_mocks.append([aa, bb, cc, 
-                                         clf_1_pd.copy(), coord_1_dict])
+                                         coord_1_perm, coord_1_dict])
                 ncatls += 1
     ##########################################
     ###### ----- 2nd Set of Mocks  -----######
     ##########################################
-    clf_2_pd     = copy.deepcopy(clf_pd)
     coord_2_dict = coord_dict.copy()
-    # Changing coordinates
-    x_arr_2 = clf_2_pd['x'].copy()
-    y_arr_2 = clf_2_pd['y'].copy()
-    clf_2_pd.loc[:,'x'] = y_arr_2
-    clf_2_pd.loc[:,'y'] = x_arr_2
+    # Changing coordinates - Swapping `x` and `y`
+    coord_2_perm = ('y', 'x', 'z')
     # Determining positions
     x_init_2  = 56.
     y_init_2  = 100.
@@ -1548,19 +1904,15 @@ def resolve_a_geometry_mocks(clf_pd, param_dict, proj_dict):
             for cc in z_pos_2_arr:
                 ## Appending positions
                 pos_coords_mocks.append([aa, bb, cc,
-                                         clf_2_pd, coord_2_dict])
+                                         coord_2_perm, coord_2_dict])
                 ## Incrementing values
                 ncatls += 1
     ##########################################
     ###### ----- 3rd Set of Mocks  -----######
     ##########################################
-    clf_3_pd     = copy.deepcopy(clf_pd)
     coord_3_dict = coord_dict.copy()
-    # Changing coordinates
-    x_arr_3 = clf_3_pd['x'].copy()
-    z_arr_3 = clf_3_pd['z'].copy()
-    clf_3_pd.loc[:,'x'] = z_arr_3
-    clf_3_pd.loc[:,'z'] = x_arr_3
+    # Changing coordinates - Swapping `x` and `z`
+    coord_3_perm = ('z', 'y', 'x')
     ## Determining positions
     x_init_3   = 90.
     y_init_3   = 100.
@@ -1585,50 +1937,17 @@ def resolve_a_geometry_mocks(clf_pd, param_dict, proj_dict):
             for cc in z_pos_3_arr:
                 ## Appending positions
                 pos_coords_mocks.append([aa, bb, cc,
-                                         clf_3_pd, coord_3_dict])
+                                         coord_3_perm, coord_3_dict])
                 ## Incrementing values
                 ncatls += 1
     ##############################################
     ## Creating mock catalogues
     ##############################################
-    ##
-    ## ----| Multiprocessing |---- ##
-    ##
-    ## Number of catalogues
-    n_catls = len(pos_coords_mocks)
-    ## CPU counts
-    cpu_number = int(cpu_count() * param_dict['cpu_frac'])
-    ## Step-size for each CPU
-    if cpu_number <= len(pos_coords_mocks):
-        catl_step = int(n_catls / cpu_number)
-        memb_arr  = num.arange(0, n_catls+1, catl_step)
-    else:
-        catl_step = int((n_catls/cpu_number)**-1)
-        memb_arr  = num.arange(0, n_catls+1)
-    ## Array with designated catalogue numbers for each CPU
-    memb_arr[-1] = n_catls
-    ## Tuples of the ID of each catalogue
-    memb_tuples = num.asarray([(memb_arr[xx], memb_arr[xx+1])
-                            for xx in range(memb_arr.size-1)])
-    ## Assigning `memb_tuples` to function `multiprocessing_catls`
-    print('{0} Creating Mock Catalogues ....'.format(param_dict['Prog_msg']))
-    procs = []
-    for ii in range(len(memb_tuples)):
-        ## Defining `proc` element
-        proc = Process(target=multiprocessing_catls,
-                        args=(  memb_tuples[ii], pos_coords_mocks, param_dict, 
-                                proj_dict, ii))
-        # Appending to main `procs` list
-        procs.append(proc)
-        proc.start()
-    ##
-    ## Joining `procs`
-    for proc in procs:
-        proc.join()
-    ##
-    ## Reinitializing `param_dict` to None
-    if param_dict['verbose']:
-        print('\n{0} Creating Mock Catalogues .... Done'.format(Prog_msg))
+    (   catl_times_dict,
+        catl_fail_dict ) = mock_catls_run(  clf_pd, pos_coords_mocks,
+                                            param_dict, proj_dict)
+
+    return catl_fail_dict
 
 def resolve_b_geometry_mocks(clf_pd, param_dict, proj_dict):
     """
@@ -1646,6 +1965,11 @@ def resolve_b_geometry_mocks(clf_pd, param_dict, proj_dict):
     proj_dict: python dictionary
         dictionary with info of the project that uses the
         `Data Science` Cookiecutter template.
+
+    Returns
+    -------------
+    catl_fail_dict: python dictionary
+        dictionary with the traceback of each mock catalogue that failed
     """
     ## Constants
     Prog_msg = param_dict['Prog_msg']
@@ -1659,7 +1983,7 @@ def resolve_b_geometry_mocks(clf_pd, param_dict, proj_dict):
     ##########################################
     ###### ----- 1st Set of Mocks  -----######
     ##########################################
-    clf_1_pd     = copy.deepcopy(clf_pd)
+    coord_1_perm = ('x', 'y', 'z')
     coord_1_dict = coord_dict.copy()
     # Coordinates
     gap_1    = 10.
@@ -1699,11 +2023,11 @@ def resolve_b_geometry_mocks(clf_pd, param_dict, proj_dict):
             for cc in z_pos_1_arr:
                 ## Appending positions
                 pos_coords_mocks.append([aa, bb, cc,
-                                         clf_1_pd.copy(), coord_1_dict])
+                                         coord_1_perm, coord_1_dict])
     ##########################################
     ###### ----- 2nd Set of Mocks  -----######
     ##########################################
-    clf_2_pd     = copy.deepcopy(clf_pd)
+    coord_2_perm = ('x', 'y', 'z')
     coord_2_dict = coord_dict.copy()
     # Changing coordinates
     coord_2_dict['ra_min'] += 180.
@@ -1752,48 +2076,15 @@ def resolve_b_geometry_mocks(clf_pd, param_dict, proj_dict):
             for cc in z_pos_2_arr:
                 ## Appending positions
                 pos_coords_mocks.append([aa, bb, cc, 
-                                         clf_2_pd.copy(), coord_2_dict])
+                                         coord_2_perm, coord_2_dict])
     ##############################################
     ## Creating mock catalogues
     ##############################################
-    ##
-    ## ----| Multiprocessing |---- ##
-    ##
-    ## Number of catalogues
-    n_catls = len(pos_coords_mocks)
-    ## CPU counts
-    cpu_number = int(cpu_count() * param_dict['cpu_frac'])
-    ## Step-size for each CPU
-    if cpu_number <= len(pos_coords_mocks):
-        catl_step = int(n_catls / cpu_number)
-        memb_arr  = num.arange(0, n_catls+1, catl_step)
-    else:
-        catl_step = int((n_catls/cpu_number)**-1)
-        memb_arr  = num.arange(0, n_catls+1)
-    ## Array with designated catalogue numbers for each CPU
-    memb_arr[-1] = n_catls
-    ## Tuples of the ID of each catalogue
-    memb_tuples = num.asarray([(memb_arr[xx], memb_arr[xx+1])
-                            for xx in range(memb_arr.size-1)])
-    ## Assigning `memb_tuples` to function `multiprocessing_catls`
-    print('{0} Creating Mock Catalogues ....'.format(param_dict['Prog_msg']))
-    procs = []
-    for ii in range(len(memb_tuples)):
-        ## Defining `proc` element
-        proc = Process(target=multiprocessing_catls,
-                        args=(  memb_tuples[ii], pos_coords_mocks, param_dict, 
-                                proj_dict, ii))
-        # Appending to main `procs` list
-        procs.append(proc)
-        proc.start()
-    ##
-    ## Joining `procs`
-    for proc in procs:
-        proc.join()
-    ##
-    ## Reinitializing `param_dict` to None
-    if param_dict['verbose']:
-        print('\n{0} Creating Mock Catalogues .... Done'.format(Prog_msg))
+    (   catl_times_dict,
+        catl_fail_dict ) = mock_catls_run(  clf_pd, pos_coords_mocks,
+                                            param_dict, proj_dict)
+
+    return catl_fail_dict
 
 def eco_geometry_mocks(clf_pd, param_dict, proj_dict):
     """
@@ -1811,6 +2102,11 @@ def eco_geometry_mocks(clf_pd, param_dict, proj_dict):
     proj_dict: python dictionary
         dictionary with info of the project that uses the
         `Data Science` Cookiecutter template.
+
+    Returns
+    -------------
+    catl_fail_dict: python dictionary
+        dictionary with the traceback of each mock catalogue that failed
     """
     ## Constants
     Prog_msg = param_dict['Prog_msg']
@@ -1824,7 +2120,7 @@ def eco_geometry_mocks(clf_pd, param_dict, proj_dict):
     ##############################################
     ###### ----- X-Y Upper Left Mocks  -----######
     ##############################################
-    clf_ul_pd     = copy.deepcopy(clf_pd)
+    coord_perm_ul = ('x', 'y', 'z')
     coord_dict_ul = coord_dict.copy()
     # Coordinates
     coord_dict_ul['ra_min']  = 90. - coord_dict_ul['ra_range']
@@ -1841,13 +2137,13 @@ def eco_geometry_mocks(clf_pd, param_dict, proj_dict):
     ## Determining positions
     for kk in range(z_mocks_n_ul):
         pos_coords_mocks.append([   x_init_ul, y_init_ul, z_init_ul,
-                                    clf_ul_pd.copy(), coord_dict_ul])
+                                    coord_perm_ul, coord_dict_ul])
         z_init_ul += z_delta_ul
     ##############################################
     ###### ----- X-Y Upper Right Mocks -----######
     ##############################################
-    clf_ur_pd     = copy.deepcopy(clf_pd)
-    coord_dict_ur = copy.deepcopy(coord_dict_ul)
+    coord_perm_ur = ('x', 'y', 'z')
+    coord_dict_ur = coord_dict_ul.copy()
     # Coordinates
     coord_dict_ur['ra_min' ] = 90. - coord_dict_ur['ra_range']
     coord_dict_ur['ra_max' ] = 90.
@@ -1861,13 +2157,13 @@ def eco_geometry_mocks(clf_pd, param_dict, proj_dict):
     ## Determining positions
     for kk in range(z_mocks_n_ur):
         pos_coords_mocks.append([   x_init_ur, y_init_ur, z_init_ur,
-                                    clf_ur_pd.copy(), coord_dict_ur])
+                                    coord_perm_ur, coord_dict_ur])
         z_init_ur += z_delta_ul
     ##############################################
     ###### ----- X-Y Lower Left Mocks  -----######
     ##############################################
-    clf_ll_pd     = copy.deepcopy(clf_pd)
-    coord_dict_ll = copy.deepcopy(coord_dict_ur)
+    coord_perm_ll = ('x', 'y', 'z')
+    coord_dict_ll = coord_dict_ur.copy()
     ## Changing geometry
     coord_dict_ll['ra_min' ] = 180.
     coord_dict_ll['ra_max' ] = 180. + coord_dict_ll['ra_range']
@@ -1885,13 +2181,13 @@ def eco_geometry_mocks(clf_pd, param_dict, proj_dict):
     ## Saving new positions
     for kk in range(z_mocks_n_ll):
         pos_coords_mocks.append([   x_init_ll, y_init_ll, z_init_ll,
-                                    clf_ll_pd.copy(), coord_dict_ll])
+                                    coord_perm_ll, coord_dict_ll])
         z_init_ll += z_delta_ul
     ##############################################
     ###### ----- X-Y Lower Right Mocks -----######
     ##############################################
-    clf_lr_pd     = copy.deepcopy(clf_pd)
-    coord_dict_lr = copy.deepcopy(coord_dict_ul)
+    coord_perm_lr = ('x', 'y', 'z')
+    coord_dict_lr = coord_dict_ul.copy()
     # Changing geometry
     coord_dict_lr['ra_min' ] = 270. - coord_dict_lr['ra_range']
     coord_dict_lr['ra_max' ] = 270.
@@ -1907,50 +2203,351 @@ def eco_geometry_mocks(clf_pd, param_dict, proj_dict):
     ## Saving new positions
     for kk in range(z_mocks_n_lr):
         pos_coords_mocks.append([   x_init_lr, y_init_lr, z_init_lr,
-                                    clf_lr_pd.copy(), coord_dict_lr])
+                                    coord_perm_lr, coord_dict_lr])
         z_init_lr += z_delta_ul
     ##############################################
     ## Creating mock catalogues
     ##############################################
+    (   catl_times_dict,
+        catl_fail_dict ) = mock_catls_run(  clf_pd, pos_coords_mocks,
+                                            param_dict, proj_dict)
+
+    return catl_fail_dict
+
+def mocks_manifest_file(param_dict, proj_dict):
+    """
+    Path to the manifest of the mock catalogues
+
+    Parameters
+    -------------
+    param_dict: python dictionary
+        dictionary with `project` variables
+
+    proj_dict: python dictionary
+        dictionary with info of the project that uses the
+        `Data Science` Cookiecutter template.
+
+    Returns
+    -------------
+    manifest_file: string
+        path to the manifest file, under `catl_outdir`
+    """
+    manifest_file = os.path.join(   proj_dict['catl_outdir'],
+                                    '{0}_{1}_mocks_manifest.json'.format(
+                                        param_dict['survey'],
+                                        param_dict['cosmo_choice']))
+
+    return manifest_file
+
+def mocks_manifest_read(manifest_file, param_dict):
+    """
+    Reads the manifest of the mock catalogues.
+    An empty manifest is returned if the file does not exist, or if it 
+    cannot be read.
+
+    Parameters
+    -------------
+    manifest_file: string
+        path to the manifest file
+
+    param_dict: python dictionary
+        dictionary with `project` variables
+
+    Returns
+    -------------
+    manifest_dict: python dictionary
+        dictionary with the status, inputs hash and outputs of each stage,
+        i.e. `{'mocks': {...}, 'tarball': {...}}`
+    """
+    manifest_dict = {'mocks': {}, 'tarball': {}}
+    if os.path.exists(manifest_file):
+        try:
+            with open(manifest_file, 'r') as manifest_obj:
+                manifest_dict.update(json.load(manifest_obj))
+        except ValueError:
+            print('{0} Unreadable manifest file: {1}. Starting from scratch'.format(
+                param_dict['Prog_msg'], manifest_file))
+
+    return manifest_dict
+
+def mocks_manifest_write(manifest_dict, manifest_file):
+    """
+    Writes the manifest of the mock catalogues.
+    The file is replaced atomically, so an interrupted run never leaves
+    a partially-written manifest behind.
+
+    Parameters
+    -------------
+    manifest_dict: python dictionary
+        dictionary with the status, inputs hash and outputs of each stage
+
+    manifest_file: string
+        path to the manifest file
+    """
+    manifest_tmp = manifest_file + '.tmp'
+    with open(manifest_tmp, 'w') as manifest_obj:
+        json.dump(manifest_dict, manifest_obj, indent=1, sort_keys=True)
+    os.replace(manifest_tmp, manifest_file)
+
+def mock_inputs_hash(pos_coords_mocks_zz, param_dict):
+    """
+    Computes the hash of the inputs of a single mock catalogue
+
+    Parameters
+    -------------
+    pos_coords_mocks_zz: list, shape (5,)
+        list with the positons coordinates, the order of the coordinates 
+        of the box, and the coordinate dictionary of the mock catalogue
+
+    param_dict: python dictionary
+        dictionary with `project` variables
+
+    Returns
+    -------------
+    inputs_hash: str
+        hexadecimal MD5 hash of the inputs
+    """
+    ## Parameters that change the mock catalogues
+    param_keys = [  'size_cube', 'catl_type', 'zmedian', 'survey', 'halotype',
+                    'cosmo_choice', 'hmf_model', 'clf_type', 'clf_engine',
+                    'fof_engine', 'outfmt', 'hdf5_format', 'complevel',
+                    'complib', 'zspace', 'nmin', 'seed', 'l_perp', 'l_para',
+                    'clf_dict']
+    inputs_dict = dict((key, param_dict[key]) for key in param_keys
+                        if key in param_dict)
+    ## Galaxy catalogue of the box
+    clf_stat = os.stat(param_dict['clf_galprop_out'])
+    inputs_dict['clf_galprop_out'] = [  param_dict['clf_galprop_out'],
+                                        clf_stat.st_size,
+                                        clf_stat.st_mtime]
+    ## Specifications of the mock catalogue
+    inputs_dict['mock_spec'] = pos_coords_mocks_zz
+    inputs_str  = json.dumps(inputs_dict, sort_keys=True,
+                    default=lambda obj: num.asarray(obj).tolist())
+    inputs_hash = hashlib.md5(inputs_str.encode('utf-8')).hexdigest()
+
+    return inputs_hash
+
+def mock_outputs_stat(file_arr):
+    """
+    Records the size and modification time of each output file
+
+    Parameters
+    -------------
+    file_arr: array_like
+        paths to the output files
+
+    Returns
+    -------------
+    outputs_dict: python dictionary
+        dictionary with the size (in bytes) and the modification time 
+        of each existing output file
+    """
+    outputs_dict = {}
+    for file_kk in file_arr:
+        if os.path.exists(file_kk):
+            file_stat = os.stat(file_kk)
+            outputs_dict[file_kk] = [file_stat.st_size, file_stat.st_mtime]
+
+    return outputs_dict
+
+def mock_outputs_valid(outputs_dict):
+    """
+    Checks that the output files of a stage are complete and readable
+
+    Parameters
+    -------------
+    outputs_dict: python dictionary
+        dictionary with the expected size (in bytes) and modification time
+        of each output file, as given by `mock_outputs_stat`
+
+    Returns
+    -------------
+    valid_opt: boolean
+        True if all the files exist, have the expected size and 
+        modification time, and (for catalogue files) can be opened
+    """
+    if len(outputs_dict) == 0:
+        return False
+    for file_kk, (size_kk, mtime_kk) in outputs_dict.items():
+        if not os.path.exists(file_kk):
+            return False
+        ## Files modified after they were recorded are not valid
+        file_stat = os.stat(file_kk)
+        if ((file_stat.st_size  != size_kk ) or
+            (file_stat.st_mtime != mtime_kk)):
+            return False
+        try:
+            if file_kk.endswith('.hdf5'):
+                with pd.HDFStore(file_kk, mode='r') as hdf_obj:
+                    if len(hdf_obj.keys()) == 0:
+                        return False
+            elif file_kk.endswith('.h5'):
+                with h5py.File(file_kk, mode='r') as hdf_obj:
+                    if len(hdf_obj.keys()) == 0:
+                        return False
+            elif file_kk.endswith('.parquet'):
+                import pyarrow.parquet as pq
+                pq.ParquetFile(file_kk)
+        except Exception:
+            return False
+
+    return True
+
+def mock_catls_run(clf_pd, pos_coords_mocks, param_dict, proj_dict):
+    """
+    Distributes the creation of the set of mock catalogues into 
+    more than 1 processor.
+
+    The mock catalogues are handed out one at a time to a pool of 
+    processes, so that no processor is left idle while others still 
+    have catalogues to create. A failure in a single catalogue is reported,
+    and it does not stop the creation of the rest of the catalogues.
+
+    The galaxy catalogue and the `hmf_pd` lookup table are written once 
+    to memory-mapped scratch files, and the processes only read them. 
+    Each mock catalogue is described by its specifications in 
+    `pos_coords_mocks`.
+
+    The status of each mock catalogue is kept in a manifest file under
+    `catl_outdir`. Mock catalogues that were completed with the same 
+    inputs, and whose output files are still valid, are skipped.
+
+    Parameters
+    -------------
+    clf_pd: pandas DataFrame
+        DataFrame containing information from Halobias + CLF procedures
+
+    pos_coords_mocks: list
+        list with the specifications of each mock catalogue, i.e. 
+        `[x, y, z, coord_perm, coord_dict]`
+
+    param_dict: python dictionary
+        dictionary with `project` variables
+
+    proj_dict: python dictionary
+        dictionary with info of the project that uses the
+        `Data Science` Cookiecutter template.
+
+    Returns
+    -------------
+    catl_times_dict: python dictionary
+        dictionary with the time (in seconds) spent on each mock catalogue
+        created in this run
+
+    catl_fail_dict: python dictionary
+        dictionary with the traceback of each mock catalogue that failed
+    """
+    Prog_msg = param_dict['Prog_msg']
     ##
     ## ----| Multiprocessing |---- ##
     ##
     ## Number of catalogues
     n_catls = len(pos_coords_mocks)
+    ## Manifest of the mock catalogues - Skipping completed catalogues
+    manifest_file = mocks_manifest_file(param_dict, proj_dict)
+    manifest_dict = mocks_manifest_read(manifest_file, param_dict)
+    if param_dict['remove_files']:
+        manifest_dict['mocks'] = {}
+    hash_arr      = [mock_inputs_hash(pos_coords_mocks[zz], param_dict)
+                        for zz in range(n_catls)]
+    todo_arr      = []
+    for zz in range(n_catls):
+        mock_entry = manifest_dict['mocks'].get(str(zz), {})
+        if ((mock_entry.get('status'     ) == 'done'      ) and
+            (mock_entry.get('inputs_hash') == hash_arr[zz]) and
+            (mock_outputs_valid(mock_entry.get('outputs', {})))):
+            continue
+        todo_arr.append(zz)
+    if len(todo_arr) < n_catls:
+        print('{0} Skipping {1} completed Mock Catalogues'.format(
+            Prog_msg, n_catls - len(todo_arr)))
+    if len(todo_arr) == 0:
+        return {}, {}
     ## CPU counts
-    cpu_number = int(cpu_count() * param_dict['cpu_frac'])
-    ## Step-size for each CPU
-    if cpu_number <= len(pos_coords_mocks):
-        catl_step = int(n_catls / cpu_number)
-        memb_arr  = num.arange(0, n_catls+1, catl_step)
-    else:
-        catl_step = int((n_catls/cpu_number)**-1)
-        memb_arr  = num.arange(0, n_catls+1)
-    ## Array with designated catalogue numbers for each CPU
-    memb_arr[-1] = n_catls
-    ## Tuples of the ID of each catalogue
-    memb_tuples = num.asarray([(memb_arr[xx], memb_arr[xx+1])
-                            for xx in range(memb_arr.size-1)])
-    ## Assigning `memb_tuples` to function `multiprocessing_catls`
-    print('{0} Creating Mock Catalogues ....'.format(param_dict['Prog_msg']))
-    procs = []
-    for ii in range(len(memb_tuples)):
-        ## Defining `proc` element
-        proc = Process(target=multiprocessing_catls,
-                        args=(  memb_tuples[ii], pos_coords_mocks, param_dict, 
-                                proj_dict, ii))
-        # Appending to main `procs` list
-        procs.append(proc)
-        proc.start()
-    ##
-    ## Joining `procs`
-    for proc in procs:
-        proc.join()
-    ##
-    ## Reinitializing `param_dict` to None
+    cpu_number = max(int(cpu_count() * param_dict['cpu_frac']), 1)
+    cpu_number = min(cpu_number, len(todo_arr))
+    ## Shared, read-only tables
+    shared_dir    = tempfile.mkdtemp(prefix='shared_',
+                        dir=proj_dict['int_dir'])
+    param_dict_mp = param_dict.copy()
+    param_dict_mp.pop('clf_pd', None)
+    param_dict_mp.pop('z_como_pd', None)
+    catl_times_dict = {}
+    catl_fail_dict  = {}
+    try:
+        clf_shared = cu.memmap_table_write(clf_pd, shared_dir, prefix='clf')
+        ## Grid index and maximum velocity of the box - Computed once, 
+        ## and shared by all the mock catalogues
+        param_dict_mp['box_index'  ] = cu.box_grid_index(
+                                            clf_pd[['x','y','z']].values,
+                                            param_dict['size_cube'],
+                                            directory=shared_dir,
+                                            prefix='clf_grid')
+        param_dict_mp['vel_max_box'] = num.sqrt(
+                                            num.square(clf_pd['vx'].values) +
+                                            num.square(clf_pd['vy'].values) +
+                                            num.square(clf_pd['vz'].values)).max()
+        for table_key in ['hmf_pd']:
+            if table_key in param_dict:
+                param_dict_mp[table_key] = cu.memmap_table_write(
+                                                param_dict[table_key],
+                                                shared_dir,
+                                                prefix=table_key)
+        ## Handing out catalogues to `multiprocessing_catls`
+        print('{0} Creating Mock Catalogues ....'.format(Prog_msg))
+        pool = Pool(processes=cpu_number,
+                    initializer=multiprocessing_catls_init,
+                    initargs=(  clf_shared, pos_coords_mocks, param_dict_mp,
+                                proj_dict))
+        try:
+            for (   zz_mock   ,
+                    zz_time   ,
+                    zz_error  ,
+                    zz_outputs) in pool.imap_unordered(multiprocessing_catls,
+                                                todo_arr, chunksize=1):
+                catl_times_dict[zz_mock] = zz_time
+                if zz_error is None:
+                    if param_dict['verbose']:
+                        print('{0} Mock Catalogue [{1}] done in {2:.1f} s'.format(
+                            Prog_msg, zz_mock, zz_time))
+                else:
+                    catl_fail_dict[zz_mock] = zz_error
+                    print('{0} Mock Catalogue [{1}] failed after {2:.1f} s:\n{3}'.format(
+                        Prog_msg, zz_mock, zz_time, zz_error))
+                ## Updating manifest
+                manifest_dict['mocks'][str(zz_mock)] = {
+                    'status'     : 'done' if zz_error is None else 'failed',
+                    'inputs_hash': hash_arr[zz_mock],
+                    'outputs'    : mock_outputs_stat(zz_outputs),
+                    'time'       : zz_time}
+                mocks_manifest_write(manifest_dict, manifest_file)
+            pool.close()
+        except:
+            pool.terminate()
+            raise
+        finally:
+            pool.join()
+    finally:
+        ## Removing scratch files
+        shutil.rmtree(shared_dir, ignore_errors=True)
+    ##
+    ## Summary
+    if len(catl_times_dict) > 0:
+        catl_times_arr = num.array(list(catl_times_dict.values()))
+        print('{0} Mock Catalogues: {1} done, {2} failed. '
+              'Time per catalogue: {3:.1f} s (mean), {4:.1f} s (max)'.format(
+                Prog_msg, len(todo_arr) - len(catl_fail_dict),
+                len(catl_fail_dict),
+                catl_times_arr.mean(), catl_times_arr.max()))
+    if len(catl_fail_dict) > 0:
+        print('{0} Failed Mock Catalogues: {1}'.format(Prog_msg,
+            sorted(catl_fail_dict.keys())))
     if param_dict['verbose']:
         print('{0} Creating Mock Catalogues .... Done'.format(Prog_msg))
 
+    return catl_times_dict, catl_fail_dict
+
 def makemock_catl(clf_ii, coord_dict_ii, zz_mock, param_dict, proj_dict):
     """
     Function that calculates distances and redshift-space distortions 
@@ -1989,62 +2586,40 @@ def makemock_catl(clf_ii, coord_dict_ii, zz_mock, param_dict, proj_dict):
             zz_mock))
     ## Filenames
     mock_catl_pd_file = os.path.join(   proj_dict['mock_cat_mgc'],
-                                        '{0}_galcatl_cat_{1}.hdf5'.format(
+                                        '{0}_galcatl_cat_{1}.{2}'.format(
                                             param_dict['survey'],
-                                            zz_mock))
+                                            zz_mock,
+                                            param_dict['catl_ext']))
     ## Number of galaies
     clf_ngal    = len(clf_ii)
     speed_c = param_dict['const_dict']['c']
     ## Distances from observer to galaxies
-    z_como_pd   = param_dict['z_como_pd']
-    dc_max      = z_como_pd['d_como'].max()
-    dc_z_interp = interp1d(z_como_pd['d_como'], z_como_pd['z'])
+    cosmo_dist  = param_dict['cosmo_dist']
     ## Redshift-space distortions
     # Cartesian Coordinates
     cart_gals   = clf_ii[['x' ,'y' ,'z' ]].values
     vel_gals    = clf_ii[['vx','vy','vz']].values
-    ## Initializing arrays
-    r_dist_arr    = num.zeros(clf_ngal)
-    ra_arr        = num.zeros(clf_ngal)
-    dec_arr       = num.zeros(clf_ngal)
-    cz_arr        = num.zeros(clf_ngal)
-    cz_nodist_arr = num.zeros(clf_ngal)
-    vel_tan_arr   = num.zeros(clf_ngal)
-    vel_tot_arr   = num.zeros(clf_ngal)
-    vel_pec_arr   = num.zeros(clf_ngal)
-    # Looping over all galaxies
-    for kk in tqdm(range(clf_ngal)):
-        cz_local = -1.
-        ## Distance From observer
-        r_dist = (num.sum(cart_gals[kk]**2))**.5
-        assert(r_dist <= dc_max)
-        ## Velocity in km/s
-        cz_local = speed_c * dc_z_interp(r_dist)
-        cz_val   = cz_local
-        ## Right Ascension and declination
-        (   ra_kk,
-            dec_kk) = cu.mock_cart_to_spherical_coords(cart_gals[kk], r_dist)
-        ## Whether or not to add redshift-space distortions
-        if param_dict['zspace'] == 1:
-            vel_tot = 0.
-            vel_tan = 0.
-            vel_pec = 0.
-        elif param_dict['zspace'] == 2:
-            vr       = num.dot(cart_gals[kk], vel_gals[kk])/r_dist
-            cz_val  += vr * (1. + param_dict['zmedian'])
-            vel_tot  = (num.sum(vel_gals[kk]**2))**.5
-            vel_tan  = (vel_tot**2 - vr**2)**.5
-            vel_pec  = (cz_val - cz_local)/(1. + param_dict['zmedian'])
-        ##
-        ## Saving to arrays
-        r_dist_arr   [kk] = r_dist
-        ra_arr       [kk] = ra_kk
-        dec_arr      [kk] = dec_kk
-        cz_arr       [kk] = cz_val
-        cz_nodist_arr[kk] = cz_local
-        vel_tot_arr  [kk] = vel_tot
-        vel_tan_arr  [kk] = vel_tan
-        vel_pec_arr  [kk] = vel_pec
+    ## Distance From observer
+    r_dist_arr    = num.sum(cart_gals**2, axis=1)**.5
+    assert(num.all(r_dist_arr <= cosmo_dist.d_max))
+    ## Velocity in km/s
+    cz_nodist_arr = speed_c * cosmo_dist.d_to_z(r_dist_arr)
+    ## Right Ascension and declination
+    (   ra_arr ,
+        dec_arr) = cu.mock_cart_to_spherical_coords_arr(cart_gals, r_dist_arr)
+    ## Whether or not to add redshift-space distortions
+    if param_dict['zspace'] == 1:
+        cz_arr      = cz_nodist_arr.copy()
+        vel_tot_arr = num.zeros(clf_ngal)
+        vel_tan_arr = num.zeros(clf_ngal)
+        vel_pec_arr = num.zeros(clf_ngal)
+    elif param_dict['zspace'] == 2:
+        vr_arr      = num.sum(cart_gals * vel_gals, axis=1) / r_dist_arr
+        cz_arr      = cz_nodist_arr + vr_arr * (1. + param_dict['zmedian'])
+        vel_tot_arr = num.sum(vel_gals**2, axis=1)**.5
+        # Clipping round-off errors for purely radial velocities
+        vel_tan_arr = num.clip(vel_tot_arr**2 - vr_arr**2, 0., None)**.5
+        vel_pec_arr = (cz_arr - cz_nodist_arr)/(1. + param_dict['zmedian'])
     ##
     ## Assigning to DataFrame
     clf_ii.loc[:,'r_dist'   ] = r_dist_arr
@@ -2062,7 +2637,8 @@ def makemock_catl(clf_ii, coord_dict_ii, zz_mock, param_dict, proj_dict):
         ra_min_mod = coord_dict_ii['ra_min'] + 360.
         mock_pd    = clf_ii.loc[(clf_ii['dec'] >= coord_dict_ii['dec_min']) &
                                 (clf_ii['dec'] <= coord_dict_ii['dec_max']) &
-                                (clf_ii['M_r'] != 0.)].copy()
+                                (clf_ii['M_r'] != 0.) &
+                                (clf_ii['survey_flag'] != -1)].copy()
         mock_pd    = mock_pd.loc[~( (mock_pd['ra'] < ra_min_mod) &
                                     (mock_pd['ra'] > coord_dict_ii['ra_max']))]
         # ra_idx1 = clf_ii.loc[(clf_ii['ra'] < (coord_dict_ii['ra_min'] + 360))&
@@ -2075,7 +2651,8 @@ def makemock_catl(clf_ii, coord_dict_ii, zz_mock, param_dict, proj_dict):
                              (clf_ii['ra'] <= coord_dict_ii['ra_max']) &
                              (clf_ii['dec'] >= coord_dict_ii['dec_min']) &
                              (clf_ii['dec'] <= coord_dict_ii['dec_max']) &
-                             (clf_ii['M_r'] != 0.)].copy()
+                             (clf_ii['M_r'] != 0.) &
+                             (clf_ii['survey_flag'] != -1)].copy()
         # ra_idx = clf_ii.loc[(clf_ii['ra'] >= coord_dict_ii['ra_min']) &
         #                     (clf_ii['ra'] <= coord_dict_ii['ra_max'])].index
         # ra_idx = ra_idx.values
@@ -2128,7 +2705,9 @@ def makemock_catl(clf_ii, coord_dict_ii, zz_mock, param_dict, proj_dict):
                 (mock_pd['dec'].max() <= coord_dict_ii['dec_max'    ]))
     ##
     ## Saving file to Pandas DataFrame
-    cu.pandas_df_to_hdf5_file(mock_pd, mock_catl_pd_file, key='galcatl')
+    cu.pandas_df_to_file(mock_pd, mock_catl_pd_file, key='galcatl',
+        outfmt=param_dict['outfmt'], complevel=param_dict['complevel'],
+        complib=param_dict['complib'], hdf5_format=param_dict['hdf5_format'])
     Prog_msg = param_dict['Prog_msg']
     if param_dict['verbose']:
         print('{0} Creating Mock Catalogues [{1}]....Done'.format(Prog_msg,
@@ -2136,7 +2715,187 @@ def makemock_catl(clf_ii, coord_dict_ii, zz_mock, param_dict, proj_dict):
 
     return mock_pd, mock_catl_pd_file
 
-def catl_create_main(zz_mock, pos_coords_mocks_zz, param_dict, proj_dict):
+def mock_box_preselect(clf_ii, pos_zz, coord_dict_ii, param_dict,
+    coord_perm=('x', 'y', 'z'), dec_tol=1.e-6):
+    """
+    Places the observer at `pos_zz`, centers the coordinates of the box 
+    on the observer, and selects the galaxies that can fall within the 
+    geometry of the survey.
+
+    Galaxies are kept if their comoving distance lies within the radial
+    limits of the survey, widened by the maximum line-of-sight velocity 
+    of the box when redshift-space distortions are included, and if their 
+    right ascension and declination lie within the limits of the survey.
+    Redshift-space distortions only move galaxies along the line of sight,
+    so the angular limits need no widening.
+
+    If `param_dict` has a grid index of the box, `box_index`, only the 
+    galaxies in the cells that overlap the survey volume are examined.
+
+    Parameters
+    -----------
+    clf_ii: pandas DataFrame or `cu.MemmapTable` object
+        table with the information on galaxies, along with position 
+        coords, velocities, etc.
+
+    pos_zz: numpy.ndarray, shape (3,)
+        position of the observer in the box. Units: Mpc/h
+
+    coord_dict_ii: python dictionary
+        dictionary with RA, DEC, and other geometrical variables used 
+        throughout this script.
+
+    param_dict: python dictionary
+        dictionary with `project` variables
+
+    coord_perm: tuple, optional (default = ('x', 'y', 'z'))
+        columns of `clf_ii` used as the `x`, `y`, and `z` positions of 
+        the galaxies, e.g. ('y', 'x', 'z') swaps the `x` and `y` axes
+
+    dec_tol: float, optional (default = 1.e-6)
+        tolerance in the declination and right ascension limits. 
+        Units: degrees
+
+    Returns
+    -----------
+    clf_mod: pandas DataFrame
+        DataFrame with the selected galaxies and their positions
+        with respect to the observer. `clf_ii` is not modified.
+    """
+    ## Size of cube
+    size_cube = float(param_dict['size_cube'])
+    speed_c   = param_dict['const_dict']['c']
+    pos_zz    = num.asarray(pos_zz, dtype=float)
+    ## Radial limits of the survey
+    if param_dict['zspace'] == 2:
+        vel_max = param_dict.get('vel_max_box', None)
+        if vel_max is None:
+            vel_max = num.sqrt( num.square(clf_ii['vx']) +
+                                num.square(clf_ii['vy']) +
+                                num.square(clf_ii['vz'])).max()
+        cz_buff = vel_max * (1. + param_dict['zmedian'])
+    else:
+        cz_buff = 0.
+    # Galaxies cannot have negative distances
+    cz_lims   = num.clip([param_dict['czmin'] - cz_buff,
+                          param_dict['czmax'] + cz_buff], 0., None)
+    r_lims    = param_dict['cosmo_dist'].z_to_d(cz_lims/speed_c)
+    ## Candidate galaxies - Cells of the grid that overlap the survey
+    box_index = param_dict.get('box_index', None)
+    if box_index is not None:
+        cell_mask = mock_cells_select(box_index, pos_zz, coord_dict_ii,
+                        r_lims, coord_perm=coord_perm, dec_tol=dec_tol)
+        gal_idx   = box_index.cell_members(cell_mask)
+    else:
+        gal_idx   = num.arange(len(clf_ii))
+    ## Moving observer
+    cart_gals = (num.column_stack([num.asarray(clf_ii[coord_kk])[gal_idx]
+                    for coord_kk in coord_perm]) - pos_zz)
+    ## Periodic boundaries
+    cart_gals[cart_gals <= -(size_cube/2.)] += size_cube
+    cart_gals[cart_gals >=  (size_cube/2.)] -= size_cube
+    r_dist    = num.sum(cart_gals**2, axis=1)**.5
+    ## Right ascension and declination limits of the survey
+    (   ra_arr ,
+        dec_arr) = cu.mock_cart_to_spherical_coords_arr(cart_gals, r_dist)
+    gal_mask  = ((r_dist  >= r_lims[0]) &
+                 (r_dist  <= r_lims[1]) &
+                 (dec_arr >= coord_dict_ii['dec_min'] - dec_tol) &
+                 (dec_arr <= coord_dict_ii['dec_max'] + dec_tol) &
+                 cu.ra_wedge_mask(ra_arr, coord_dict_ii['ra_min'],
+                    coord_dict_ii['ra_max'], ra_tol=dec_tol))
+    ## Selected galaxies
+    if isinstance(clf_ii, pd.DataFrame):
+        clf_mod = clf_ii.iloc[gal_idx[gal_mask]].copy()
+    else:
+        clf_mod = clf_ii.to_pandas(gal_idx[gal_mask])
+    clf_mod.loc[:,'x'] = cart_gals[gal_mask, 0]
+    clf_mod.loc[:,'y'] = cart_gals[gal_mask, 1]
+    clf_mod.loc[:,'z'] = cart_gals[gal_mask, 2]
+
+    return clf_mod
+
+def mock_cells_select(box_index, pos_zz, coord_dict_ii, r_lims,
+    coord_perm=('x', 'y', 'z'), dec_tol=1.e-6):
+    """
+    Selects the cells of the grid index of the box that overlap the 
+    volume of the survey, as seen by an observer at `pos_zz`.
+
+    Every cell is replaced by its bounding sphere, and all the periodic 
+    images of the cell that overlap the box centered on the observer 
+    are checked, so no galaxy within the survey is missed.
+
+    Parameters
+    -----------
+    box_index: `cu.BoxGridIndex` object
+        grid index of the galaxies of the box
+
+    pos_zz: numpy.ndarray, shape (3,)
+        position of the observer in the box. Units: Mpc/h
+
+    coord_dict_ii: python dictionary
+        dictionary with RA, DEC, and other geometrical variables used 
+        throughout this script.
+
+    r_lims: array_like, shape (2,)
+        minimum and maximum comoving distances of the survey. Units: Mpc/h
+
+    coord_perm: tuple, optional (default = ('x', 'y', 'z'))
+        columns used as the `x`, `y`, and `z` positions of the galaxies
+
+    dec_tol: float, optional (default = 1.e-6)
+        tolerance in the declination and right ascension limits. 
+        Units: degrees
+
+    Returns
+    -----------
+    cell_mask: numpy.ndarray, shape (ncell**3,)
+        boolean mask of the cells that overlap the survey
+    """
+    size_cube = box_index.size_cube
+    ## Radius of the bounding sphere of a cell
+    cell_rad  = 0.5 * num.sqrt(3.) * box_index.cell_len
+    ## Cell centers, relative to the observer
+    axis_idx  = ['xyz'.index(coord_kk) for coord_kk in coord_perm]
+    cen_arr   = box_index.cell_centers()[:, axis_idx] - pos_zz
+    cell_mask = num.zeros(len(cen_arr), dtype=bool)
+    ## Periodic images of the cells
+    shift_1d  = [-size_cube, 0., size_cube]
+    for shift_kk in num.array(num.meshgrid(shift_1d, shift_1d, shift_1d,
+                        indexing='ij')).reshape(3, -1).T:
+        img_arr  = cen_arr + shift_kk
+        img_mask = num.all(num.abs(img_arr) <= (size_cube/2. +
+                        0.5 * box_index.cell_len), axis=1)
+        img_arr  = img_arr[img_mask]
+        img_dist = num.sum(img_arr**2, axis=1)**.5
+        ## Radial limits
+        sel_mask = ((img_dist + cell_rad >= r_lims[0]) &
+                    (img_dist - cell_rad <= r_lims[1]))
+        ## Angular size of the bounding sphere
+        near_mask = img_dist <= cell_rad
+        ang_rad   = num.arcsin(num.clip(cell_rad /
+                        num.where(near_mask, 1., img_dist), 0., 1.))
+        (   ra_arr ,
+            dec_arr) = cu.mock_cart_to_spherical_coords_arr(img_arr,
+                            num.where(near_mask, 1., img_dist))
+        ang_deg   = num.degrees(ang_rad) + dec_tol
+        dec_mask  = ((dec_arr + ang_deg >= coord_dict_ii['dec_min']) &
+                     (dec_arr - ang_deg <= coord_dict_ii['dec_max']))
+        # Half-width in RA of the bounding sphere
+        pole_mask = num.abs(dec_arr) + num.degrees(ang_rad) >= 90.
+        ra_ratio  = num.sin(ang_rad) / num.cos(num.radians(
+                        num.where(pole_mask, 0., dec_arr)))
+        ra_tol    = num.degrees(num.arcsin(num.clip(ra_ratio, 0., 1.))) + dec_tol
+        ra_mask   = (pole_mask |
+                     cu.ra_wedge_mask(ra_arr, coord_dict_ii['ra_min'],
+                        coord_dict_ii['ra_max'], ra_tol=ra_tol))
+        sel_mask &= (near_mask | (dec_mask & ra_mask))
+        cell_mask[num.where(img_mask)[0][sel_mask]] = True
+
+    return cell_mask
+
+def catl_create_main(zz_mock, clf_pd, pos_coords_mocks_zz, param_dict,
+    proj_dict):
     """
     Distributes the analyis of the creation of mock catalogues into 
     more than 1 processor
@@ -2146,9 +2905,13 @@ def catl_create_main(zz_mock, pos_coords_mocks_zz, param_dict, proj_dict):
     zz_mock: int
         number of the mock catalogue being analyzed
 
-    pos_coords_mocks: tuples, shape (4,)
-        tuple with the positons coordinates, coordinate dictionary, 
-        and DataFrame to be used
+    clf_pd: pandas DataFrame or `cu.MemmapTable` object
+        table containing information from Halobias + CLF procedures.
+        It is not modified.
+
+    pos_coords_mocks_zz: list, shape (5,)
+        list with the positons coordinates, the order of the coordinates 
+        of the box, and the coordinate dictionary of the mock catalogue
 
     param_dict: python dictionary
         dictionary with `project` variables
@@ -2159,38 +2922,28 @@ def catl_create_main(zz_mock, pos_coords_mocks_zz, param_dict, proj_dict):
 
     Returns
     -----------
+    gal_file: string
+        path to the member galaxy catalogue
 
+    group_file: string
+        path to the group catalogue
     """
     ## Constants
     Prog_msg = param_dict['Prog_msg']
     ## Deciding which catalogues to read
     ## Reading in input parameters
-    # Copy of 'pos_coords_mocks_zz'
-    pos_coords_mocks_zz_copy = copy.deepcopy(pos_coords_mocks_zz)
-    # Parameters
     (   x_ii         ,
         y_ii         ,
         z_ii         ,
-        clf_ii       ,
-        coord_dict_ii) = pos_coords_mocks_zz_copy
-    ## Size of cube
-    size_cube = float(param_dict['size_cube'])
+        coord_perm_ii,
+        coord_dict_ii) = pos_coords_mocks_zz
+    coord_dict_ii = coord_dict_ii.copy()
     ## Cartesian coordinates
     pos_zz = num.asarray([x_ii, y_ii, z_ii])
-    ## Formatting new positions
-    ## Placing the observer at `pos_zz` and centering coordinates to center 
-    ## of box
-    for kk, coord_kk in enumerate(['x','y','z']):
-        ## Moving observer
-        clf_ii.loc[:,coord_kk] = clf_ii[coord_kk] - pos_zz[kk]
-        ## Periodic boundaries
-        clf_ii_neg = clf_ii.loc[clf_ii[coord_kk] <= -(size_cube/2.)].index
-        clf_ii_pos = clf_ii.loc[clf_ii[coord_kk] >=  (size_cube/2.)].index
-        ## Fixing negative values
-        if len(clf_ii_neg) != 0:
-            clf_ii.loc[clf_ii_neg, coord_kk] += size_cube
-        if len(clf_ii_pos) != 0:
-            clf_ii.loc[clf_ii_pos, coord_kk] -= size_cube
+    ## Placing the observer at `pos_zz` and keeping only the galaxies
+    ## that can fall within the survey
+    clf_ii = mock_box_preselect(clf_pd, pos_zz, coord_dict_ii, param_dict,
+                coord_perm=coord_perm_ii)
     ##
     ## Interpolating values for redshift and comoving distance
     ## and adding redshift-space distortions
@@ -2199,9 +2952,13 @@ def catl_create_main(zz_mock, pos_coords_mocks_zz, param_dict, proj_dict):
                                         param_dict, proj_dict)
     ##
     ## Group-finding
-    (   mockgal_pd  ,
-        mockgroup_pd) = group_finding(  mock_pd, mock_zz_file, 
-                                        param_dict, proj_dict)
+    if (param_dict['fof_engine'] == 'numpy'):
+        (   mockgal_pd  ,
+            mockgroup_pd) = group_finding_numpy(mock_pd, param_dict, proj_dict)
+    else:
+        (   mockgal_pd  ,
+            mockgroup_pd) = group_finding(  mock_pd, mock_zz_file, 
+                                            param_dict, proj_dict)
     ##
     ## Group mass, group galaxy type, and total Mr/Mstar for groups
     (   mockgal_pd  ,
@@ -2214,8 +2971,11 @@ def catl_create_main(zz_mock, pos_coords_mocks_zz, param_dict, proj_dict):
     ## Dropping columns from `mockgal_pd` and `mockgroup_pd`
     ##
     ## Writing output files - `Normal Catalogs`
-    writing_to_output_file(mockgal_pd, mockgroup_pd, zz_mock,
-        param_dict, proj_dict, perf_catl=False)
+    (   gal_file  ,
+        group_file) = writing_to_output_file(mockgal_pd, mockgroup_pd, zz_mock,
+                        param_dict, proj_dict, perf_catl=False)
+
+    return gal_file, group_file
 
 ## -----------| Survey-related functions |----------- ##
 
@@ -2477,6 +3237,65 @@ def group_finding(mock_pd, mock_zz_file, param_dict, proj_dict,
 
     return mockgal_pd_merged, mockgroup_pd
 
+def group_finding_numpy(mock_pd, param_dict, proj_dict):
+    """
+    Runs an in-process `FoF` group finder on the galaxies of the mock 
+    catalogue, and assigns galaxies to galaxy groups.
+    It uses the same linking lengths, `nmin` and survey volume as 
+    `group_finding`, but does not write any intermediate files.
+
+    Parameters
+    -----------
+    mock_pd: pandas DataFrame
+        DataFrame with positions, velocities, and more for the 
+        galaxies that made it into the catalogue
+
+    param_dict: python dictionary
+        dictionary with `project` variables
+
+    proj_dict: python dictionary
+        Dictionary with current and new paths to project directories
+
+    Returns
+    -----------
+    mockgal_pd_merged: pandas DataFrame
+        DataFrame with the info on each mock galaxy + their group properties
+
+    mockgroup_pd: pandas DataFrame
+        DataFrame with the info on each mock galaxy group
+    """
+    ## Constants
+    Prog_msg = param_dict['Prog_msg']
+    if param_dict['verbose']:
+        print('{0} Group Finding (numpy) ....'.format(Prog_msg))
+    # Speed of light - in km/s
+    speed_c   = param_dict['const_dict']['c']
+    ## Comoving distances from velocities
+    cz_arr    = mock_pd['cz'].values
+    dist_arr  = param_dict['cosmo_dist'].z_to_d(cz_arr/speed_c)
+    ## Running FoF
+    (   groupid_arr,
+        group_dict ) = cu.fof_groups(   mock_pd['ra' ].values,
+                                        mock_pd['dec'].values,
+                                        cz_arr,
+                                        dist_arr,
+                                        param_dict['survey_vol'],
+                                        param_dict['l_perp'],
+                                        param_dict['l_para'],
+                                        nmin=param_dict['nmin'],
+                                        speed_c=speed_c)
+    ## Galaxy groups
+    group_cols   = ['groupid', 'cen_ra', 'cen_dec', 'ngals', 'sigma_v',
+                    'rproj', 'cen_cz']
+    mockgroup_pd = pd.DataFrame(group_dict)[group_cols]
+    ## Galaxies
+    mockgal_pd_merged = mock_pd.copy()
+    mockgal_pd_merged.loc[:,'groupid'] = groupid_arr
+    if param_dict['verbose']:
+        print('{0} Group Finding (numpy) ....Done'.format(Prog_msg))
+
+    return mockgal_pd_merged, mockgroup_pd
+
 def group_mass_assignment(mockgal_pd, mockgroup_pd, param_dict, proj_dict):
     """
     Assigns a theoretical halo mass to the group based on a group property
@@ -2533,27 +3352,26 @@ def group_mass_assignment(mockgal_pd, mockgroup_pd, param_dict, proj_dict):
     group_pd = group_pd[['ngals']]
     ##
     ## Total `prop_gal` for groups
-    group_prop_arr = [[] for x in range(n_groups)]
-    ## Looping over galaxy groups
+    groupid_arr = gal_pd['groupid'].values.astype(int)
+    memb_bool   = groupid_arr >= 0
     # Mstar-based
     if param_dict['catl_type'] == 'mstar':
-        for group_zz in tqdm(range(n_groups)):
-            ## Stellar mass
-            group_prop = gal_pd.loc[gal_pd['groupid']==group, prop_gal]
-            group_log_prop_tot = num.log10(num.sum(10**group_prop))
-            ## Saving to array
-            group_prop_arr[group_zz] = group_log_prop_tot
+        ## Total stellar mass of the group
+        group_prop_tot = num.bincount(  groupid_arr[memb_bool],
+                                        weights=10**gal_pd[prop_gal].values[memb_bool],
+                                        minlength=n_groups)
+        group_prop_arr = num.log10(group_prop_tot)
     # Luminosity-based
     elif param_dict['catl_type'] == 'mr':
-        for group_zz in tqdm(range(n_groups)):
-            ## Total abs. magnitude of the group
-            group_prop = gal_pd.loc[gal_pd['groupid']==group_zz, prop_gal]
-            group_prop_tot = Mr_group_calc(group_prop)
-            ## Saving to array
-            group_prop_arr[group_zz] = group_prop_tot
+        ## Total abs. magnitude of the group
+        gal_lum_arr    = 10.**cu.absolute_magnitude_to_luminosity(
+                                gal_pd[prop_gal].values[memb_bool], 'r')
+        group_lum_arr  = num.bincount(  groupid_arr[memb_bool],
+                                        weights=gal_lum_arr,
+                                        minlength=n_groups)
+        group_prop_arr = cu.luminosity_to_absolute_mag(group_lum_arr, 'r')
     ##
     ## Saving to DataFrame
-    group_prop_arr            = num.asarray(group_prop_arr)
     group_pd.loc[:, prop_gal] = group_prop_arr
     if param_dict['verbose']:
         print('{0} Calculating group masses...Done'.format(
@@ -2582,15 +3400,13 @@ def group_mass_assignment(mockgal_pd, mockgroup_pd, param_dict, proj_dict):
     # Selecting `central` and `satellite` galaxies
     gal_pd.loc[:, prop_gal_abs] = num.abs(gal_pd[prop_gal])
     gal_pd.loc[:, 'g_galtype']  = num.ones(n_gals).astype(int)*Sats
-    g_galtype_groups            = num.ones(n_groups)*Sats
-    ##
-    ## Looping over galaxy groups
-    for zz in tqdm(range(n_groups)):
-        gals_g = gal_pd.loc[gal_pd['groupid']==zz]
-        ## Determining group galaxy type
-        gals_g_max = gals_g.loc[gals_g[prop_gal_abs]==gals_g[prop_gal_abs].max()]
-        g_galtype_groups[zz] = int(num.random.choice(gals_g_max.index.values))
-    g_galtype_groups = num.asarray(g_galtype_groups).astype(int)
+    ##
+    ## Determining group galaxy type - Brightest/Most massive galaxy of 
+    ## each group, with random tie-breaking
+    g_galtype_idx    = cu.group_argmax( groupid_arr,
+                                        gal_pd[prop_gal_abs].values,
+                                        ngroups=n_groups)
+    g_galtype_groups = gal_pd.index.values[g_galtype_idx[g_galtype_idx >= 0]]
     ## Assigning group galaxy type
     gal_pd.loc[g_galtype_groups, 'g_galtype'] = Cens
     ##
@@ -2686,45 +3502,41 @@ def halos_rvir_calc(mockgal_pd, param_dict, catl_sim_eq=False):
     cosmo_model = param_dict['cosmo_model']
     H0          = cosmo_model.H0.to(u.km/(u.s * u.Mpc))
     Om0         = cosmo_model.Om0
-    Ode0        = cosmo_model.Ode0
     ## Other constants
     G           = ac.G
-    speed_c     = ac.c.to(u.km/u.s)
     ##
     ## Halo IDs
-    haloid_counts = Counter(gal_pd['haloid'])
-    haloid_arr    = num.unique(gal_pd['haloid'])
-    ## Mean cz's
-    haloid_z = num.array([gal_pd.loc[gal_pd['haloid']==xx,'cz'].mean() for \
-                        xx in haloid_arr])/speed_c.value
+    (   _             ,
+        haloid_arr    ,
+        haloid_inv    ,
+        haloid_counts ) = cu.group_multiplicity(gal_pd['haloid'].values,
+                                                return_groups=True)
     ## Halo masses
-    haloid_mass = num.array([gal_pd.loc[gal_pd['haloid']==xx,'loghalom'].mean() for \
-                        xx in haloid_arr])
-    ## Halo rvir - in Mpc/h - 1st version
-    # rvir_num = (10**(haloid_mass)*u.Msun) * G
-    # rvir_den = 100 * H0**2 * (Om0 * (1.+haloid_z)**3 + Ode0)
-    # rvir_q   = ((rvir_num / rvir_den)**(1./3)).to(u.Mpc)
-    # rvir     = rvir_q.value
+    haloid_mass = num.bincount( haloid_inv,
+                                weights=gal_pd['loghalom'].values,
+                                minlength=len(haloid_arr)) / haloid_counts
+    ## Halo rvir - in Mpc/h
+    # The 1st version, 
+    #   rvir = (M * G / (100 * H0**2 * (Om0 * (1.+z)**3 + Ode0)))**(1./3),
+    # used the mean `cz` of each halo.
     ## Halo rvir - in Mpc/h - 2nd version
-    rho_crit = (3 * H0**2) / (8 * num.pi * G)
-    rho_mean = Om0 * rho_crit
+    rho_crit   = (3 * H0**2) / (8 * num.pi * G)
     delta_mean = 200
-    rvir_q_3 = ((10**(haloid_mass) * u.Msun) * 3)
-    rvir_q_3 /= 4. * num.pi * rho_mean * delta_mean
-    rvir_q   = (rvir_q_3**(1./3)).to(u.Mpc)
-    rvir     = rvir_q.value
+    # Mean density, in units of Msun / Mpc^3
+    rho_mean   = (Om0 * rho_crit).to(u.Msun / u.Mpc**3).value
+    rvir_q_3   = (10**(haloid_mass) * 3) / (4. * num.pi * rho_mean * delta_mean)
+    rvir       = rvir_q_3**(1./3)
     ## Replacing with zero if necessary
     if catl_sim_eq:
         ## Replacing value
         repl_val = 0.
         ## Halo ngals - in catalogue
-        haloid_ngal_cat = num.array([haloid_counts[xx] for xx in haloid_arr])
+        haloid_ngal_cat = haloid_counts
         ## Halo ngals - in simulation
-        haloid_ngal_sim = num.array([gal_pd.loc[gal_pd['haloid']==xx, 'halo_ngal'].values[0]\
-                            for xx in haloid_arr])
+        haloid_ngal_sim = num.zeros(len(haloid_arr), dtype=int)
+        haloid_ngal_sim[haloid_inv] = gal_pd['halo_ngal'].values
         ## Chaning `rvir` values to zeros if halo is not complete
-        rvir_bool = [1 if haloid_ngal_cat[xx]==haloid_ngal_sim[xx] else 0 \
-                        for xx in range(len(haloid_arr))]
+        rvir_bool = haloid_ngal_cat != haloid_ngal_sim
         rvir[rvir_bool] = repl_val
     ## Saving to DataFrame
     rvir_pd = pd.DataFrame({'haloid':haloid_arr, 'halo_rvir':rvir})
@@ -2743,10 +3555,10 @@ def halos_rvir_calc(mockgal_pd, param_dict, catl_sim_eq=False):
 ## ---------| Writing to Files |------------##
 
 def writing_to_output_file(mockgal_pd, mockgroup_pd, zz_mock, 
-    param_dict, proj_dict, output_fmt = 'hdf5', perf_catl=False):
+    param_dict, proj_dict, perf_catl=False):
     """
-    Writes the galaxy and group information to ascii files + astropy LaTeX
-    tables
+    Writes the galaxy and group information to files in the output format
+    `outfmt` of `param_dict`
 
     Parameters
     -----------
@@ -2770,10 +3582,18 @@ def writing_to_output_file(mockgal_pd, mockgroup_pd, zz_mock,
         if 'true', it saves the `perfect` version of the galaxy / group 
         catalogue.
 
+    Returns
+    -----------
+    gal_file: string
+        path to the member galaxy catalogue
+
+    group_file: string
+        path to the group catalogue
     """
     ## Keys
-    gal_key   = '/gal_catl'
-    group_key = '/group_catl'
+    gal_key    = '/gal_catl'
+    group_key  = '/group_catl'
+    output_fmt = param_dict['catl_ext']
     ## Filenames
     if perf_catl:
         ## Perfect Galaxy catalogue
@@ -2800,9 +3620,13 @@ def writing_to_output_file(mockgal_pd, mockgroup_pd, zz_mock,
     ##
     ## Saving DataFrames to files
     # Member catalogue
-    cu.pandas_df_to_hdf5_file(mockgal_pd, gal_file, key=gal_key)
+    cu.pandas_df_to_file(mockgal_pd, gal_file, key=gal_key,
+        outfmt=param_dict['outfmt'], complevel=param_dict['complevel'],
+        complib=param_dict['complib'], hdf5_format=param_dict['hdf5_format'])
     # Group catalogue
-    cu.pandas_df_to_hdf5_file(mockgroup_pd, group_file, key=group_key)
+    cu.pandas_df_to_file(mockgroup_pd, group_file, key=group_key,
+        outfmt=param_dict['outfmt'], complevel=param_dict['complevel'],
+        complib=param_dict['complib'], hdf5_format=param_dict['hdf5_format'])
     ##
     ## Checking for file's existence
     cu.File_Exists(gal_file)
@@ -2810,12 +3634,18 @@ def writing_to_output_file(mockgal_pd, mockgroup_pd, zz_mock,
     print('{0} gal_file  : {1}'.format(param_dict['Prog_msg'], gal_file))
     print('{0} group_file: {1}'.format(param_dict['Prog_msg'], group_file))
 
+    return gal_file, group_file
+
 ## -----------| Plotting-related functions |----------- ##
 
-def mockcatls_simbox_plot(param_dict, proj_dict, catl_ext='.hdf5',
-    fig_fmt='pdf', figsize=(9,9)):
+def mockcatls_simbox_plot(param_dict, proj_dict, n_catls,
+    fig_fmt='pdf', figsize=(9,9), render='points', nbins=360):
     """
-    Plots the distribution of the mock catalogues in the simulation box
+    Plots the distribution of the mock catalogues in the simulation box.
+
+    This is a consumer of `mocks_postprocess`, i.e. a generator that 
+    receives the catalogues through `send`. See `mocks_postprocess` for 
+    the protocol.
 
     Parameters
     ------------
@@ -2826,8 +3656,8 @@ def mockcatls_simbox_plot(param_dict, proj_dict, catl_ext='.hdf5',
         dictionary with info of the project that uses the
         `Data Science` Cookiecutter template.
 
-    catl_ext: string, optional (default = '.hdf5')
-        file extension of the mock catalogues
+    n_catls: int
+        number of mock catalogues that will be streamed
 
     fig_fmt: string, optional (default = 'pdf')
         file format of the output figure
@@ -2835,14 +3665,33 @@ def mockcatls_simbox_plot(param_dict, proj_dict, catl_ext='.hdf5',
 
     figsize: tuple, optional (default = (9,9))
         figure size of the output figure, in units of inches
+
+    render: string, optional (default = 'points')
+        rendering of the galaxies
+        Options:
+            - 'points': one marker per galaxy
+            - 'density': the projected positions are binned into an 
+                occupancy map of each catalogue, which are blended with the 
+                color of each catalogue and drawn as a single image per 
+                panel. The size of the figure and the time to draw it do 
+                not depend on the number of galaxies.
+
+    nbins: int, optional (default = 360)
+        number of pixels per side of the images, for `render == 'density'`
     """
     ## Constants and variables
     Prog_msg   = param_dict['Prog_msg' ]
     plot_dict  = param_dict['plot_dict']
     markersize = plot_dict['markersize']
-    ## List of catalogues
-    catl_path_arr = cu.Index(proj_dict['mock_cat_mc'], catl_ext)
-    n_catls       = len(catl_path_arr)
+    size_cube  = param_dict['size_cube']
+    ## Projections of each panel
+    proj_arr   = [('x_orig','y_orig'), ('x_orig','z_orig'), ('y_orig','z_orig')]
+    ## Images - Sum of the colors of the catalogues in each pixel, and 
+    ## number of catalogues in each pixel
+    if render == 'density':
+        bins_edges = num.linspace(0., size_cube, nbins + 1)
+        rgb_sum    = num.zeros((len(proj_arr), nbins, nbins, 3))
+        occ_sum    = num.zeros((len(proj_arr), nbins, nbins))
     ## Filename
     fname = os.path.join(   proj_dict['fig_dir'],
                             '{0}_{1}_{2}_xyz_mocks.{3}'.format(
@@ -2861,9 +3710,8 @@ def mockcatls_simbox_plot(param_dict, proj_dict, catl_ext='.hdf5',
         fig_title = 'ECO Survey'
     else:
         fig_title = 'RESOLVE {0}'.format(param_dict['survey'])
-    # Figure and axes
-    plt.close()
-    plt.clf()
+    # Figure and axes - Methods of `fig` are used throughout, since the 
+    # figures of other consumers are open at the same time
     fig = plt.figure(figsize=figsize)
     ax1 = fig.add_subplot(221, facecolor='white', aspect='equal')
     ax2 = fig.add_subplot(222, facecolor='white', aspect='equal')
@@ -2900,40 +3748,62 @@ def mockcatls_simbox_plot(param_dict, proj_dict, catl_ext='.hdf5',
     # Title
     title_obj = fig.suptitle(fig_title, fontsize=plot_dict['title'])
     title_obj.set_y(1.04)
+    # Axes of each projection
+    ax_arr = [ax1, ax2, ax3]
     ##
     ## Looping over different catalogues
-    for kk, catl_kk in enumerate(tqdm(catl_path_arr)):
-        # Reading parameters
-        catl_kk_pd = cu.read_hdf5_file_to_pandas_DF(catl_kk)
+    catl_item = (yield ['x_orig','y_orig','z_orig'])
+    while catl_item is not None:
+        (   kk        ,
+            catl_kk   ,
+            catl_kk_pd) = catl_item
         # Color
         color_kk = col_arr[kk]
-        # Galaxy indices
-        (   x_kk_arr,
-            y_kk_arr,
-            z_kk_arr) = catl_kk_pd[['x_orig','y_orig','z_orig']].values.T
-        ## Plotting points (galaxies)
-        ax1.plot(x_kk_arr, y_kk_arr, marker='o', color=color_kk,
-            markersize=markersize, linestyle='None', rasterized=True)
-        ax2.plot(x_kk_arr, z_kk_arr, marker='o', color=color_kk,
-            markersize=markersize, linestyle='None', rasterized=True)
-        ax3.plot(y_kk_arr, z_kk_arr, marker='o', color=color_kk,
-            markersize=markersize, linestyle='None', rasterized=True)
+        for pp, (ax_pp, (col_h, col_v)) in enumerate(zip(ax_arr, proj_arr)):
+            if render == 'density':
+                ## Occupancy map of the catalogue
+                (   hist_pp,
+                    _      ,
+                    _      ) = num.histogram2d( catl_kk_pd[col_v].values,
+                                                catl_kk_pd[col_h].values,
+                                                bins=[bins_edges, bins_edges])
+                occ_pp = (hist_pp > 0).astype(float)
+                rgb_sum[pp] += occ_pp[:, :, None] * num.asarray(color_kk[:3])
+                occ_sum[pp] += occ_pp
+            else:
+                ## Plotting points (galaxies)
+                ax_pp.plot(catl_kk_pd[col_h].values, catl_kk_pd[col_v].values,
+                    marker='o', color=color_kk, markersize=markersize,
+                    linestyle='None', rasterized=True)
+        catl_item = (yield)
+    ## Drawing images - Empty pixels are white
+    if render == 'density':
+        for pp, ax_pp in enumerate(ax_arr):
+            img_pp   = num.ones((nbins, nbins, 3))
+            occ_bool = occ_sum[pp] > 0
+            img_pp[occ_bool] = (rgb_sum[pp][occ_bool] /
+                                occ_sum[pp][occ_bool][:, None])
+            ax_pp.imshow(img_pp, origin='lower', interpolation='nearest',
+                extent=(0., size_cube, 0., size_cube), zorder=0)
     # Adjusting space
-    plt.subplots_adjust(top=0.86)
-    plt.tight_layout()
+    fig.subplots_adjust(top=0.86)
+    fig.tight_layout()
     # Saving figure
     if fig_fmt=='pdf':
-        plt.savefig(fname, bbox_inches='tight')
+        fig.savefig(fname, bbox_inches='tight')
     else:
-        plt.savefig(fname, bbox_inches='tight', dpi=400)
+        fig.savefig(fname, bbox_inches='tight', dpi=400)
     print('{0} Figure saved as: {1}'.format(Prog_msg, fname))
-    plt.clf()
-    plt.close()
+    plt.close(fig)
 
-def mocks_lum_function(param_dict, proj_dict, catl_ext='.hdf5',
+def mocks_lum_function(param_dict, proj_dict, n_catls,
     fig_fmt='pdf', figsize=(9,9)):
     """
-    Computes the luminosity function of the mock catalogues
+    Computes the luminosity function of the mock catalogues.
+
+    This is a consumer of `mocks_postprocess`, i.e. a generator that 
+    receives the catalogues through `send`. See `mocks_postprocess` for 
+    the protocol.
 
     Parameters
     ------------
@@ -2944,8 +3814,8 @@ def mocks_lum_function(param_dict, proj_dict, catl_ext='.hdf5',
         dictionary with info of the project that uses the
         `Data Science` Cookiecutter template.
 
-    catl_ext: string, optional (default = '.hdf5')
-        file extension of the mock catalogues
+    n_catls: int
+        number of mock catalogues that will be streamed
 
     fig_fmt: string, optional (default = 'pdf')
         file format of the output figure
@@ -2961,9 +3831,6 @@ def mocks_lum_function(param_dict, proj_dict, catl_ext='.hdf5',
     markersize  = plot_dict['markersize']
     ## Separation for the `M_r` bins, in units of magnitudes
     mr_bins_sep = 0.2
-    ## List of catalogues
-    catl_path_arr = cu.Index(proj_dict['mock_cat_mc'], catl_ext)
-    n_catls       = len(catl_path_arr)
     ## Filename
     fname = os.path.join(   proj_dict['fig_dir'],
                             '{0}_{1}_{2}_lum_function_mocks.{3}'.format(
@@ -2977,60 +3844,146 @@ def mocks_lum_function(param_dict, proj_dict, catl_ext='.hdf5',
     ## Setting up figure
     x_label = r'\boldmath $M_{r}$'
     y_label = r'\boldmath $n(< M_{r}) \left[h^{3}\ \textrm{Mpc}^{-3}\right]$'
-    # Figure
-    plt.clf()
-    plt.close()
+    # Figure - Methods of `fig` are used throughout, since the figures of 
+    # other consumers are open at the same time
     fig = plt.figure(figsize=figsize)
     ax1 = fig.add_subplot(111, facecolor='white')
     # Labels
     ax1.set_xlabel(x_label, fontsize=plot_dict['size_label'])
     ax1.set_ylabel(y_label, fontsize=plot_dict['size_label'])
-    ## Looping over mock catalogues
     ## Looping over different catalogues
-    for kk, catl_kk in enumerate(tqdm(catl_path_arr)):
-        # Reading parameters
-        catl_kk_pd = cu.read_hdf5_file_to_pandas_DF(catl_kk)
+    mr_arr_list = []
+    catl_item   = (yield ['M_r'])
+    while catl_item is not None:
+        (   kk        ,
+            catl_kk   ,
+            catl_kk_pd) = catl_item
         # Color
         color_kk = col_arr[kk]
         ## Calculating luminosity function
-        mr_bins = cu.Bins_array_create(catl_kk_pd['M_r'], base=mr_bins_sep)
-        N_lum   = [num.where(catl_kk_pd['M_r'] < xx)[0].size+1 for xx in mr_bins]
-        n_lum   = num.asarray(N_lum)/param_dict['survey_vol']
+        mr_kk   = catl_kk_pd['M_r'].values
+        mr_bins = cu.Bins_array_create(mr_kk, base=mr_bins_sep)
+        n_lum   = cu.cumulative_lum_function(mr_kk, mr_bins,
+                    volume=param_dict['survey_vol'], offset=1)
+        mr_arr_list.append(mr_kk)
         ## Plotting
         ax1.plot(mr_bins, n_lum, color=color_kk, marker='o', linestyle='-',
             markersize=markersize)
+        catl_item = (yield)
+    ## Mean and scatter of the luminosity functions of all catalogues
+    if len(mr_arr_list) > 0:
+        mr_bins = cu.Bins_array_create(num.concatenate(mr_arr_list),
+                    base=mr_bins_sep)
+        (   n_lum_arr ,
+            n_lum_mean,
+            n_lum_std ) = cu.cumulative_lum_function_stack(mr_arr_list,
+                            mr_bins, volume=param_dict['survey_vol'], offset=1)
+        ax1.fill_between(mr_bins, n_lum_mean - n_lum_std,
+            n_lum_mean + n_lum_std, color='gray', alpha=0.4)
+        ax1.plot(mr_bins, n_lum_mean, color='black', linestyle='--',
+            linewidth=2, label='Mean')
+        ax1.legend(loc='upper left', prop={'size': plot_dict['size_label']})
     # Log-axis
     ax1.set_yscale('log')
     # Reverse axis
     ax1.invert_xaxis()
     # Adjusting space
-    plt.subplots_adjust(top=0.86)
-    plt.tight_layout()
+    fig.subplots_adjust(top=0.86)
+    fig.tight_layout()
     # Saving figure
     if fig_fmt=='pdf':
-        plt.savefig(fname, bbox_inches='tight')
+        fig.savefig(fname, bbox_inches='tight')
     else:
-        plt.savefig(fname, bbox_inches='tight', dpi=400)
+        fig.savefig(fname, bbox_inches='tight', dpi=400)
     print('{0} Figure saved as: {1}'.format(Prog_msg, fname))
-    plt.clf()
-    plt.close()
+    plt.close(fig)
+
+## -----------| Post-processing |----------- ##
+
+def mocks_postprocess(param_dict, proj_dict, catl_ext='hdf5'):
+    """
+    Reads each member galaxy catalogue once, and hands it to all the 
+    post-processing stages, i.e. the plot of the catalogues in the 
+    simulation box, the luminosity functions and the TAR file.
+
+    Each stage is a generator (`consumer`) that works as follows:
+        - `next(consumer)` sets up the stage, and returns the list of 
+          columns it needs (None for all of them). If the stage has
+          nothing to do, it finishes right away.
+        - `consumer.send((kk, catl_kk, catl_kk_pd))` hands it the 
+          `kk`-th catalogue, its path and its DataFrame.
+        - `consumer.send(None)` finishes the stage, e.g. saves the figure.
+
+    Parameters
+    ------------
+    param_dict: python dictionary
+        dictionary with `project` variables
+
+    proj_dict: python dictionary
+        dictionary with info of the project that uses the
+        `Data Science` Cookiecutter template.
+
+    catl_ext: string, optional (default = 'hdf5')
+        file extension of the mock catalogues
+    """
+    Prog_msg = param_dict['Prog_msg']
+    if param_dict['verbose']:
+        print('{0} Post-processing Mock Catalogues ....'.format(Prog_msg))
+    ## List of catalogues
+    catl_path_arr = cu.Index(proj_dict['mock_cat_mc'], '.' + catl_ext)
+    n_catls       = len(catl_path_arr)
+    ## Consumers - The TAR file goes last, since it includes the figures
+    consumer_arr = [mockcatls_simbox_plot(param_dict, proj_dict, n_catls,
+                        render=param_dict['box_render']),
+                    mocks_lum_function(param_dict, proj_dict, n_catls),
+                    tarball_create(param_dict, proj_dict, catl_path_arr)]
+    ## Setting up consumers, and the columns needed by them
+    active_arr = []
+    catl_cols  = []
+    for consumer in consumer_arr:
+        try:
+            consumer_cols = next(consumer)
+        except StopIteration:
+            continue
+        active_arr.append(consumer)
+        if (consumer_cols is None) or (catl_cols is None):
+            catl_cols = None
+        else:
+            catl_cols += [col for col in consumer_cols if col not in catl_cols]
+    ##
+    ## Streaming over catalogues
+    for kk, catl_kk in enumerate(tqdm(catl_path_arr)):
+        catl_kk_pd = cu.read_pandas_file(catl_kk, columns=catl_cols)
+        for consumer in active_arr:
+            consumer.send((kk, catl_kk, catl_kk_pd))
+    ## Finishing consumers
+    for consumer in active_arr:
+        try:
+            consumer.send(None)
+        except StopIteration:
+            pass
+    if param_dict['verbose']:
+        print('{0} Post-processing Mock Catalogues .... Done'.format(Prog_msg))
 
 ## ---------| Multiprocessing |------------##
 
-def multiprocessing_catls(memb_tuples_ii, pos_coords_mocks, param_dict, 
-    proj_dict, ii_mock):
+## Inputs shared by all the mock catalogues of a process
+_catls_mp_dict = {}
+
+def multiprocessing_catls_init(clf_pd, pos_coords_mocks, param_dict, 
+    proj_dict):
     """
-    Distributes the analysis of the creation of mock catalogues into 
-    more than 1 processor
+    Initializes each process of the pool that creates the mock catalogues
 
     Parameters
     -----------
-    memb_tuples_ii: tuple
-        tuple of catalogue indices to be analyzed
+    clf_pd: `cu.MemmapTable` object
+        read-only table containing information from Halobias + CLF 
+        procedures
 
-    pos_coords_mocks_ii: tuple, shape (4,)
-        tuple with the positions coordinates, coordinate dictionary, 
-        and DataFrame to be used
+    pos_coords_mocks: list
+        list with the specifications of each mock catalogue, i.e. 
+        `[x, y, z, coord_perm, coord_dict]`
 
     param_dict: python dictionary
         dictionary with `project` variables
@@ -3038,22 +3991,57 @@ def multiprocessing_catls(memb_tuples_ii, pos_coords_mocks, param_dict,
     proj_dict: python dictionary
         dictionary with info of the project that uses the
         `Data Science` Cookiecutter template.
+    """
+    _catls_mp_dict['clf_pd'          ] = clf_pd
+    _catls_mp_dict['pos_coords_mocks'] = pos_coords_mocks
+    _catls_mp_dict['param_dict'      ] = param_dict
+    _catls_mp_dict['proj_dict'       ] = proj_dict
+
+def multiprocessing_catls(zz_mock):
+    """
+    Creates a single mock catalogue inside a process of the pool.
+    See `multiprocessing_catls_init` for the inputs of the process.
 
-    ii_mock: int
+    Parameters
+    -----------
+    zz_mock: int
         number of the mock catalogue being analyzed
 
     Returns
     -----------
+    zz_mock: int
+        number of the mock catalogue being analyzed
+
+    zz_time: float
+        time spent on the mock catalogue. Units: seconds
+
+    zz_error: str or NoneType
+        traceback of the error raised by the mock catalogue, if any
+
+    zz_outputs: list
+        paths to the member and group catalogues of the mock catalogue
     """
-    ## Program Message
-    Prog_msg = param_dict['Prog_msg']
-    ## Reading which catalogues to process
-    start_ii, end_ii = memb_tuples_ii
-    ##
-    ## Looping over the desired catalogues
-    for zz in range(start_ii, end_ii):
-        ## Making z'th catalogue
-        catl_create_main(zz, pos_coords_mocks[zz], param_dict, proj_dict)
+    param_dict = _catls_mp_dict['param_dict']
+    ## Random seed of the catalogue, independent of the order in which 
+    ## the catalogues are created
+    num.random.seed(param_dict['seed'] + zz_mock)
+    ## Making z'th catalogue
+    zz_start = time.time()
+    zz_error   = None
+    zz_outputs = []
+    try:
+        zz_outputs = catl_create_main(
+                        zz_mock,
+                        _catls_mp_dict['clf_pd'],
+                        _catls_mp_dict['pos_coords_mocks'][zz_mock],
+                        param_dict,
+                        _catls_mp_dict['proj_dict'])
+        zz_outputs = list(zz_outputs)
+    except Exception:
+        zz_error = traceback.format_exc()
+    zz_time = time.time() - zz_start
+
+    return zz_mock, zz_time, zz_error, zz_outputs
 
 ## -----------| Main functions |----------- ##
 
@@ -3076,7 +4064,8 @@ def main(args):
     ## Printing out project variables
     print('\n'+50*'='+'\n')
     for key, key_val in sorted(param_dict.items()):
-        if not key in ['Prog_msg', 'hb_files_arr', 'plot_dict', 'hod_dict']:
+        if not key in ['Prog_msg', 'hb_files_arr', 'plot_dict', 'hod_dict',
+                        'clf_dict']:
             print('{0} `{1}`: {2}'.format(Prog_msg, key, key_val))
     print('\n'+50*'='+'\n')
     ##
@@ -3084,6 +4073,15 @@ def main(args):
     param_dict = cosmo_create(param_dict)
     ## Survey Details
     param_dict = survey_specs(param_dict)
+    ## Halo mass function and comoving distances - Only depend on 
+    ## cosmology, so they are shared by all the halobias files
+    proj_dict_cosmo = directory_skeleton(
+        param_dict, cu.cookiecutter_paths('./'), hb_files_arr[0])
+    param_dict = hmf_calc(param_dict['cosmo_model'], proj_dict_cosmo, param_dict,
+        Mmin=6., Mmax=16.01, dlog10m=1.e-3, hmf_model=param_dict['hmf_model'])
+    param_dict = z_comoving_calc(param_dict, proj_dict_cosmo)
+    ## Mock catalogues that failed, for each halobias file
+    catl_fail_all = {}
     #
     # Looping over different hb_files
     for ii, hb_ii in enumerate(hb_files_arr):
@@ -3095,23 +4093,19 @@ def main(args):
         # proj_dict  = directory_skeleton(param_dict, cu.cookiecutter_paths(__file__))
         proj_dict  = directory_skeleton(
             param_dict_mod, cu.cookiecutter_paths('./'), hb_ii)
-
-        ## Halo mass function
-        param_dict_mod = hmf_calc(param_dict_mod['cosmo_model'], proj_dict, param_dict_mod,
-            Mmin=6., Mmax=16.01, dlog10m=1.e-3, hmf_model=param_dict_mod['hmf_model'])
         ##
         ## Downloading files
         param_dict_mod = download_files(param_dict_mod, proj_dict, hb_ii)
-        ##
-        ## Redshift and Comoving distance
-        param_dict_mod = z_comoving_calc(param_dict_mod, proj_dict)
         ## Halobias Extras file - Modified Halobias file
         param_dict_mod = hb_file_construction_extras(param_dict_mod, proj_dict)
         ## Checking if final version of file exists
         param_dict_mod = clf_galprop_test(param_dict_mod, proj_dict)
         if not param_dict_mod['clf_opt']:
             ## Conditional Luminosity Function
-            clf_pd = clf_assignment(param_dict_mod, proj_dict)
+            if (param_dict_mod['clf_engine'] == 'numpy'):
+                clf_pd = clf_assignment_numpy(param_dict_mod, proj_dict)
+            else:
+                clf_pd = clf_assignment(param_dict_mod, proj_dict)
             ## Distance from Satellites to Centrals
             clf_pd = cen_sat_distance_calc(clf_pd, param_dict_mod)
             ## Finding closest magnitude value from ECO catalogue
@@ -3120,18 +4114,39 @@ def main(args):
             clf_pd = param_dict_mod['clf_pd']
         ## Carving out geometry of Survey and carrying out the analysis
         if (param_dict_mod['survey'] == 'ECO'):
-            eco_geometry_mocks(clf_pd, param_dict_mod, proj_dict)
+            catl_fail_dict = eco_geometry_mocks(clf_pd, param_dict_mod,
+                                proj_dict)
         elif (param_dict_mod['survey'] == 'A'):
-            resolve_a_geometry_mocks(clf_pd, param_dict_mod, proj_dict)
+            catl_fail_dict = resolve_a_geometry_mocks(clf_pd, param_dict_mod,
+                                proj_dict)
         elif (param_dict_mod['survey'] == 'B'):
-            resolve_b_geometry_mocks(clf_pd, param_dict_mod, proj_dict)
-        ## Plotting different catalogues in simulation box
-        mockcatls_simbox_plot(param_dict_mod, proj_dict)
-        ## Luminosity function for each catalogue
-        mocks_lum_function(param_dict_mod, proj_dict)
-        ##
-        ## Saving everything to TARBALL
-        tarball_create(param_dict_mod, proj_dict)
+            catl_fail_dict = resolve_b_geometry_mocks(clf_pd, param_dict_mod,
+                                proj_dict)
+        ## Post-processing is skipped when the set of catalogues is incomplete
+        if len(catl_fail_dict) > 0:
+            catl_fail_all[os.path.basename(hb_ii)] = catl_fail_dict
+            msg  = '{0} {1} Mock Catalogues of `{2}` failed. Skipping the '
+            msg += 'plots and TARBALL of this file'
+            print(msg.format(Prog_msg, len(catl_fail_dict),
+                os.path.basename(hb_ii)))
+            continue
+        ## Plots of the catalogues in the simulation box, luminosity 
+        ## functions, and TARBALL, from a single read of each catalogue
+        mocks_postprocess(param_dict_mod, proj_dict,
+            catl_ext=param_dict_mod['catl_ext'])
+    ##
+    ## Failed mock catalogues
+    if len(catl_fail_all) > 0:
+        print('\n'+50*'='+'\n')
+        for hb_name, catl_fail_dict in sorted(catl_fail_all.items()):
+            for zz_mock, zz_error in sorted(catl_fail_dict.items()):
+                print('{0} `{1}` - Mock Catalogue [{2}] failed:\n{3}'.format(
+                    Prog_msg, hb_name, zz_mock, zz_error))
+        msg = '{0} Mock Catalogues failed for {1} halobias file(s): {2}'
+        msg = msg.format(Prog_msg, len(catl_fail_all),
+                dict((hb_name, sorted(catl_fail_dict.keys()))
+                    for hb_name, catl_fail_dict in catl_fail_all.items()))
+        raise RuntimeError(msg)
 
 # Main function
 if __name__=='__main__':
@@ -1,11 +1,16 @@
 from .abundance_matching_vc import *
+from .box_grid_vc           import *
+from .clf_vc                import *
+from .cosmo_dist_vc         import *
 from .file_dir_check        import *
 from .file_readers          import *
+from .fof_vc                import *
 from .geometry              import *
 from .get_path              import *
 from .magnitude_calc        import *
 from .pandas_hdf5           import *
 from .sdss_catls_obs        import *
+from .shared_memmap         import *
 from .spherematch           import *
 from .statistics_vc         import *
 from .survey_utils          import *
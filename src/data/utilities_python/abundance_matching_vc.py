@@ -83,6 +83,39 @@ def _monotonic_arrays(x,y):
 		return True
 	else: return False
 
+def _cumulative_counts(var, reverse=True):
+    """
+    Counts, for each element of `var`, the number of elements of `var` 
+    that are strictly smaller (or larger) than it.
+    Equivalent to `num.where(var < xx)[0].size` for each `xx` in `var`,
+    but computed by sorting `var` once.
+
+    Parameters
+    ----------
+    var: array_like
+        variable to be analyzed
+
+    reverse: boolean, (default=True)
+        - reverse==True : counts elements smaller than each element
+        - reverse==False: counts elements larger than each element
+
+    Returns
+    -------
+    counts: numpy.ndarray
+        number of elements strictly smaller (or larger) than each element.
+        NaN elements are never counted, and get a count of zero.
+    """
+    var      = num.asarray(var, dtype=float)
+    nan_bool = num.isnan(var)
+    var_sort = num.sort(var[~nan_bool])
+    if reverse:
+        counts = num.searchsorted(var_sort, var, side='left')
+    else:
+        counts = var_sort.size - num.searchsorted(var_sort, var, side='right')
+    counts[nan_bool] = 0
+
+    return counts
+
 def abundance_matching_f(dict1, dict2, dict1_names=None, dict2_names=None, 
     volume1=None, volume2=None, reverse=True, dens1_opt=False, 
     dens2_opt=False):
@@ -157,10 +190,7 @@ def abundance_matching_f(dict1, dict2, dict1_names=None, dict2_names=None,
         var1        = num.array(dict1)
         assert(volume1 != None)
         ## Calculating Density for `var1`
-        if reverse:
-            ncounts1 = num.array([num.where(var1<xx)[0].size for xx in var1])+1
-        else:
-            ncounts1 = num.array([num.where(var1>xx)[0].size for xx in var1])+1
+        ncounts1 = _cumulative_counts(var1, reverse=reverse) + 1
         dens1 = ncounts1.astype(float)/volume1
     # 2nd property
     if dens2_opt:
@@ -171,16 +201,13 @@ def abundance_matching_f(dict1, dict2, dict1_names=None, dict2_names=None,
         var2        = num.array(dict2)
         assert(volume2 != None)
         ## Calculating Density for `var1`
-        if reverse:
-            ncounts2 = num.array([num.where(var2<xx)[0].size for xx in var2])+1
-        else:
-            ncounts2 = num.array([num.where(var2>xx)[0].size for xx in var2])+1
+        ncounts2 = _cumulative_counts(var2, reverse=reverse) + 1
         dens2 = ncounts2.astype(float)/volume2
     ##
     ## Interpolating densities and values
     interp_var2 = interp1d(dens2, var2, bounds_error=True,assume_sorted=False)
     # Value assignment
-    var1_ab = num.array([interp_var2(xx) for xx in dens1])
+    var1_ab = num.asarray(interp_var2(dens1), dtype=float)
 
     return var1_ab
 
@@ -212,10 +239,7 @@ def cumulative_function(var,volume=1.,reverse=True, dens=True):
         Cumulative function of number counts or densities, depending of `dens`
     """
     var = num.array(var)
-    if reverse:
-        counts = num.array([num.where(var<x)[0].size for x in var])+1
-    else:
-        counts = num.array([num.where(var>x)[0].size for x in var])+1
+    counts = _cumulative_counts(var, reverse=reverse) + 1
     if dens:
         counts = counts.astype(float)/volume
 
@@ -0,0 +1,192 @@
+#! /usr/bin/env python
+
+# Victor Calderon
+# October 18, 2026
+# Vanderbilt University
+
+"""
+Grid index of the galaxies of a periodic simulation box, used for
+selecting the galaxies that can fall within a survey volume without
+looping over the whole box
+"""
+from __future__ import division, absolute_import, print_function
+
+__author__     =['Victor Calderon']
+__copyright__  =["Copyright 2017 Victor Calderon, box_grid_vc"]
+__email__      =['victor.calderon@vanderbilt.edu']
+__maintainer__ =['Victor Calderon']
+__all__        =["BoxGridIndex", "box_grid_index", "ra_wedge_mask"]
+
+import os
+import numpy as num
+
+class BoxGridIndex(object):
+    """
+    Galaxies of a periodic box, grouped by the cubic cell they belong to.
+
+    The galaxies of cell `ii` are `cell_order[cell_start[ii]:cell_start[ii+1]]`.
+    Both arrays can be given as paths to `.npy` files, in which case they
+    are opened as read-only memory maps the first time they are used, and
+    only the paths are pickled.
+
+    Parameters
+    ----------
+    size_cube: float
+        size of the box. Units: Mpc/h
+
+    ncell: int
+        number of cells along each axis of the box
+
+    cell_order: numpy.ndarray or string
+        indices of the galaxies, sorted by cell
+
+    cell_start: numpy.ndarray or string
+        position in `cell_order` of the first galaxy of each cell,
+        of length `ncell**3 + 1`
+    """
+    def __init__(self, size_cube, ncell, cell_order, cell_start):
+        self.size_cube  = float(size_cube)
+        self.ncell      = int(ncell)
+        self.cell_order = cell_order
+        self.cell_start = cell_start
+        self._arrs      = {}
+
+    def _array(self, key):
+        arr = getattr(self, key)
+        if isinstance(arr, str):
+            if key not in self._arrs:
+                self._arrs[key] = num.load(arr, mmap_mode='r')
+            arr = self._arrs[key]
+
+        return arr
+
+    @property
+    def cell_len(self):
+        return self.size_cube / self.ncell
+
+    def cell_centers(self):
+        """
+        Positions of the centers of the cells
+
+        Returns
+        -------
+        cen_arr: numpy.ndarray, shape (ncell**3, 3)
+            `x`, `y`, and `z` positions of the center of each cell.
+            Units: Mpc/h
+        """
+        cen_1d  = (num.arange(self.ncell) + 0.5) * self.cell_len
+        cen_arr = num.column_stack([cen_kk.ravel() for cen_kk in
+                    num.meshgrid(cen_1d, cen_1d, cen_1d, indexing='ij')])
+
+        return cen_arr
+
+    def cell_members(self, cell_mask):
+        """
+        Indices of the galaxies in a set of cells
+
+        Parameters
+        ----------
+        cell_mask: array_like, shape (ncell**3,)
+            boolean mask of the selected cells
+
+        Returns
+        -------
+        gal_idx: numpy.ndarray
+            indices of the galaxies in the selected cells, in increasing
+            order
+        """
+        cell_order = self._array('cell_order')
+        cell_start = self._array('cell_start')
+        cell_idx   = num.where(cell_mask)[0]
+        ## Position in `cell_order` of every member of the selected cells
+        cell_count = cell_start[cell_idx + 1] - cell_start[cell_idx]
+        gal_pos    = (num.repeat(cell_start[cell_idx] - num.cumsum(cell_count)
+                        + cell_count, cell_count) +
+                      num.arange(cell_count.sum()))
+        gal_idx    = num.sort(cell_order[gal_pos])
+
+        return gal_idx
+
+    def __getstate__(self):
+        ## Memory maps are not carried over, they are re-opened on access
+        state          = self.__dict__.copy()
+        state['_arrs'] = {}
+
+        return state
+
+def box_grid_index(pos_arr, size_cube, cell_size=10., directory=None,
+    prefix='grid'):
+    """
+    Groups the galaxies of a periodic box by cubic cells
+
+    Parameters
+    ----------
+    pos_arr: array_like, shape (N, 3)
+        `x`, `y`, and `z` positions of the galaxies. Units: Mpc/h
+
+    size_cube: float
+        size of the box. Units: Mpc/h
+
+    cell_size: float, optional (default = 10.)
+        approximate size of the cells. It is rounded, so that the box
+        holds an integer number of cells. Units: Mpc/h
+
+    directory: string, optional (default = None)
+        if given, the arrays of the index are saved in `directory` as
+        `.npy` files, and the index reads them back as memory maps
+
+    prefix: string, optional (default = 'grid')
+        prefix of the `.npy` files
+
+    Returns
+    -------
+    index_obj: `BoxGridIndex` object
+        grid index of the galaxies in `pos_arr`
+    """
+    pos_arr  = num.asarray(pos_arr, dtype=float)
+    ncell    = max(int(round(size_cube / float(cell_size))), 1)
+    ## Cell of each galaxy
+    cell_ijk = (num.floor(pos_arr / (size_cube / ncell)).astype(int)) % ncell
+    cell_id  = (cell_ijk[:,0] * ncell + cell_ijk[:,1]) * ncell + cell_ijk[:,2]
+    ## Galaxies sorted by cell
+    cell_order = num.argsort(cell_id, kind='mergesort')
+    cell_start = num.searchsorted(cell_id[cell_order],
+                    num.arange(ncell**3 + 1))
+    if directory is not None:
+        order_file = os.path.join(directory, '{0}_order.npy'.format(prefix))
+        start_file = os.path.join(directory, '{0}_start.npy'.format(prefix))
+        num.save(order_file, cell_order)
+        num.save(start_file, cell_start)
+        cell_order = order_file
+        cell_start = start_file
+    index_obj = BoxGridIndex(size_cube, ncell, cell_order, cell_start)
+
+    return index_obj
+
+def ra_wedge_mask(ra_arr, ra_min, ra_max, ra_tol=0.):
+    """
+    Selects the right ascensions within a wedge of the sky
+
+    Parameters
+    ----------
+    ra_arr: array_like
+        right ascensions, in the range [0, 360). Units: degrees
+
+    ra_min, ra_max: float
+        limits of the wedge. `ra_min` may be negative, for wedges that
+        contain RA = 0. Units: degrees
+
+    ra_tol: float or array_like, optional (default = 0.)
+        tolerance added on both sides of the wedge. Units: degrees
+
+    Returns
+    -------
+    ra_mask: numpy.ndarray
+        boolean mask of the right ascensions within the wedge
+    """
+    ra_arr   = num.asarray(ra_arr, dtype=float)
+    ra_width = (ra_max - ra_min) + 2. * num.asarray(ra_tol)
+    ra_mask  = (((ra_arr - (ra_min - ra_tol)) % 360. <= ra_width) |
+                (ra_width >= 360.))
+
+    return ra_mask
@@ -0,0 +1,218 @@
+#! /usr/bin/env python
+
+# Victor Calderon
+# October 18, 2026
+# Vanderbilt University
+
+"""
+Set of functions for assigning luminosities to galaxies in DM halos via
+the conditional luminosity function (CLF)
+"""
+from __future__ import division, absolute_import, print_function
+
+__author__     =['Victor Calderon']
+__copyright__  =["Copyright 2017 Victor Calderon, clf_vc"]
+__email__      =['victor.calderon@vanderbilt.edu']
+__maintainer__ =['Victor Calderon']
+__all__        =["clf_central_lum", "clf_lum_assign", "lum_abundance_matching"]
+
+import numpy as num
+from multiprocessing import Pool
+
+def clf_central_lum(loghalom, clf_dict):
+    """
+    Computes the median luminosity of central galaxies as function of
+    halo mass
+
+    Parameters
+    ----------
+    loghalom: array_like
+        log-base 10 of the DM halo masses. Units: Msun/h
+
+    clf_dict: python dictionary
+        dictionary with the CLF parameters:
+            - 'logL0', 'logM1', 'gamma1', 'gamma2'
+
+    Returns
+    -------
+    logLc: array_like
+        log-base 10 of the median luminosity of centrals. Units: Lsun/h^2
+    """
+    loghalom = num.asarray(loghalom, dtype=float)
+    m_ratio  = 10.**(loghalom - clf_dict['logM1'])
+    logLc    = (clf_dict['logL0'] + clf_dict['gamma1'] * num.log10(m_ratio) -
+               (clf_dict['gamma1'] - clf_dict['gamma2']) *
+                num.log10(1. + m_ratio))
+
+    return logLc
+
+def _satellite_cdf_table(alpha, logx_min=-6., logx_max=1., npts=4000):
+    """
+    Tabulates the (upper) cumulative distribution of the modified
+    Schechter function, `x^alpha * exp(-x^2)`, with `x = L/Ls*`.
+
+    Returns
+    -------
+    logx_arr: numpy.ndarray
+        grid of log-base 10 of `x`, in increasing order
+
+    cdf_arr: numpy.ndarray
+        integral of the modified Schechter function from `x` to `x_max`,
+        in decreasing order
+    """
+    logx_arr = num.linspace(logx_min, logx_max, npts)
+    x_arr    = 10.**logx_arr
+    # Integrand in `log10(x)`
+    dn_arr   = x_arr**(alpha + 1.) * num.exp(-x_arr**2) * num.log(10.)
+    seg_arr  = 0.5 * (dn_arr[1:] + dn_arr[:-1]) * num.diff(logx_arr)
+    cdf_arr  = num.append(num.cumsum(seg_arr[::-1])[::-1], 0.)
+
+    return logx_arr, cdf_arr
+
+def _clf_lum_chunk(args):
+    """
+    Assigns luminosities to a single chunk of galaxies.
+    See `clf_lum_assign` for the description of the inputs.
+    """
+    (   loghalom ,
+        cs_flag  ,
+        clf_dict ,
+        seed     ,
+        cens     ) = args
+    ## Random number generator of this chunk
+    rng      = num.random.RandomState(seed)
+    ngal     = len(loghalom)
+    logL_arr = num.zeros(ngal)
+    logLc    = clf_central_lum(loghalom, clf_dict)
+    ## Centrals - log-normal distribution around `logLc`
+    cen_idx  = num.where(cs_flag == cens)[0]
+    logL_arr[cen_idx] = (logLc[cen_idx] +
+                         clf_dict['sigma_c'] * rng.normal(size=cen_idx.size))
+    ## Satellites - Modified Schechter function above `logL_min`
+    sat_idx  = num.where(cs_flag != cens)[0]
+    if sat_idx.size > 0:
+        logLs           = logLc[sat_idx] + num.log10(clf_dict['ls_frac'])
+        logx_arr, cdf_arr = _satellite_cdf_table(clf_dict['alpha_s'])
+        logx_min        = num.clip(clf_dict['logL_min'] - logLs,
+                                logx_arr[0], logx_arr[-1])
+        cdf_min         = num.interp(logx_min, logx_arr, cdf_arr)
+        cdf_draw        = rng.uniform(size=sat_idx.size) * cdf_min
+        logx_draw       = num.interp(cdf_draw, cdf_arr[::-1], logx_arr[::-1])
+        logL_arr[sat_idx] = logLs + logx_draw
+
+    return logL_arr
+
+def clf_lum_assign(loghalom, cs_flag, clf_dict, seed=1, cens=1,
+    chunk_size=1000000, n_proc=1):
+    """
+    Draws a luminosity for every galaxy from the CLF of its host DM halo.
+
+    Centrals follow a log-normal distribution around `Lc(M)`, and
+    satellites follow a modified Schechter function with
+    `Ls*(M) = ls_frac * Lc(M)` above a minimum luminosity `logL_min`.
+    The number of centrals and satellites is fixed by the HOD of the
+    Halobias file, so the normalization of the satellite CLF is not used.
+
+    Parameters
+    ----------
+    loghalom: array_like, shape (N,)
+        log-base 10 of the mass of the host DM halo. Units: Msun/h
+
+    cs_flag: array_like, shape (N,)
+        Central / Satellite designation of each galaxy
+
+    clf_dict: python dictionary
+        dictionary with the CLF parameters:
+            - 'logL0', 'logM1', 'gamma1', 'gamma2', 'sigma_c' (centrals)
+            - 'alpha_s', 'ls_frac' (satellites)
+            - 'logL_min': minimum luminosity of satellites
+
+    seed: int, optional (default = 1)
+        random seed. Each chunk uses `seed + chunk index`, so the result
+        does not depend on `n_proc`.
+
+    cens: int, optional (default = 1)
+        value of `cs_flag` for central galaxies
+
+    chunk_size: int, optional (default = 1000000)
+        number of galaxies evaluated at once
+
+    n_proc: int, optional (default = 1)
+        number of processes used to evaluate the chunks
+
+    Returns
+    -------
+    logL_arr: numpy.ndarray, shape (N,)
+        log-base 10 of the luminosity of each galaxy. Units: Lsun/h^2
+    """
+    loghalom = num.asarray(loghalom, dtype=float)
+    cs_flag  = num.asarray(cs_flag)
+    ngal     = len(loghalom)
+    ## Chunks of galaxies
+    chunk_size = max(int(chunk_size), 1)
+    chunk_lims = num.arange(0, ngal, chunk_size)
+    chunk_args = [( loghalom[ii:ii+chunk_size],
+                    cs_flag [ii:ii+chunk_size],
+                    clf_dict,
+                    seed + kk,
+                    cens) for kk, ii in enumerate(chunk_lims)]
+    if len(chunk_args) == 0:
+        return num.zeros(0)
+    ## Evaluating chunks
+    if (n_proc > 1) and (len(chunk_args) > 1):
+        pool     = Pool(processes=min(n_proc, len(chunk_args)))
+        logL_lst = pool.map(_clf_lum_chunk, chunk_args)
+        pool.close()
+        pool.join()
+    else:
+        logL_lst = [_clf_lum_chunk(args_ii) for args_ii in chunk_args]
+    logL_arr = num.concatenate(logL_lst)
+
+    return logL_arr
+
+def lum_abundance_matching(logL_arr, volume, mr_arr, dens_arr,
+    failval=num.nan):
+    """
+    Assigns absolute magnitudes to galaxies by matching the cumulative
+    number density of their luminosities to that of a survey.
+
+    Parameters
+    ----------
+    logL_arr: array_like, shape (N,)
+        log-base 10 of the luminosity of each galaxy
+
+    volume: float
+        volume of the simulation. Units: (Mpc/h)^3
+
+    mr_arr: array_like
+        absolute magnitudes of the survey luminosity function
+
+    dens_arr: array_like
+        cumulative number densities, n(< `mr_arr`), of the survey
+
+    failval: float, optional (default = num.nan)
+        value assigned to galaxies fainter than the survey luminosity 
+        function. Galaxies brighter than its first entry are assigned 
+        the brightest magnitude of `mr_arr`.
+
+    Returns
+    -------
+    mr_gal_arr: numpy.ndarray, shape (N,)
+        absolute magnitude of each galaxy
+    """
+    logL_arr = num.asarray(logL_arr, dtype=float)
+    mr_arr   = num.asarray(mr_arr  , dtype=float)
+    dens_arr = num.asarray(dens_arr, dtype=float)
+    ## Sorting survey LF by density
+    dens_idx = num.argsort(dens_arr)
+    mr_arr   = mr_arr  [dens_idx]
+    dens_arr = dens_arr[dens_idx]
+    ## Ranking galaxies from brightest to faintest
+    lum_idx  = num.argsort(-logL_arr, kind='mergesort')
+    dens_gal = (num.arange(logL_arr.size) + 1.) / float(volume)
+    ## Interpolating magnitudes
+    mr_gal_arr          = num.zeros(logL_arr.size)
+    mr_gal_arr[lum_idx] = num.interp(dens_gal, dens_arr, mr_arr,
+                                    right=failval)
+
+    return mr_gal_arr
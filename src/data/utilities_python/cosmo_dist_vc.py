@@ -0,0 +1,143 @@
+#! /usr/bin/env python
+
+# Victor Calderon
+# October 18, 2026
+# Vanderbilt University
+
+"""
+Cached conversions between redshift and comoving distance
+"""
+from __future__ import division, absolute_import, print_function
+
+__author__     =['Victor Calderon']
+__copyright__  =["Copyright 2017 Victor Calderon, cosmo_dist_vc"]
+__email__      =['victor.calderon@vanderbilt.edu']
+__maintainer__ =['Victor Calderon']
+__all__        =["ComovingDistance", "comoving_distance_table"]
+
+import os
+import hashlib
+import numpy as num
+
+## In-process cache of distance tables, keyed by the name of the cache file
+_DIST_CACHE = {}
+
+class ComovingDistance(object):
+    """
+    Vectorized conversions between redshift and comoving distance,
+    interpolated from a tabulated relation.
+
+    Parameters
+    ----------
+    z_arr: array_like
+        grid of redshifts, in increasing order
+
+    d_arr: array_like
+        comoving distance at each redshift of `z_arr`. Units: Mpc
+    """
+    def __init__(self, z_arr, d_arr):
+        self.z_arr = num.asarray(z_arr, dtype=float)
+        self.d_arr = num.asarray(d_arr, dtype=float)
+
+    @property
+    def z_max(self):
+        return self.z_arr[-1]
+
+    @property
+    def d_max(self):
+        return self.d_arr[-1]
+
+    def z_to_d(self, z):
+        """
+        Comoving distance at redshift `z`
+
+        Parameters
+        ----------
+        z: float or array_like
+            redshift(s). Values outside of the table give NaN.
+
+        Returns
+        -------
+        d: float or numpy.ndarray
+            comoving distance(s). Units: Mpc
+        """
+        return num.interp(z, self.z_arr, self.d_arr,
+                    left=num.nan, right=num.nan)
+
+    def d_to_z(self, d):
+        """
+        Redshift at comoving distance `d`
+
+        Parameters
+        ----------
+        d: float or array_like
+            comoving distance(s). Units: Mpc.
+            Values outside of the table give NaN.
+
+        Returns
+        -------
+        z: float or numpy.ndarray
+            redshift(s)
+        """
+        return num.interp(d, self.d_arr, self.z_arr,
+                    left=num.nan, right=num.nan)
+
+def comoving_distance_table(cosmo_model, cache_dir, zmin=0., zmax=0.5,
+    dz=1e-3, prefix='cosmo', remove_files=False):
+    """
+    Tabulates the comoving distance as function of redshift, or loads it
+    from the cache.
+
+    Tables are stored in `cache_dir` as `.npz` files named after a hash
+    of the cosmology and the redshift grid, and are kept in memory for
+    the rest of the process.
+
+    Parameters
+    ----------
+    cosmo_model: astropy cosmology object
+        cosmology used to compute the distances
+
+    cache_dir: string
+        path to the directory of the cache files
+
+    zmin, zmax, dz: float, optional
+        limits and spacing of the redshift grid. `zmax` is excluded.
+
+    prefix: string, optional (default = 'cosmo')
+        prefix of the cache file
+
+    remove_files: boolean, optional (default = False)
+        if True, the table is recomputed and the cache file is overwritten
+
+    Returns
+    -------
+    cosmo_dist: `ComovingDistance` object
+        object with the `z_to_d` and `d_to_z` conversions
+    """
+    key_str   = '|'.join([repr(cosmo_model), repr(float(zmin)),
+                            repr(float(zmax)), repr(float(dz))])
+    dist_key  = hashlib.md5(key_str.encode('utf-8')).hexdigest()
+    dist_file = os.path.join(cache_dir, '{0}_z_comoving_{1}.npz'.format(
+                                prefix, dist_key))
+    if remove_files:
+        _DIST_CACHE.pop(dist_file, None)
+        if os.path.exists(dist_file):
+            os.remove(dist_file)
+    ## Loading or computing the table
+    if dist_file in _DIST_CACHE:
+        cosmo_dist = _DIST_CACHE[dist_file]
+    elif os.path.exists(dist_file):
+        with num.load(dist_file) as dist_npz:
+            cosmo_dist = ComovingDistance(dist_npz['z'], dist_npz['d_como'])
+    else:
+        z_arr      = num.arange(zmin, zmax, dz)
+        d_arr      = cosmo_model.comoving_distance(z_arr).to('Mpc').value
+        cosmo_dist = ComovingDistance(z_arr, d_arr)
+        ## Writing to a temporary file first, so that an interrupted run
+        ## does not leave a partial table behind
+        dist_tmpfile = dist_file + '.tmp.npz'
+        num.savez(dist_tmpfile, z=cosmo_dist.z_arr, d_como=cosmo_dist.d_arr)
+        os.replace(dist_tmpfile, dist_file)
+    _DIST_CACHE[dist_file] = cosmo_dist
+
+    return cosmo_dist
@@ -12,10 +12,13 @@ __copyright__  =["Copyright 2017 Victor Calderon, file_dir_check"]
 __email__      =['victor.calderon@vanderbilt.edu']
 __maintainer__ =['Victor Calderon']
 __all__        =["Program_Msg","Index","get_immediate_subdirectories",\
-                 "Path_Folder", "File_Exists","File_Download_needed"]
+                 "Path_Folder", "File_Exists","File_Download_needed",\
+                 "File_Checksum"]
 
 import os
 import sys
+import json
+import hashlib
 import subprocess
 import time
 import traceback
@@ -190,3 +193,78 @@ def File_Download_needed(filename_local, filename_web):
             print( '{0} {1}'.format(message_def, cmd))
             subprocess.call(cmd, shell=True)
     File_Exists(filename_local)
+
+def _file_md5(filename, blocksize=2**20):
+    """
+    Computes the MD5 checksum of the contents of a single file.
+    """
+    md5_obj = hashlib.md5()
+    with open(filename, 'rb') as file_obj:
+        for block in iter(lambda: file_obj.read(blocksize), b''):
+            md5_obj.update(block)
+
+    return md5_obj.hexdigest()
+
+def File_Checksum(filename_arr, extra=None, blocksize=2**20, stat_file=None):
+    """
+    Computes the MD5 checksum of one or more files.
+
+    Parameters
+    ----------
+    filename_arr: str or array_like
+        Absolute path(s) + filename(s) of the file(s).
+
+    extra: object, optional (default = None)
+        Extra information (e.g. parameters) added to the checksum.
+        It is added through its string representation.
+
+    blocksize: int, optional (default = 2**20)
+        Number of bytes read at once.
+
+    stat_file: str, optional (default = None)
+        Path to a JSON file with the size, modification time and checksum
+        of each file of previous calls. Files whose size and modification
+        time did not change are not read again. The file is updated with
+        the current values.
+
+    Returns
+    ----------
+    checksum: str
+        Hexadecimal MD5 checksum of the contents of `filename_arr`
+        and of `extra`.
+    """
+    if isinstance(filename_arr, str):
+        filename_arr = [filename_arr]
+    ## Checksums of previous calls
+    stat_dict = {}
+    if (stat_file is not None) and os.path.exists(stat_file):
+        try:
+            with open(stat_file, 'r') as stat_obj:
+                stat_dict = json.load(stat_obj)
+        except ValueError:
+            stat_dict = {}
+    stat_mod = False
+    md5_obj  = hashlib.md5()
+    for filename in filename_arr:
+        File_Exists(filename)
+        file_key  = os.path.abspath(filename)
+        file_stat = os.stat(filename)
+        file_info = [file_stat.st_size, file_stat.st_mtime_ns]
+        if stat_dict.get(file_key, [None])[:2] == file_info:
+            file_md5 = stat_dict[file_key][2]
+        else:
+            file_md5 = _file_md5(filename, blocksize=blocksize)
+            stat_dict[file_key] = file_info + [file_md5]
+            stat_mod = True
+        md5_obj.update(file_md5.encode('utf-8'))
+    if extra is not None:
+        md5_obj.update(str(extra).encode('utf-8'))
+    checksum = md5_obj.hexdigest()
+    ## Saving checksums
+    if (stat_file is not None) and stat_mod:
+        stat_tmpfile = stat_file + '.tmp'
+        with open(stat_tmpfile, 'w') as stat_obj:
+            json.dump(stat_dict, stat_obj, indent=1, sort_keys=True)
+        os.replace(stat_tmpfile, stat_file)
+
+    return checksum
@@ -12,8 +12,10 @@ __author__     =['Victor Calderon']
 __copyright__  =["Copyright 2017 Victor Calderon, file_readers"]
 __email__      =['victor.calderon@vanderbilt.edu']
 __maintainer__ =['Victor Calderon']
-__all__        =["IDL_Read_file","fast_food_reader"]
+__all__        =["IDL_Read_file","fast_food_reader","fast_food_array_reader",\
+                 "HalobiasFile"]
 
+import os
 import sys
 import struct
 import numpy as num
@@ -128,3 +130,219 @@ def fast_food_reader(key, nitems, file):
         sys.exit()
     
     return num.array(val_arr)
+
+def _fast_food_marker(file, endian='<'):
+    """
+    Reads a single Fortran record marker (4-byte integer) from `file`.
+
+    Parameters
+    ----------
+    file: file object
+        binary file, positioned at the start of a record marker
+
+    endian: string, optional (default = '<')
+        byte order of the file. Options: '<' (little), '>' (big), '=' (native)
+
+    Returns
+    -------
+    nbyte_val: int or NoneType
+        number of bytes in the record. `None` if the marker could not be read
+    """
+    nbyte_read = file.read(4)
+    if len(nbyte_read) != 4:
+        return None
+    nbyte_val = int(num.frombuffer(nbyte_read, dtype=endian+'i4')[0])
+
+    return nbyte_val
+
+def fast_food_array_reader(key, nitems, file, endian='<'):
+    """
+    Extracts the data from a binary `FastFood' (.ff) `file` directly into a 
+    numpy array, without unpacking the record into Python objects.
+
+    key: string
+        type of the element(s) to extract
+        Possible values: 'int', 'float', 'double', and 'long'.
+
+    nitems: int
+        number of items of type `key' to extract.
+
+    file: file object
+        binary file, from which to extract the information
+
+    endian: string, optional (default = '<')
+        byte order of the file. Options: '<' (little), '>' (big), '=' (native)
+
+    Returns
+    -------
+    val_arr: array_like
+        numpy.array of len(`nitems'). Integers are returned as `int64` and 
+        floats as `float64`, as done by `fast_food_reader`.
+    """
+    ## Numpy types for each `key`
+    Type_dtype = { 'int':'i4', 'float':'f4', 'double':'f8', 'long':'i8'}
+    ## Output types for each `key` - Same as `fast_food_reader`
+    Out_dtype  = { 'int':num.int64, 'float':num.float64,
+                   'double':num.float64, 'long':num.int64}
+    if key not in Type_dtype:
+        msg = 'Read Error: `key` ({0}) not supported! Options: {1}'.format(
+            key, sorted(Type_dtype.keys()))
+        raise ValueError(msg)
+    val_dtype = num.dtype(endian + Type_dtype[key])
+    # Top padding
+    nbyte1_val = _fast_food_marker(file, endian=endian)
+    if nbyte1_val is None:
+        errno = -10
+        raise ValueError ('Read error: file empty?. \nError: '+str(errno))
+    # Checking that nbye1_val = nitems*itemsize
+    if nbyte1_val != nitems*val_dtype.itemsize:
+        errno = -2
+        Err_msg = 'Read Warning. Byte numbers do not match \n '
+        Err_msg += 'nbyte1 = {0}, nitems = {1}\n'.format(nbyte1_val, nitems)
+        raise ValueError(Err_msg + 'Errno: {0}'.format(errno))
+    # Extracting data - Directly from the buffer
+    val_arr = num.frombuffer(file.read(nbyte1_val), dtype=val_dtype)
+    val_len = len(val_arr)
+    if val_len != nitems:
+        errno = -20
+        raise ValueError('Read Error: {0} items expected. Read {1}'.format(
+            nitems, val_len))
+    # Bottom padding
+    nbyte2_val = _fast_food_marker(file, endian=endian)
+    if nbyte2_val is None:
+        errno = -30
+        raise ValueError('Read Error: File too short?\n Errno: '+str(errno))
+    # Checking top and bottom
+    if nbyte1_val != nbyte2_val:
+        errno = -1
+        Err_msg = 'Read Warning. Byte numbers do not match \n '
+        Err_msg += 'nbyte1 = {0}, nbyte2 = {1}\n'.format(nbyte1_val,
+            nbyte2_val)
+        raise ValueError(Err_msg + 'Errno: {0}'.format(errno))
+
+    return val_arr.astype(Out_dtype[key])
+
+class HalobiasFile(object):
+    """
+    Lazily-loaded view of a binary `Halobias' FastFood (.ff) file.
+
+    The header of the file (`idat`, `fdat`, `znow`) is read once, and the 
+    byte offset of every column block is recorded. Each column is 
+    exposed as a read-only `numpy.memmap`, which is only created the first 
+    time the column is accessed, e.g. `hb_obj.x` or `hb_obj['halom']`.
+
+    Parameters
+    ----------
+    filename: string
+        path to the Halobias file
+
+    endian: string, optional (default = '<')
+        byte order of the file. Options: '<' (little), '>' (big), '=' (native)
+    """
+    ## Columns of the Halobias file, in the order they are stored
+    hb_cols = ['x','y','z','vx','vy','vz','halom','cs_flag','haloid']
+    ## Allowed types for each column, given its item size in bytes
+    hb_types = {'x'      :{4:'f4'},
+                'y'      :{4:'f4'},
+                'z'      :{4:'f4'},
+                'vx'     :{4:'f4'},
+                'vy'     :{4:'f4'},
+                'vz'     :{4:'f4'},
+                'halom'  :{4:'f4', 8:'f8'},
+                'cs_flag':{4:'i4'},
+                'haloid' :{4:'i4', 8:'i8'}}
+
+    def __init__(self, filename, endian='<'):
+        fd.File_Exists(filename)
+        self.filename = os.path.abspath(filename)
+        self.endian   = endian
+        self._offsets = {}
+        self._dtypes  = {}
+        self._cols    = {}
+        self._header_scan()
+
+    def _header_scan(self):
+        """
+        Reads the header of the file, and determines the byte offset and 
+        the type of each column block.
+        """
+        with open(self.filename, 'rb') as hb:
+            self.idat = fast_food_array_reader('int'  , 5, hb, self.endian)
+            self.fdat = fast_food_array_reader('float', 9, hb, self.endian)
+            self.znow = fast_food_array_reader('float', 1, hb, self.endian)[0]
+            self.ngal = int(self.idat[1])
+            self.lbox = int(self.fdat[0])
+            ## Looping over column blocks
+            for col in self.hb_cols:
+                nbyte1_val = _fast_food_marker(hb, endian=self.endian)
+                if nbyte1_val is None:
+                    errno = -10
+                    msg = 'Read error: column `{0}` missing. \nError: {1}'
+                    raise ValueError(msg.format(col, errno))
+                ## Item size of the column
+                itemsize = nbyte1_val // max(self.ngal, 1)
+                if ((itemsize * self.ngal != nbyte1_val) or
+                    (itemsize not in self.hb_types[col])):
+                    errno = -2
+                    Err_msg = 'Read Warning. Byte numbers do not match \n '
+                    Err_msg += 'column = {0}, nbyte1 = {1}, ngal = {2}\n'
+                    Err_msg  = Err_msg.format(col, nbyte1_val, self.ngal)
+                    raise ValueError(Err_msg + 'Errno: {0}'.format(errno))
+                self._offsets[col] = hb.tell()
+                self._dtypes [col] = num.dtype(self.endian +
+                                        self.hb_types[col][itemsize])
+                ## Skipping the data block
+                hb.seek(nbyte1_val, os.SEEK_CUR)
+                nbyte2_val = _fast_food_marker(hb, endian=self.endian)
+                if nbyte1_val != nbyte2_val:
+                    errno = -1
+                    Err_msg = 'Read Warning. Byte numbers do not match \n '
+                    Err_msg += 'nbyte1 = {0}, nbyte2 = {1}\n'.format(
+                        nbyte1_val, nbyte2_val)
+                    raise ValueError(Err_msg + 'Errno: {0}'.format(errno))
+
+    def column(self, col):
+        """
+        Returns the memory-mapped array of column `col`
+
+        Parameters
+        ----------
+        col: string
+            name of the column. Options: see `HalobiasFile.hb_cols`
+
+        Returns
+        -------
+        col_arr: numpy.memmap
+            read-only array of length `ngal`
+        """
+        if col not in self.hb_cols:
+            msg = '`{0}` is not a Halobias column! Options: {1}'.format(
+                col, self.hb_cols)
+            raise KeyError(msg)
+        if col not in self._cols:
+            self._cols[col] = num.memmap(self.filename,
+                                        dtype=self._dtypes[col],
+                                        mode='r',
+                                        offset=self._offsets[col],
+                                        shape=(self.ngal,))
+
+        return self._cols[col]
+
+    def __getitem__(self, col):
+        return self.column(col)
+
+    def __getattr__(self, col):
+        ## Only called when `col` is not a normal attribute
+        if col in type(self).hb_cols:
+            return self.column(col)
+        raise AttributeError(col)
+
+    def __len__(self):
+        return self.ngal
+
+    def __getstate__(self):
+        ## Memory maps are not carried over, they are re-opened on access
+        state          = self.__dict__.copy()
+        state['_cols'] = {}
+
+        return state
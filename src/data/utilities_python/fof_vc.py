@@ -0,0 +1,148 @@
+#! /usr/bin/env python
+
+# Victor Calderon
+# October 18, 2026
+# Vanderbilt University
+
+"""
+Anisotropic friends-of-friends (FoF) group finder for galaxy redshift
+catalogues
+"""
+from __future__ import division, absolute_import, print_function
+
+__author__     =['Victor Calderon']
+__copyright__  =["Copyright 2017 Victor Calderon, fof_vc"]
+__email__      =['victor.calderon@vanderbilt.edu']
+__maintainer__ =['Victor Calderon']
+__all__        =["fof_groups"]
+
+import numpy as num
+from scipy.spatial import cKDTree
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+
+def fof_groups(ra_arr, dec_arr, cz_arr, dist_arr, volume, l_perp, l_para,
+    nmin=1, speed_c=3.e5):
+    """
+    Finds galaxy groups with an anisotropic friends-of-friends algorithm.
+
+    Two galaxies `i` and `j` are linked if their projected separation,
+    `(D_i + D_j) * sin(theta_ij / 2)`, is smaller than `l_perp * s` and
+    their line-of-sight separation, `|D_i - D_j|`, is smaller than
+    `l_para * s`, where `D` is the comoving distance of the galaxies,
+    `theta_ij` their angular separation, and `s = (volume / N)^(1/3)` the
+    mean intergalactic separation.
+
+    Parameters
+    ----------
+    ra_arr, dec_arr: array_like, shape (N,)
+        right ascension and declination of the galaxies. Units: degrees
+
+    cz_arr: array_like, shape (N,)
+        velocities of the galaxies. Units: km/s
+
+    dist_arr: array_like, shape (N,)
+        comoving distances of the galaxies, computed from `cz_arr`.
+        Units: Mpc/h
+
+    volume: float
+        volume of the survey. Units: (Mpc/h)^3
+
+    l_perp, l_para: float
+        perpendicular and parallel linking lengths, in units of the mean
+        intergalactic separation
+
+    nmin: int, optional (default = 1)
+        minimum number of galaxies in a group. Galaxies in smaller groups
+        get a `groupid` of -1.
+
+    speed_c: float, optional (default = 3.e5)
+        speed of light. Units: km/s
+
+    Returns
+    -------
+    groupid_arr: numpy.ndarray, shape (N,)
+        group ID of each galaxy. Groups are numbered from 0, in the order
+        of their first member.
+
+    group_dict: python dictionary
+        dictionary with the properties of each group:
+            - 'groupid': group ID
+            - 'cen_ra', 'cen_dec': position of the group centre. Units: degrees
+            - 'ngals': number of member galaxies
+            - 'sigma_v': rest-frame velocity dispersion. Units: km/s
+            - 'rproj': rms projected distance of the members to the
+               group centre. Units: Mpc/h
+            - 'cen_cz': mean velocity of the members. Units: km/s
+    """
+    ra_arr   = num.radians(num.asarray(ra_arr , dtype=float))
+    dec_arr  = num.radians(num.asarray(dec_arr, dtype=float))
+    cz_arr   = num.asarray(cz_arr  , dtype=float)
+    dist_arr = num.asarray(dist_arr, dtype=float)
+    ngal     = len(cz_arr)
+    ## Unit vectors and Cartesian positions
+    unit_arr = num.column_stack([   num.cos(dec_arr) * num.cos(ra_arr),
+                                    num.cos(dec_arr) * num.sin(ra_arr),
+                                    num.sin(dec_arr)])
+    cart_arr = unit_arr * dist_arr[:, None]
+    ## Linking lengths
+    if ngal > 0:
+        sep_mean = (float(volume) / ngal)**(1./3)
+    else:
+        sep_mean = 0.
+    b_perp   = l_perp * sep_mean
+    b_para   = l_para * sep_mean
+    ## Candidate pairs - Any linked pair is closer than this radius in 3D
+    tree     = cKDTree(cart_arr)
+    pair_arr = tree.query_pairs(num.sqrt(b_perp**2 + b_para**2),
+                                output_type='ndarray')
+    ii, jj   = pair_arr[:,0], pair_arr[:,1]
+    ## Exact linking criteria
+    cos_th   = num.clip(num.sum(unit_arr[ii] * unit_arr[jj], axis=1), -1., 1.)
+    d_perp   = (dist_arr[ii] + dist_arr[jj]) * num.sqrt(0.5 * (1. - cos_th))
+    d_para   = num.abs(dist_arr[ii] - dist_arr[jj])
+    link_bool = (d_perp <= b_perp) & (d_para <= b_para)
+    ii, jj   = ii[link_bool], jj[link_bool]
+    ## Groups - Connected components of the graph of links
+    link_mat = coo_matrix(  (num.ones(ii.size, dtype=bool), (ii, jj)),
+                            shape=(ngal, ngal))
+    ngroups, groupid_arr = connected_components(link_mat, directed=False)
+    ## Group properties
+    ngals_arr = num.bincount(groupid_arr, minlength=ngroups)
+    cen_cz    = num.bincount(groupid_arr, weights=cz_arr,
+                    minlength=ngroups) / ngals_arr
+    cen_unit  = num.column_stack([num.bincount(groupid_arr,
+                                    weights=unit_arr[:,kk], minlength=ngroups)
+                                    for kk in range(3)]).astype(float)
+    cen_unit /= num.sqrt(num.sum(cen_unit**2, axis=1))[:, None]
+    cen_ra    = num.degrees(num.arctan2(cen_unit[:,1], cen_unit[:,0])) % 360.
+    cen_dec   = num.degrees(num.arcsin(num.clip(cen_unit[:,2], -1., 1.)))
+    # Velocity dispersion
+    dcz_sq    = num.bincount(groupid_arr,
+                    weights=(cz_arr - cen_cz[groupid_arr])**2,
+                    minlength=ngroups)
+    sigma_v   = (num.sqrt(dcz_sq / num.maximum(ngals_arr - 1, 1)) /
+                    (1. + cen_cz / speed_c))
+    # Projected radius
+    cen_dist  = num.bincount(groupid_arr, weights=dist_arr,
+                    minlength=ngroups) / ngals_arr
+    cos_cen   = num.clip(num.sum(unit_arr * cen_unit[groupid_arr], axis=1),
+                    -1., 1.)
+    rproj_sq  = num.bincount(groupid_arr,
+                    weights=(cen_dist[groupid_arr] * num.arccos(cos_cen))**2,
+                    minlength=ngroups)
+    rproj     = num.sqrt(rproj_sq / ngals_arr)
+    ## Minimum number of galaxies
+    group_bool  = ngals_arr >= nmin
+    new_id      = num.full(ngroups, -1, dtype=int)
+    new_id[group_bool] = num.arange(num.sum(group_bool))
+    groupid_arr = new_id[groupid_arr]
+    group_dict  = { 'groupid': num.arange(num.sum(group_bool)),
+                    'cen_ra' : cen_ra   [group_bool],
+                    'cen_dec': cen_dec  [group_bool],
+                    'ngals'  : ngals_arr[group_bool],
+                    'sigma_v': sigma_v  [group_bool],
+                    'rproj'  : rproj    [group_bool],
+                    'cen_cz' : cen_cz   [group_bool]}
+
+    return groupid_arr, group_dict
@@ -15,7 +15,8 @@ __email__      =['victor.calderon@vanderbilt.edu']
 __maintainer__ =['Victor Calderon']
 __all__        =["read_pandas_hdf5","read_hdf5_file_to_pandas_DF",\
 				 "pandas_file_to_hdf5_file","hdf5_file_to_pandas_file",\
-				 "pandas_df_to_hdf5_file","concadenate_pd_df"]
+				 "pandas_df_to_hdf5_file","concadenate_pd_df",\
+				 "outfmt_extension","pandas_df_to_file","read_pandas_file"]
 
 import numpy as num
 import pandas as pd
@@ -23,7 +24,84 @@ import h5py
 from . import file_dir_check as fd
 import os
 
-def read_pandas_hdf5(hdf5_file, key=None, ret=False):
+## Comparison operators allowed in `where` predicates
+_where_ops_dict = { '==':num.equal, '!=':num.not_equal,
+					'<' :num.less , '<=':num.less_equal,
+					'>' :num.greater, '>=':num.greater_equal}
+
+def _where_check(where):
+	"""
+	Checks a `where` predicate, i.e. a list of `(column, operator, value)`
+	tuples that are combined with a logical AND, and returns it as a list.
+	"""
+	if where is None:
+		return []
+	where = [tuple(where_ii) for where_ii in where]
+	for where_ii in where:
+		if (len(where_ii) != 3) or (where_ii[1] not in _where_ops_dict):
+			msg = '{0} Invalid `where` predicate `{1}`. Operators: {2}'.format(
+				fd.Program_Msg(__file__), where_ii,
+				sorted(_where_ops_dict.keys()))
+			raise ValueError(msg)
+
+	return where
+
+def _where_to_pytables(where):
+	"""
+	Converts a `where` predicate into a PyTables query string
+	"""
+	## Numpy scalars are converted to python scalars, so that their 
+	## representation can be parsed by PyTables
+	where_str = ' & '.join(['({0} {1} {2!r})'.format(col, op,
+					val.item() if hasattr(val, 'item') else val)
+					for (col, op, val) in _where_check(where)])
+	if where_str == '':
+		where_str = None
+
+	return where_str
+
+def _where_mask(col_func, nrows, where):
+	"""
+	Evaluates a `where` predicate in memory.
+	`col_func(col)` returns the array of column `col`.
+	"""
+	mask = num.ones(nrows, dtype=bool)
+	for (col, op, val) in _where_check(where):
+		mask &= _where_ops_dict[op](col_func(col), val)
+
+	return mask
+
+def _read_hdf5_select(hdf5_file, key=None, columns=None, where=None):
+	"""
+	Reads the columns `columns` and the rows that satisfy `where` from a 
+	`pandas` HDF5 file.
+	Files in `table` format, written with data columns, are queried by 
+	PyTables, so that only the selected data is read. Files in `fixed`
+	format are read in full and filtered in memory.
+	"""
+	with pd.HDFStore(hdf5_file, mode='r') as hdf5_obj:
+		if key is None:
+			hdf5_keys = hdf5_obj.keys()
+			if len(hdf5_keys) != 1:
+				msg = '{0} `{1}` has {2} keys. Please specify one'.format(
+					fd.Program_Msg(__file__), hdf5_file, len(hdf5_keys))
+				raise ValueError(msg)
+			key = hdf5_keys[0]
+		if hdf5_obj.get_storer(key).is_table:
+			pd_dataframe = hdf5_obj.select(key, columns=columns,
+								where=_where_to_pytables(where))
+		else:
+			pd_dataframe = hdf5_obj.select(key)
+			if where is not None:
+				mask = _where_mask(lambda col: pd_dataframe[col].values,
+							len(pd_dataframe), where)
+				pd_dataframe = pd_dataframe.loc[mask]
+			if columns is not None:
+				pd_dataframe = pd_dataframe[list(columns)]
+
+	return pd_dataframe
+
+def read_pandas_hdf5(hdf5_file, key=None, ret=False, columns=None, where=None):
 	"""
 	Reads a `.hdf5` file that contains one or many datasets, and converts into 
 	a pandas DataFrame. It assumes that the file is a PyTable
@@ -39,6 +117,15 @@ def read_pandas_hdf5(hdf5_file, key=None, ret=False):
 	ret: boolean, (default=False)
 		Option to return key of the file. 
 
+	columns: list, optional (default = None)
+		names of the columns to read. If None, all the columns are read.
+
+	where: list, optional (default = None)
+		list of `(column, operator, value)` tuples, combined with a 
+		logical AND, that the rows must satisfy, e.g. `[('M_r', '<', -19)]`.
+		Operators: '==', '!=', '<', '<=', '>', '>='.
+		If None, all the rows are read.
+
 	Returns
 	-------
 	pd_dataframe: pandas DataFrame object
@@ -52,7 +139,8 @@ def read_pandas_hdf5(hdf5_file, key=None, ret=False):
 	hdf5_file_obj.close()
 	if key==None:
 		try:
-			pd_dataframe = pd.read_hdf(hdf5_file)
+			pd_dataframe = _read_hdf5_select(hdf5_file, columns=columns,
+								where=where)
 			if ret:	return pd_dataframe, hdf5_file_keys[0]
 			else: return pd_dataframe
 		except:
@@ -67,11 +155,13 @@ def read_pandas_hdf5(hdf5_file, key=None, ret=False):
 			for key1, name in enumerate(hdf5_file_keys):
 				print('\t Key {0}:   {1}'.format(key1,name))
 		else:
-			pd_dataframe = pd.read_hdf(hdf5_file, key=key)
+			pd_dataframe = _read_hdf5_select(hdf5_file, key=key,
+								columns=columns, where=where)
 			if ret:	return pd_dataframe, key
 			else: return pd_dataframe
 
-def read_hdf5_file_to_pandas_DF(hdf5_file, key=None):
+def read_hdf5_file_to_pandas_DF(hdf5_file, key=None, columns=None,
+	where=None):
 	"""
 	Reads content of HDF5 file and converts it to Pandas DataFrame
 
@@ -84,6 +174,13 @@ def read_hdf5_file_to_pandas_DF(hdf5_file, key=None):
 		Key or path in hdf5 file for the pandas DataFrame and the normal hddf5 
 		file
 
+	columns: list, optional (default = None)
+		names of the columns to read. If None, all the columns are read.
+
+	where: list, optional (default = None)
+		list of `(column, operator, value)` tuples that the rows must 
+		satisfy. See `read_pandas_hdf5`.
+
 	Returns
 	-------
 	pd_dataframe: Pandas DataFrame
@@ -94,7 +191,8 @@ def read_hdf5_file_to_pandas_DF(hdf5_file, key=None):
 	##
 	## Reading in Pandas DataFrame
 	try:
-		pd_dataframe = pd.read_hdf(hdf5_file, key=key)
+		pd_dataframe = _read_hdf5_select(hdf5_file, key=key, columns=columns,
+							where=where)
 		return pd_dataframe
 	except:
 		msg = '{0} Could not read `{1}`! Please check if the file is correct'
@@ -246,7 +344,7 @@ def hdf5_file_to_pandas_file(hdf5_file, pandas_hdf5_file, key=None):
 	data_file.close()
 
 def pandas_df_to_hdf5_file(data, hdf5_file, key=None, mode='w',
-	complevel=8):
+	complevel=8, complib=None, format='fixed'):
 	"""
 	Saves a pandas DataFrame into a normal or a `pandas` hdf5 file.
 
@@ -266,16 +364,231 @@ def pandas_df_to_hdf5_file(data, hdf5_file, key=None, mode='w',
 
 	complevel: int, range(0-9), optional (default = 8)
 		level of compression for the HDF5 file
+
+	complib: string, optional (default = None)
+		compression library, e.g. 'zlib', 'blosc:lz4' or 'blosc:zstd'.
+		If None, it uses 'zlib'.
+
+	format: string, optional (default = 'fixed')
+		PyTables format of the DataFrame
+		- 'fixed': fast to write and read in full
+		- 'table': every column is stored as a data column, so that 
+				   `read_pandas_hdf5` only reads the selected columns and 
+				   rows
 	"""
 	##
 	## Saving DataFrame to HDF5 file
+	if format == 'table':
+		data_columns = True
+	else:
+		data_columns = None
 	try:
-		data.to_hdf(hdf5_file, key, mode=mode, complevel=complevel)
+		data.to_hdf(hdf5_file, key=key, mode=mode, complevel=complevel,
+			complib=complib, format=format, data_columns=data_columns)
 		print('{0}: HDF5 New file-> {1}'.format(fd.Program_Msg(__file__),hdf5_file))
 	except:
 		msg = '{0} Could not create HDF5 file'.format(fd.Program_Msg(__file__))
 		raise ValueError(msg)
 
+## Extension of the files written by each output format
+_outfmt_ext_dict = {'hdf5':'hdf5', 'parquet':'parquet', 'h5py':'h5'}
+
+def outfmt_extension(outfmt):
+	"""
+	File extension used for the output format `outfmt`
+
+	Parameters
+	----------
+	outfmt: string
+		output format. Options: 'hdf5', 'parquet', 'h5py'
+
+	Returns
+	-------
+	ext: string
+		file extension, without the leading dot
+	"""
+	if outfmt not in _outfmt_ext_dict:
+		msg = '{0} Output format `{1}` not supported! Options: {2}'.format(
+			fd.Program_Msg(__file__), outfmt, sorted(_outfmt_ext_dict.keys()))
+		raise ValueError(msg)
+
+	return _outfmt_ext_dict[outfmt]
+
+def _h5py_compression(complib, complevel):
+	"""
+	Keyword arguments of `h5py.Group.create_dataset` for the compression
+	library `complib`.
+	'gzip' and 'lzf' are built into h5py. 'blosc', 'lz4' and 'zstd' 
+	require the `hdf5plugin` package.
+	"""
+	if complib is None:
+		complib = 'lzf'
+	if complib == 'lzf':
+		comp_dict = {'compression':'lzf'}
+	elif complib == 'gzip':
+		comp_dict = {'compression':'gzip',
+					 'compression_opts':4 if complevel is None else complevel}
+	elif complib in ['blosc', 'lz4', 'zstd']:
+		try:
+			import hdf5plugin
+		except ImportError:
+			msg = '{0} `hdf5plugin` is needed for complib `{1}`'.format(
+				fd.Program_Msg(__file__), complib)
+			raise ValueError(msg)
+		if complib == 'blosc':
+			comp_dict = hdf5plugin.Blosc(cname='lz4',
+				clevel=5 if complevel is None else complevel)
+		elif complib == 'lz4':
+			comp_dict = hdf5plugin.LZ4()
+		else:
+			comp_dict = hdf5plugin.Zstd(clevel=3 if complevel is None else
+				complevel)
+	else:
+		msg = '{0} complib `{1}` not supported for h5py files'.format(
+			fd.Program_Msg(__file__), complib)
+		raise ValueError(msg)
+
+	return dict(comp_dict)
+
+def pandas_df_to_file(data, outfile, key=None, outfmt='hdf5', complevel=None,
+	complib=None, hdf5_format='fixed'):
+	"""
+	Saves a pandas DataFrame to a file in the output format `outfmt`
+
+	Parameters
+	----------
+	data: pandas DataFrame object
+		DataFrame with the necessary data
+
+	outfile: string
+		Path to output file
+
+	key: string
+		Location, under which to save the pandas DataFrame.
+		Not used by 'parquet' files, which hold a single table.
+
+	outfmt: string, optional (default = 'hdf5')
+		output format
+		- 'hdf5'   : pandas (PyTables) HDF5 file, in `fixed` format
+		- 'parquet': Apache Parquet file
+		- 'h5py'   : HDF5 file with one compressed dataset per column
+					 under `key`
+
+	complevel: int, optional (default = None)
+		level of compression. If None, each format uses its own default,
+		i.e. 8 for 'hdf5', and the default level of the codec otherwise.
+
+	complib: string, optional (default = None)
+		compression library. If None, each format uses its own default:
+		'zlib' for 'hdf5', 'zstd' for 'parquet', and 'lzf' for 'h5py'.
+
+	hdf5_format: string, optional (default = 'fixed')
+		PyTables format of 'hdf5' files. Options: 'fixed', 'table'.
+		See `pandas_df_to_hdf5_file`.
+	"""
+	if outfmt == 'hdf5':
+		if complevel is None:
+			complevel = 8
+		pandas_df_to_hdf5_file(data, outfile, key=key, complevel=complevel,
+			complib=complib, format=hdf5_format)
+	elif outfmt == 'parquet':
+		if complib is None:
+			complib = 'zstd'
+		try:
+			data.to_parquet(outfile, engine='pyarrow', compression=complib,
+				compression_level=complevel, index=True)
+		except:
+			msg = '{0} Could not create Parquet file'.format(
+				fd.Program_Msg(__file__))
+			raise ValueError(msg)
+		print('{0}: Parquet New file-> {1}'.format(fd.Program_Msg(__file__),
+			outfile))
+	elif outfmt == 'h5py':
+		comp_dict = _h5py_compression(complib, complevel)
+		if key is None:
+			key = 'data'
+		with h5py.File(outfile, mode='w') as hdf5_obj:
+			group_obj = hdf5_obj.create_group(key)
+			group_obj.attrs['columns'] = [str(col) for col in data.columns]
+			for col in data.columns:
+				col_arr = data[col].values
+				if col_arr.dtype.kind == 'O':
+					col_arr = col_arr.astype(str).astype(h5py.string_dtype())
+				group_obj.create_dataset(str(col), data=col_arr, **comp_dict)
+			group_obj.create_dataset('_index', data=data.index.values,
+				**comp_dict)
+		print('{0}: HDF5 New file-> {1}'.format(fd.Program_Msg(__file__),
+			outfile))
+	else:
+		outfmt_extension(outfmt)
+
+def read_pandas_file(infile, key=None, columns=None, where=None):
+	"""
+	Reads a file written by `pandas_df_to_file` into a pandas DataFrame.
+	The format of the file is inferred from its extension.
+
+	The selection of columns and rows is done by the storage layer 
+	whenever possible, i.e. for 'parquet' and 'h5py' files, and for 
+	'hdf5' files in `table` format, so that unused columns are not read.
+
+	Parameters
+	----------
+	infile: string
+		Path to the file
+
+	key: string, optional (default = None)
+		Location of the DataFrame in the file. If None, the first 
+		DataFrame of the file is read.
+
+	columns: list, optional (default = None)
+		names of the columns to read. If None, all the columns are read.
+
+	where: list, optional (default = None)
+		list of `(column, operator, value)` tuples, combined with a 
+		logical AND, that the rows must satisfy, e.g. `[('M_r', '<', -19)]`.
+		Operators: '==', '!=', '<', '<=', '>', '>='.
+		If None, all the rows are read.
+
+	Returns
+	-------
+	pd_dataframe: pandas DataFrame
+		DataFrame from `infile`
+	"""
+	fd.File_Exists(infile)
+	if infile.endswith('.parquet'):
+		where = _where_check(where)
+		pd_dataframe = pd.read_parquet(infile, engine='pyarrow',
+							columns=columns,
+							filters=where if len(where) > 0 else None)
+	elif infile.endswith('.h5'):
+		with h5py.File(infile, mode='r') as hdf5_obj:
+			if key is None:
+				key = list(hdf5_obj.keys())[0]
+			group_obj = hdf5_obj[key]
+			def _h5py_col(col):
+				if h5py.check_string_dtype(group_obj[col].dtype) is not None:
+					return group_obj[col].asstr()[()]
+				else:
+					return group_obj[col][()]
+			if columns is None:
+				columns = [str(col) for col in group_obj.attrs['columns']]
+			columns   = list(columns)
+			index_arr = group_obj['_index'][()]
+			## Rows
+			if where is not None:
+				mask      = _where_mask(_h5py_col, len(index_arr), where)
+				index_arr = index_arr[mask]
+			else:
+				mask      = slice(None)
+			pd_dict = dict((col, _h5py_col(col)[mask]) for col in columns)
+			pd_dataframe = pd.DataFrame(pd_dict, columns=columns,
+				index=index_arr)
+	else:
+		pd_dataframe = read_hdf5_file_to_pandas_DF(infile, key=key,
+							columns=columns, where=where)
+
+	return pd_dataframe
+
 
 # def pandas_df_to_hdf5_file(data, hdf5_file, kind='pandas', key=None, mode='w'):
 # 	"""
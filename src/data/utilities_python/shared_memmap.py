@@ -0,0 +1,165 @@
+#! /usr/bin/env python
+
+# Victor Calderon
+# October 18, 2026
+# Vanderbilt University
+
+"""
+Set of functions for sharing read-only tables between processes through
+memory-mapped scratch files
+"""
+from __future__ import division, absolute_import, print_function
+
+__author__     =['Victor Calderon']
+__copyright__  =["Copyright 2017 Victor Calderon, shared_memmap"]
+__email__      =['victor.calderon@vanderbilt.edu']
+__maintainer__ =['Victor Calderon']
+__all__        =["MemmapTable", "memmap_table_write"]
+
+import os
+import numpy as num
+import pandas as pd
+
+class MemmapTable(object):
+    """
+    Read-only table whose numerical columns are backed by `.npy` files.
+
+    Each numerical column is exposed as a read-only `numpy.memmap`, which
+    is only opened the first time the column is accessed, e.g.
+    `table['x']`. Non-numerical columns are kept in memory.
+    Only the paths of the files are pickled, so the table can be sent to
+    other processes at no cost, and every process shares the same pages.
+
+    Parameters
+    ----------
+    col_files: python dictionary
+        dictionary with the path to the `.npy` file of each numerical column
+
+    columns: list
+        names of all the columns, in order
+
+    index_file: string
+        path to the `.npy` file with the index of the table
+
+    obj_pd: pandas DataFrame, optional (default = None)
+        DataFrame with the non-numerical columns of the table
+    """
+    def __init__(self, col_files, columns, index_file, obj_pd=None):
+        self.col_files  = col_files
+        self.columns    = list(columns)
+        self.index_file = index_file
+        self.obj_pd     = obj_pd
+        self._cols      = {}
+
+    def column(self, col):
+        """
+        Returns the array of column `col`
+
+        Parameters
+        ----------
+        col: string
+            name of the column
+
+        Returns
+        -------
+        col_arr: numpy.memmap or numpy.ndarray
+            read-only array with the values of `col`
+        """
+        if col in self.col_files:
+            if col not in self._cols:
+                self._cols[col] = num.load(self.col_files[col], mmap_mode='r')
+            col_arr = self._cols[col]
+        elif (self.obj_pd is not None) and (col in self.obj_pd.columns):
+            col_arr = self.obj_pd[col].values
+        else:
+            raise KeyError(col)
+
+        return col_arr
+
+    @property
+    def index(self):
+        return num.load(self.index_file, mmap_mode='r')
+
+    def to_pandas(self, rows=None):
+        """
+        Materializes (a subset of) the table as a pandas DataFrame
+
+        Parameters
+        ----------
+        rows: array_like, optional (default = None)
+            boolean mask or indices of the rows to be selected.
+            If None, all the rows are selected.
+
+        Returns
+        -------
+        data_pd: pandas DataFrame
+            DataFrame with a copy of the selected rows
+        """
+        if rows is None:
+            rows = slice(None)
+        data_dict = {}
+        for col in self.columns:
+            data_dict[col] = num.array(self.column(col)[rows])
+        data_pd = pd.DataFrame(data_dict, columns=self.columns,
+                    index=num.array(self.index[rows]))
+
+        return data_pd
+
+    def __getitem__(self, col):
+        return self.column(col)
+
+    def __contains__(self, col):
+        return col in self.columns
+
+    def __len__(self):
+        return len(self.index)
+
+    def __getstate__(self):
+        ## Memory maps are not carried over, they are re-opened on access
+        state          = self.__dict__.copy()
+        state['_cols'] = {}
+
+        return state
+
+def memmap_table_write(data_pd, directory, prefix='table'):
+    """
+    Writes the columns of a DataFrame to `.npy` files, and returns the
+    table that reads them back as memory maps.
+
+    Parameters
+    ----------
+    data_pd: pandas DataFrame
+        DataFrame to be shared
+
+    directory: string
+        path to the directory where the files are written
+
+    prefix: string, optional (default = 'table')
+        prefix of the filenames
+
+    Returns
+    -------
+    table_obj: `MemmapTable` object
+        read-only table with the contents of `data_pd`
+    """
+    col_files = {}
+    obj_cols  = []
+    for ii, col in enumerate(data_pd.columns):
+        col_arr = data_pd[col].values
+        if col_arr.dtype.kind in 'biuf':
+            col_files[col] = os.path.join(directory,
+                                '{0}_{1}.npy'.format(prefix, ii))
+            num.save(col_files[col], num.ascontiguousarray(col_arr))
+        else:
+            obj_cols.append(col)
+    ## Index
+    index_file = os.path.join(directory, '{0}_index.npy'.format(prefix))
+    num.save(index_file, num.asarray(data_pd.index.values))
+    ## Non-numerical columns
+    if len(obj_cols) > 0:
+        obj_pd = data_pd[obj_cols].copy()
+    else:
+        obj_pd = None
+    table_obj = MemmapTable(col_files, data_pd.columns, index_file, obj_pd)
+
+    return table_obj
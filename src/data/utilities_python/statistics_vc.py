@@ -14,7 +14,8 @@ __maintainer__ =['Victor Calderon']
 __all__        =["myceil","myfloor","Bootstrap_Estimator","Bins_array_create",\
                  "Mean_Std_calculations_One_array",\
                  "Mean_Std_calculations_Two_array",\
-                 "Sigma_Calcs"]
+                 "Sigma_Calcs", "group_multiplicity", "group_argmax",\
+                 "cumulative_lum_function", "cumulative_lum_function_stack"]
 
 import math
 import numpy as num
@@ -627,3 +628,177 @@ def Sigma_Calcs(data_arr, type_sigma='perc',
     perc_arr_lims = num.array(perc_arr_lims)
 
     return perc_arr_lims
+
+def group_multiplicity(ids_arr, return_groups=False):
+    """
+    Computes the number of elements that share the same ID, e.g. the 
+    number of galaxies in each DM halo, for every element of `ids_arr`.
+
+    Parameters
+    ----------
+    ids_arr: array_like, shape (N,)
+        array of group IDs, e.g. halo IDs of each galaxy
+
+    return_groups: boolean, optional (default = False)
+        option for also returning the unique IDs, the index of each 
+        element into the unique IDs, and the number of elements per ID.
+
+    Returns
+    -------
+    ngroup_arr: numpy.ndarray, shape (N,)
+        number of elements with the same ID as the i-th element
+
+    ids_unq: numpy.ndarray, shape (M,)
+        sorted unique IDs. Only returned if `return_groups == True`
+
+    ids_inv: numpy.ndarray, shape (N,)
+        index of each element into `ids_unq`, i.e. 
+        `ids_unq[ids_inv] == ids_arr`. Only returned if `return_groups == True`
+
+    ids_counts: numpy.ndarray, shape (M,)
+        number of elements for each ID in `ids_unq`. 
+        Only returned if `return_groups == True`
+    """
+    ids_arr = num.asarray(ids_arr)
+    assert(ids_arr.ndim==1)
+    (   ids_unq   ,
+        ids_inv   ,
+        ids_counts) = num.unique(ids_arr, return_inverse=True,
+                                return_counts=True)
+    ids_inv    = ids_inv.reshape(ids_arr.shape)
+    ngroup_arr = ids_counts[ids_inv]
+    if return_groups:
+        return ngroup_arr, ids_unq, ids_inv, ids_counts
+    else:
+        return ngroup_arr
+
+def group_argmax(ids_arr, vals_arr, ngroups=None, rng=None):
+    """
+    Finds the element with the largest value of `vals_arr` in each group,
+    e.g. the brightest galaxy of each galaxy group.
+    Ties within a group are broken at random.
+
+    Parameters
+    ----------
+    ids_arr: array_like, shape (N,)
+        array of non-negative integer group IDs. Negative IDs are ignored.
+
+    vals_arr: array_like, shape (N,)
+        values to be compared within each group
+
+    ngroups: int, optional (default = None)
+        number of groups, i.e. the output has one element per ID in 
+        `range(ngroups)`. If None, it is `max(ids_arr) + 1`.
+
+    rng: `numpy.random.RandomState` object, optional (default = None)
+        random number generator used for breaking ties.
+        If None, `numpy.random` is used.
+
+    Returns
+    -------
+    idx_arr: numpy.ndarray, shape (ngroups,)
+        index into `ids_arr` of the selected element of each group. 
+        Groups without elements get a value of -1.
+    """
+    ids_arr  = num.asarray(ids_arr).astype(int)
+    vals_arr = num.asarray(vals_arr, dtype=float)
+    assert(ids_arr.shape == vals_arr.shape)
+    if ngroups is None:
+        ngroups = int(ids_arr.max()) + 1 if ids_arr.size > 0 else 0
+    if rng is None:
+        rng = num.random
+    ## Sorting by group, then by decreasing value, then at random
+    rand_arr = rng.random_sample(ids_arr.size)
+    sort_idx = num.lexsort((rand_arr, -vals_arr, ids_arr))
+    ids_sort = ids_arr[sort_idx]
+    ## First element of each group
+    first_bool = num.ones(ids_sort.size, dtype=bool)
+    first_bool[1:] = ids_sort[1:] != ids_sort[:-1]
+    first_bool &= (ids_sort >= 0) & (ids_sort < ngroups)
+    idx_arr = num.full(ngroups, -1, dtype=int)
+    idx_arr[ids_sort[first_bool]] = sort_idx[first_bool]
+
+    return idx_arr
+
+def cumulative_lum_function(mag_arr, bins_arr, volume=1., offset=0):
+    """
+    Computes the cumulative luminosity function, i.e. the number density 
+    of galaxies brighter than each magnitude of `bins_arr`.
+
+    Parameters
+    ----------
+    mag_arr: array_like, shape (N,)
+        absolute magnitudes of the galaxies. NaN values are ignored.
+
+    bins_arr: array_like, shape (M,)
+        magnitudes at which the luminosity function is evaluated
+
+    volume: float, optional (default = 1.)
+        volume of the sample. Units: (Mpc/h)^3
+
+    offset: int, optional (default = 0)
+        number added to the counts of every bin, e.g. `1` to avoid empty 
+        bins when plotting in log-scale.
+
+    Returns
+    -------
+    n_lum: numpy.ndarray, shape (M,)
+        number density of galaxies with magnitude < `bins_arr`, i.e.
+        `(N(< bins_arr) + offset) / volume`
+    """
+    mag_arr  = num.asarray(mag_arr, dtype=float)
+    assert(mag_arr.ndim==1)
+    mag_sort = num.sort(mag_arr[~num.isnan(mag_arr)])
+    n_counts = num.searchsorted(mag_sort, bins_arr, side='left') + offset
+    n_lum    = n_counts / float(volume)
+
+    return n_lum
+
+def cumulative_lum_function_stack(mag_arr_list, bins_arr, volume=1., 
+    offset=0):
+    """
+    Computes the cumulative luminosity functions of a set of samples, 
+    e.g. a set of mock catalogues, and their mean and scatter.
+
+    Parameters
+    ----------
+    mag_arr_list: list of array_like
+        list with the absolute magnitudes of the galaxies of each sample
+
+    bins_arr: array_like, shape (M,)
+        magnitudes at which the luminosity functions are evaluated
+
+    volume: float, optional (default = 1.)
+        volume of each sample. Units: (Mpc/h)^3
+
+    offset: int, optional (default = 0)
+        number added to the counts of every bin.
+        See `cumulative_lum_function`.
+
+    Returns
+    -------
+    n_lum_arr: numpy.ndarray, shape (K, M)
+        cumulative luminosity function of each of the `K` samples
+
+    n_lum_mean: numpy.ndarray, shape (M,)
+        mean of the luminosity functions
+
+    n_lum_std: numpy.ndarray, shape (M,)
+        standard deviation of the luminosity functions, with `K - 1` 
+        degrees of freedom. It is zero for a single sample.
+    """
+    bins_arr  = num.asarray(bins_arr, dtype=float)
+    n_lum_arr = num.zeros((len(mag_arr_list), bins_arr.size))
+    for kk, mag_arr_kk in enumerate(mag_arr_list):
+        n_lum_arr[kk] = cumulative_lum_function(mag_arr_kk, bins_arr,
+                            volume=volume, offset=offset)
+    if len(mag_arr_list) > 0:
+        n_lum_mean = n_lum_arr.mean(axis=0)
+    else:
+        n_lum_mean = num.full(bins_arr.size, num.nan)
+    if len(mag_arr_list) > 1:
+        n_lum_std = n_lum_arr.std(axis=0, ddof=1)
+    else:
+        n_lum_std = num.zeros(bins_arr.size)
+
+    return n_lum_arr, n_lum_mean, n_lum_std
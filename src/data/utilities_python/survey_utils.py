@@ -12,9 +12,10 @@ __author__     =['Victor Calderon']
 __copyright__  =["Copyright 2017 Victor Calderon, eco_utils"]
 __email__      =['victor.calderon@vanderbilt.edu']
 __maintainer__ =['Victor Calderon']
-__all__        =["closest_val", "survey_vol", "cos_rule",
+__all__        =["closest_val", "closest_val_arr", "survey_vol", "cos_rule",
                     "distance_diff_catl", "geometry_calc", 
-                    "mock_cart_to_spherical_coords"]
+                    "mock_cart_to_spherical_coords",
+                    "mock_cart_to_spherical_coords_arr"]
 
 ## Importing modules
 import numpy as num
@@ -50,6 +51,76 @@ def closest_val(val, arr):
     except:
         raise ValueError('>> Not matches found!')
 
+def closest_val_arr(val_arr, arr, return_ties=False):
+    """
+    Finds the closest value in `arr` to each element of `val_arr`.
+    Batched version of `closest_val`: `arr` is sorted once and the
+    nearest neighbours are found with `numpy.searchsorted`.
+
+    Parameters
+    -------------
+    val_arr: array_like, shape (N,)
+        values to be looked at
+
+    arr: numpy.ndarray, shape (M,)
+        numpy array used for finding closest values to `val_arr`
+
+    return_ties: boolean, optional (default = False)
+        if True, the random tie-breaking is not performed, and the
+        candidates of each element of `val_arr` are returned instead
+
+    Returns
+    -------------
+    idx_choice: numpy.ndarray, shape (N,)
+        indices of the `best matched` elements in `arr`.
+        Returned when `return_ties == False`.
+        When several elements of `arr` share the matched value, one of
+        them is drawn at random with `numpy.random.randint`, in the order
+        of `val_arr`, following `closest_val`.
+
+    sort_idx, tie_start, tie_count: numpy.ndarray
+        Returned when `return_ties == True`.
+        The `k`-th candidate of element `ii` of `val_arr` is
+        `sort_idx[tie_start[ii] + k]`, with `0 <= k < tie_count[ii]`.
+    """
+    val_arr  = num.asarray(val_arr, dtype=float)
+    arr      = num.asarray(arr)
+    if (arr.size == 0) and (val_arr.size > 0):
+        raise ValueError('>> Not matches found!')
+    ## Sorting `arr` once. A stable sort keeps the duplicates in the
+    ## order of `arr`, like `numpy.where`
+    sort_idx = num.argsort(arr, kind='mergesort')
+    (   arr_unq  ,
+        unq_start,
+        unq_count) = num.unique(arr[sort_idx], return_index=True,
+                                return_counts=True)
+    ## Lowest index in `arr` of each unique value
+    unq_first = sort_idx[unq_start]
+    ## Candidates on each side of `val_arr`
+    right_idx = num.searchsorted(arr_unq, val_arr)
+    left_idx  = num.clip(right_idx - 1, 0, max(arr_unq.size - 1, 0))
+    right_idx = num.clip(right_idx    , 0, max(arr_unq.size - 1, 0))
+    left_dist = num.abs(arr_unq[left_idx ] - val_arr)
+    right_dist= num.abs(arr_unq[right_idx] - val_arr)
+    ## Choosing the closest one. Equidistant values are resolved like
+    ## `argmin`, i.e. by their first appearance in `arr`
+    right_bool = ( (right_dist < left_dist) |
+                  ((right_dist == left_dist) &
+                   (unq_first[right_idx] < unq_first[left_idx])))
+    unq_idx   = num.where(right_bool, right_idx, left_idx)
+    tie_start = unq_start[unq_idx]
+    tie_count = unq_count[unq_idx]
+    if return_ties:
+        return sort_idx, tie_start, tie_count
+    ## Random tie-breaking
+    tie_offset = num.zeros(val_arr.size, dtype=int)
+    tie_bool   = tie_count > 1
+    if tie_bool.any():
+        tie_offset[tie_bool] = num.random.randint(0, tie_count[tie_bool])
+    idx_choice = sort_idx[tie_start + tie_offset]
+
+    return idx_choice
+
 def survey_vol(ra_arr, dec_arr, rho_arr):
     """
     Computes the volume of a "sphere" with given limits for 
@@ -228,6 +299,38 @@ def mock_cart_to_spherical_coords(cart_arr, dist):
 
     return ra_val, dec_val
 
+def mock_cart_to_spherical_coords_arr(cart_arr, dist_arr):
+    """
+    Computes the right ascension and declination for a set of 
+    points in (x,y,z) position.
+    Vectorized version of `mock_cart_to_spherical_coords`.
+
+    Parameters
+    -----------
+    cart_arr: numpy.ndarray, shape (N,3)
+        array with (x,y,z) positions
+
+    dist_arr: numpy.ndarray, shape (N,)
+        distances to the points from observer's position
+
+    Returns
+    -----------
+    ra_arr: numpy.ndarray, shape (N,)
+        right ascensions of the points on the sky, in the range [0, 360)
+
+    dec_arr: numpy.ndarray, shape (N,)
+        declinations of the points on the sky
+    """
+    cart_arr = num.asarray(cart_arr, dtype=float)
+    dist_arr = num.asarray(dist_arr, dtype=float)
+    ## Declination
+    z_arr    = num.clip(cart_arr[:,2] / dist_arr, -1., 1.)
+    dec_arr  = 90. - num.degrees(num.arccos(z_arr))
+    ## Right ascension
+    ra_arr   = num.degrees(num.arctan2(cart_arr[:,1], cart_arr[:,0])) % 360.
+
+    return ra_arr, dec_arr
+
 
 
 
@@ -0,0 +1,50 @@
+"""
+Fixtures shared by the tests of the mock catalogue scripts
+"""
+import os
+import sys
+import pytest
+
+## Paths to the project and to the `mocks_create` scripts
+_root_dir  = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_mocks_dir = os.path.join(_root_dir, 'src', 'data', 'mocks_create')
+for _path in [_root_dir, _mocks_dir]:
+    if _path not in sys.path:
+        sys.path.insert(0, _path)
+
+@pytest.fixture(scope='session')
+def emc():
+    """
+    `eco_mocks_create` module, with LaTeX rendering of the figures 
+    turned off, so that the labels are drawn as plain text
+    """
+    for mod_name in ['hmf', 'git', 'bs4', 'tqdm', 'matplotlib', 'astropy']:
+        pytest.importorskip(mod_name)
+    import eco_mocks_create
+    eco_mocks_create.plt.rc('text', usetex=False, parse_math=False)
+
+    return eco_mocks_create
+
+@pytest.fixture
+def param_dict_base():
+    """
+    Minimal set of `project` variables used by the post-processing stages
+    """
+    param_dict = {  'Prog_msg'    : '>>',
+                    'verbose'     : False,
+                    'survey'      : 'ECO',
+                    'survey_name' : 'ECO',
+                    'halotype'    : 'fof',
+                    'cosmo_choice': 'LasDamas',
+                    'size_cube'   : 180.,
+                    'survey_vol'  : 1.e5,
+                    'readme_url'  : '',
+                    'remove_files': False,
+                    'outfmt'      : 'hdf5',
+                    'complevel'   : None,
+                    'complib'     : None,
+                    'hdf5_format' : 'fixed',
+                    'catl_ext'    : 'hdf5',
+                    'box_render'  : 'points'}
+
+    return param_dict
@@ -0,0 +1,92 @@
+"""
+Tests of the in-process CLF assignment engine
+"""
+import numpy as num
+import pandas as pd
+import pytest
+
+def _hb_create(nhalo=300, seed=0):
+    """
+    Halobias-like table, with one central and 0-4 satellites per halo
+    """
+    rng      = num.random.RandomState(seed)
+    halom    = 10.**rng.uniform(11.4, 14.5, nhalo)
+    nsat     = rng.randint(0, 5, nhalo)
+    haloid   = num.repeat(num.arange(nhalo), nsat + 1)
+    cs_flag  = num.concatenate([[1] + [0] * nn for nn in nsat])
+    ngal     = len(haloid)
+    hb_obj   = pd.DataFrame({   'x'      : rng.uniform(0, 100., ngal),
+                                'y'      : rng.uniform(0, 100., ngal),
+                                'z'      : rng.uniform(0, 100., ngal),
+                                'vx'     : rng.normal(0, 300., ngal),
+                                'vy'     : rng.normal(0, 300., ngal),
+                                'vz'     : rng.normal(0, 300., ngal),
+                                'halom'  : halom[haloid],
+                                'cs_flag': cs_flag,
+                                'haloid' : haloid})
+
+    return hb_obj
+
+def _param_dict_create(hb_obj, lum_file, clf_type=1):
+    param_dict = {  'Prog_msg'  : '>>',
+                    'verbose'   : False,
+                    'clf_type'  : clf_type,
+                    'cens'      : 1,
+                    'seed'      : 1,
+                    'cpu_frac'  : 0.,
+                    'size_cube' : 100.,
+                    'hb_obj'    : hb_obj,
+                    'files_dict': {'eco_lum_file_local': lum_file},
+                    'hod_dict'  : {'logMmin': 11.4, 'znow': 0},
+                    'clf_dict'  : {1: { 'logL0'  : 10.17,
+                                        'logM1'  : 11.24,
+                                        'gamma1' : 3.18 ,
+                                        'gamma2' : 0.245,
+                                        'sigma_c': 0.157,
+                                        'alpha_s': -1.18,
+                                        'ls_frac': 0.562,
+                                        'znow'   : 0    }}}
+
+    return param_dict
+
+def _lum_file_create(tmpdir):
+    """
+    Tiny luminosity function. Its first entry is fainter than the
+    brightest galaxies, and its last entry is brighter than the faintest
+    ones, so both ends of the table are exceeded.
+    """
+    mr_arr   = num.linspace(-22., -18., 5)
+    dens_arr = num.logspace(-5., -3.5, 5)
+    lum_file = tmpdir.join('eco_lum.txt')
+    lum_file.write('\n'.join(['{0} {1}'.format(mr_ii, dens_ii)
+                    for mr_ii, dens_ii in zip(mr_arr, dens_arr)]))
+
+    return str(lum_file)
+
+def test_clf_numpy_keeps_centrals(emc, tmpdir):
+    hb_obj     = _hb_create()
+    param_dict = _param_dict_create(hb_obj, _lum_file_create(tmpdir))
+    clf_pd     = emc.clf_assignment_numpy(param_dict, {})
+    ## Out-of-table galaxies on both ends
+    assert 0 < len(clf_pd) < len(hb_obj)
+    assert num.isfinite(clf_pd['M_r']).all()
+    assert clf_pd['M_r'].min() == -22.
+    ## Every halo left keeps its central, including the most massive ones
+    ncen_arr = clf_pd.groupby('haloid')['cs_flag'].sum()
+    assert (ncen_arr == 1).all()
+    halo_top = hb_obj.loc[hb_obj['halom'] == hb_obj['halom'].max(), 'haloid']
+    assert num.isin(halo_top.values, clf_pd['haloid'].values).all()
+    ## Multiplicity of the halos left
+    ngal_arr = clf_pd.groupby('haloid')['haloid'].transform('size')
+    num.testing.assert_array_equal(clf_pd['halo_ngal'].values, ngal_arr)
+    ## Galaxy IDs point back to the halobias rows
+    num.testing.assert_array_equal(
+        hb_obj['haloid'].values[clf_pd['galid'].values],
+        clf_pd['haloid'].values)
+
+def test_clf_numpy_unknown_clf_type(emc, tmpdir):
+    hb_obj     = _hb_create(nhalo=10)
+    param_dict = _param_dict_create(hb_obj, _lum_file_create(tmpdir),
+                    clf_type=2)
+    with pytest.raises(ValueError):
+        emc.clf_assignment_numpy(param_dict, {})
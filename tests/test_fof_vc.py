@@ -0,0 +1,69 @@
+"""
+Tests of the in-process friends-of-friends group finder
+"""
+import numpy as num
+
+def _catl_create():
+    """
+    Small catalogue with known links, for a mean separation of 1 Mpc/h,
+    `b_perp = 0.5` and `b_para = 2` Mpc/h:
+        - 0, 1, 2: group, where 0 and 2 are only linked through 1
+        - 3, 4   : pair, 0.45 Mpc/h apart on the sky
+        - 5      : 0.55 Mpc/h away from 3 on the sky, not linked
+        - 6      : 2.5 Mpc/h behind 3, not linked
+        - 7      : isolated
+    """
+    ## (RA, projected offset from RA, distance), with DEC = 0
+    gal_arr = num.array([   [ 10.,  0.  , 50. ],
+                            [ 10.,  0.3 , 51. ],
+                            [ 10.,  0.  , 52.5],
+                            [ 40.,  0.  , 60. ],
+                            [ 40.,  0.45, 60. ],
+                            [ 40., -0.55, 60. ],
+                            [ 40.,  0.  , 62.5],
+                            [100.,  0.  , 70. ]])
+    dist_arr = gal_arr[:,2]
+    ra_arr   = gal_arr[:,0] + num.degrees(gal_arr[:,1] / dist_arr)
+    dec_arr  = num.zeros(len(gal_arr))
+    cz_arr   = 100. * dist_arr
+
+    return ra_arr, dec_arr, cz_arr, dist_arr
+
+def test_fof_groups_links(emc):
+    (   ra_arr  ,
+        dec_arr ,
+        cz_arr  ,
+        dist_arr) = _catl_create()
+    volume = float(len(ra_arr))
+    (   groupid_arr,
+        group_dict ) = emc.cu.fof_groups(ra_arr, dec_arr, cz_arr, dist_arr,
+                            volume, 0.5, 2., nmin=1)
+    num.testing.assert_array_equal(groupid_arr, [0, 0, 0, 1, 1, 2, 3, 4])
+    num.testing.assert_array_equal(group_dict['ngals'], [3, 2, 1, 1, 1])
+    num.testing.assert_allclose(group_dict['cen_cz'],
+        [cz_arr[:3].mean(), cz_arr[3:5].mean(), cz_arr[5], cz_arr[6],
+         cz_arr[7]])
+    num.testing.assert_allclose(group_dict['cen_dec'], 0., atol=1.e-10)
+    num.testing.assert_allclose(group_dict['cen_ra'][4], 100.)
+    num.testing.assert_allclose(group_dict['sigma_v'][2:], 0.)
+    num.testing.assert_allclose(group_dict['rproj'][2:], 0., atol=1.e-6)
+
+def test_fof_groups_nmin(emc):
+    (   ra_arr  ,
+        dec_arr ,
+        cz_arr  ,
+        dist_arr) = _catl_create()
+    volume = float(len(ra_arr))
+    (   groupid_arr,
+        group_dict ) = emc.cu.fof_groups(ra_arr, dec_arr, cz_arr, dist_arr,
+                            volume, 0.5, 2., nmin=2)
+    num.testing.assert_array_equal(groupid_arr, [0, 0, 0, 1, 1, -1, -1, -1])
+    num.testing.assert_array_equal(group_dict['groupid'], [0, 1])
+    num.testing.assert_array_equal(group_dict['ngals'  ], [3, 2])
+    ## Shorter linking lengths, `b_perp = 0.4` and `b_para = 1.2` Mpc/h,
+    ## split 2 from 1, and 4 from 3
+    (   groupid_arr,
+        group_dict ) = emc.cu.fof_groups(ra_arr, dec_arr, cz_arr, dist_arr,
+                            volume, 0.4, 1.2, nmin=2)
+    num.testing.assert_array_equal(groupid_arr, [0, 0, -1, -1, -1, -1, -1, -1])
+    num.testing.assert_allclose(group_dict['cen_cz'], [cz_arr[:2].mean()])
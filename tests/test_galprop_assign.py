@@ -0,0 +1,53 @@
+"""
+Tests of the assignment of survey galaxy properties to mock galaxies
+"""
+import os
+import numpy as num
+import pandas as pd
+
+def _phot_create():
+    eco_phot_pd = pd.DataFrame({
+                    'goodnewabsr'        : [-21., -19., -17.5],
+                    'goodmorph'          : [b'E', b'L', b'E'],
+                    'rpsmoothrestrmagnew': [-21.1, -19.1, -17.6],
+                    'rpsmoothrestumagnew': [-19.0, -17.5, -16.4],
+                    'rpgoodmstarsnew'    : [10.9, 10.1, 9.2],
+                    'rpmeanssfr'         : [0.1, 0.5, 1.2],
+                    'MHI'                : [-1.0, -0.5, 0.1]})
+    res_phot_pd = pd.DataFrame({
+                    'ABSMAGR'        : [-17.2],
+                    'MORPH'          : ['L'],
+                    'SMOOTHRESTRMAG' : [-17.3],
+                    'SMOOTHRESTUMAG' : [-16.2],
+                    'MSTARS'         : [10.**8.9],
+                    'MODELFSMGR'     : [1.5],
+                    'MHI'            : [10.**9.]})
+
+    return eco_phot_pd, res_phot_pd
+
+def test_unmatched_galaxies_string_morph(emc, param_dict_base, tmpdir,
+    monkeypatch):
+    """
+    Galaxies fainter than `mr_res_b` keep a string morphology, so that
+    the catalogue can be written in `table` format.
+    """
+    monkeypatch.setattr(emc, 'survey_phot_load',
+        lambda param_dict, proj_dict: _phot_create())
+    param_dict = dict(param_dict_base)
+    param_dict['mr_eco'         ] = -17.33
+    param_dict['mr_res_b'       ] = -17.00
+    param_dict['clf_galprop_out'] = str(tmpdir.join('galprop.hdf5'))
+    clf_pd = pd.DataFrame({ 'M_r'     : [-21.2, -17.1, 0., -16.5],
+                            'haloid'  : num.arange(4),
+                            'cs_flag' : [1, 1, 0, 0]})
+    clf_galprop_pd = emc.mr_survey_matching(clf_pd, param_dict, {})
+    num.testing.assert_array_equal(clf_galprop_pd['survey_flag'].values,
+                                    [1, 0, -1, -1])
+    assert list(clf_galprop_pd['morph']) == ['E', 'L', '', '']
+    assert num.isnan(clf_galprop_pd['logmstar'].values[2:]).all()
+    ## Writing and reading the catalogue in `table` format
+    catl_file = str(tmpdir.join('catl.hdf5'))
+    emc.cu.pandas_df_to_file(clf_galprop_pd, catl_file, key='/gal_catl',
+        hdf5_format='table')
+    catl_pd = emc.cu.read_pandas_file(catl_file, key='/gal_catl')
+    assert list(catl_pd['morph']) == ['E', 'L', '', '']
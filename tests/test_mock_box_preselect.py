@@ -0,0 +1,112 @@
+"""
+Tests of the pre-selection of the galaxies of the box for a mock catalogue
+"""
+import numpy as num
+import pandas as pd
+import pytest
+
+def _box_create(ngal=200000, size_cube=180., seed=0):
+    """
+    Box with a realistic velocity distribution, with a tail of fast
+    galaxies (up to ~4000 km/s)
+    """
+    rng    = num.random.RandomState(seed)
+    vel    = rng.normal(0., 300., size=(ngal, 3))
+    n_tail = 100
+    vel_dir = rng.normal(size=(n_tail, 3))
+    vel_dir /= num.sqrt(num.sum(vel_dir**2, axis=1))[:,None]
+    vel[:n_tail] = vel_dir * rng.uniform(1500., 3954., size=(n_tail, 1))
+    clf_pd = pd.DataFrame({ 'x' : rng.uniform(0., size_cube, ngal),
+                            'y' : rng.uniform(0., size_cube, ngal),
+                            'z' : rng.uniform(0., size_cube, ngal),
+                            'vx': vel[:,0],
+                            'vy': vel[:,1],
+                            'vz': vel[:,2]})
+
+    return clf_pd
+
+def _param_dict_create(emc, size_cube=180.):
+    speed_c = 3.e5
+    z_arr   = num.arange(0., 0.5, 1.e-3)
+    param_dict = {  'size_cube' : size_cube,
+                    'const_dict': {'c': speed_c},
+                    'zspace'    : 2,
+                    'zmedian'   : 0.,
+                    'czmin'     : 2532.,
+                    'czmax'     : 7470.,
+                    # Hubble law, in units of Mpc/h
+                    'cosmo_dist': emc.cu.ComovingDistance(z_arr,
+                                    speed_c * z_arr / 100.)}
+
+    return param_dict
+
+def _survey_members(clf_pd, pos_zz, coord_dict, param_dict, coord_perm):
+    """
+    Galaxies of the final mock catalogue, as selected by `makemock_catl`
+    """
+    size_cube = param_dict['size_cube']
+    speed_c   = param_dict['const_dict']['c']
+    cart_gals = clf_pd[list(coord_perm)].values - pos_zz
+    cart_gals[cart_gals <= -(size_cube/2.)] += size_cube
+    cart_gals[cart_gals >=  (size_cube/2.)] -= size_cube
+    vel_gals  = clf_pd[['vx','vy','vz']].values
+    r_dist    = num.sum(cart_gals**2, axis=1)**.5
+    cz_arr    = (speed_c * param_dict['cosmo_dist'].d_to_z(r_dist) +
+                 num.sum(cart_gals * vel_gals, axis=1) / r_dist)
+    ra_arr    = num.degrees(num.arctan2(cart_gals[:,1], cart_gals[:,0])) % 360.
+    dec_arr   = 90. - num.degrees(num.arccos(cart_gals[:,2] / r_dist))
+    if coord_dict['ra_min'] < 0.:
+        ra_mask = ~((ra_arr < coord_dict['ra_min'] + 360.) &
+                    (ra_arr > coord_dict['ra_max']))
+    else:
+        ra_mask = ((ra_arr >= coord_dict['ra_min']) &
+                   (ra_arr <= coord_dict['ra_max']))
+    gal_mask  = ((dec_arr >= coord_dict['dec_min']) &
+                 (dec_arr <= coord_dict['dec_max']) & ra_mask &
+                 (cz_arr  >= param_dict['czmin']) &
+                 (cz_arr  <= param_dict['czmax']))
+
+    return clf_pd.index.values[gal_mask]
+
+@pytest.mark.parametrize('coord_dict, coord_perm', [
+    ({'ra_min': -20., 'ra_max': 40., 'dec_min': -1., 'dec_max': 49.},
+        ('x', 'y', 'z')),
+    ({'ra_min': 100., 'ra_max': 205., 'dec_min': 0., 'dec_max': 5.},
+        ('y', 'x', 'z'))])
+def test_mock_box_preselect_velocity_tail(emc, coord_dict, coord_perm):
+    """
+    With fast galaxies, the lower cz limit of the pre-selection is below
+    zero. It must be clipped, and no galaxy of the survey may be lost,
+    with or without the grid index of the box.
+    """
+    clf_pd     = _box_create()
+    param_dict = _param_dict_create(emc)
+    pos_zz     = num.array([37., 121., 64.])
+    vel_max    = num.sqrt(num.sum(clf_pd[['vx','vy','vz']].values**2,
+                    axis=1)).max()
+    assert vel_max > param_dict['czmin']
+    ## Galaxies of the final catalogue
+    member_idx = _survey_members(clf_pd, pos_zz, coord_dict, param_dict,
+                    coord_perm)
+    assert len(member_idx) > 0
+    ## Full pass over the box
+    clf_full   = emc.mock_box_preselect(clf_pd, pos_zz, coord_dict,
+                    param_dict, coord_perm=coord_perm)
+    assert num.isin(member_idx, clf_full.index.values).all()
+    ## Grid index of the box
+    param_dict['box_index'  ] = emc.cu.box_grid_index(
+                                    clf_pd[['x','y','z']].values,
+                                    param_dict['size_cube'])
+    param_dict['vel_max_box'] = vel_max
+    clf_grid   = emc.mock_box_preselect(clf_pd, pos_zz, coord_dict,
+                    param_dict, coord_perm=coord_perm)
+    num.testing.assert_array_equal(clf_grid.index.values,
+                                   clf_full.index.values)
+    num.testing.assert_allclose(clf_grid[['x','y','z']].values,
+                                clf_full[['x','y','z']].values)
+    ## Only part of the box is examined
+    cell_mask = emc.mock_cells_select(param_dict['box_index'], pos_zz,
+                    coord_dict, param_dict['cosmo_dist'].z_to_d(
+                        num.array([0., 7470. + vel_max]) / 3.e5),
+                    coord_perm=coord_perm)
+    assert cell_mask.sum() < cell_mask.size
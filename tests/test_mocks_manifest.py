@@ -0,0 +1,36 @@
+"""
+Tests of the checkpoints of the mock catalogues
+"""
+import os
+import pandas as pd
+
+def test_mock_outputs_valid_mtime(emc, tmpdir):
+    """
+    A file rewritten with the same size is not a valid output anymore
+    """
+    catl_file = str(tmpdir.join('catl.hdf5'))
+    emc.cu.pandas_df_to_file(pd.DataFrame({'M_r': [-20., -19.]}), catl_file,
+        key='/gal_catl')
+    outputs_dict = emc.mock_outputs_stat([catl_file])
+    assert emc.mock_outputs_valid(outputs_dict)
+    file_stat = os.stat(catl_file)
+    os.utime(catl_file, (file_stat.st_atime, file_stat.st_mtime + 10.))
+    assert os.path.getsize(catl_file) == outputs_dict[catl_file][0]
+    assert not emc.mock_outputs_valid(outputs_dict)
+
+def test_mock_inputs_hash_output_options(emc, param_dict_base, tmpdir):
+    """
+    The compression and the HDF5 format of the catalogues are part of the
+    inputs of a mock catalogue
+    """
+    param_dict = dict(param_dict_base)
+    param_dict['clf_galprop_out'] = str(tmpdir.join('galprop.hdf5'))
+    tmpdir.join('galprop.hdf5').write('galprop')
+    mock_spec  = [10., 20., 30., ('x', 'y', 'z'), {'ra_min': 0.}]
+    hash_base  = emc.mock_inputs_hash(mock_spec, param_dict)
+    for key, key_val in [   ('complevel'  , 5      ),
+                            ('complib'    , 'blosc'),
+                            ('hdf5_format', 'table')]:
+        param_dict_kk = dict(param_dict)
+        param_dict_kk[key] = key_val
+        assert emc.mock_inputs_hash(mock_spec, param_dict_kk) != hash_base
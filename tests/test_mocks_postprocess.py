@@ -0,0 +1,125 @@
+"""
+Tests of the post-processing stages of the mock catalogues
+"""
+import os
+import numpy as num
+import pandas as pd
+
+def _proj_dict_create(tmpdir):
+    proj_dict = {}
+    for key in ['mock_cat_mc', 'fig_dir', 'tar_dir', 'catl_outdir']:
+        proj_dict[key] = str(tmpdir.mkdir(key))
+    proj_dict['base_dir'] = str(tmpdir)
+    ## README file - Avoids downloading it
+    tmpdir.mkdir('references').join('README_RTD.pdf').write('README')
+
+    return proj_dict
+
+def _catls_create(emc, proj_dict, n_catls=3, ngal=200, seed=0):
+    rng = num.random.RandomState(seed)
+    for kk in range(n_catls):
+        catl_pd = pd.DataFrame({'x_orig': rng.uniform(0, 180, ngal),
+                                'y_orig': rng.uniform(0, 180, ngal),
+                                'z_orig': rng.uniform(0, 180, ngal),
+                                'M_r'   : rng.uniform(-23, -17, ngal)})
+        emc.cu.pandas_df_to_file(catl_pd,
+            os.path.join(proj_dict['mock_cat_mc'],
+                         'ECO_cat_{0}_memb_cat.hdf5'.format(kk)),
+            key='/gal_catl')
+
+def test_simbox_and_lum_function_consumers_together(emc, param_dict_base,
+    tmpdir, monkeypatch):
+    """
+    Both figures are open at the same time while the catalogues are 
+    streamed, and each one must be saved to its own file.
+    """
+    ## Number of axes of the figure saved to each file
+    saved_dict  = {}
+    savefig_fig = emc.matplotlib.figure.Figure.savefig
+    def savefig_spy(fig, fname, *args, **kwargs):
+        saved_dict[os.path.basename(fname)] = len(fig.axes)
+        return savefig_fig(fig, fname, *args, **kwargs)
+    monkeypatch.setattr(emc.matplotlib.figure.Figure, 'savefig', savefig_spy)
+    param_dict = dict(param_dict_base)
+    param_dict['plot_dict'] = emc.plot_const()
+    proj_dict  = _proj_dict_create(tmpdir)
+    _catls_create(emc, proj_dict)
+    catl_path_arr = emc.cu.Index(proj_dict['mock_cat_mc'], '.hdf5')
+    n_catls       = len(catl_path_arr)
+    consumer_arr  = [emc.mockcatls_simbox_plot(param_dict, proj_dict, n_catls,
+                        fig_fmt='png'),
+                     emc.mocks_lum_function(param_dict, proj_dict, n_catls,
+                        fig_fmt='png')]
+    for consumer in consumer_arr:
+        next(consumer)
+    for kk, catl_kk in enumerate(catl_path_arr):
+        catl_kk_pd = emc.cu.read_pandas_file(catl_kk)
+        for consumer in consumer_arr:
+            consumer.send((kk, catl_kk, catl_kk_pd))
+    for consumer in consumer_arr:
+        try:
+            consumer.send(None)
+        except StopIteration:
+            pass
+    fig_arr = sorted(os.listdir(proj_dict['fig_dir']))
+    assert fig_arr == ['ECO_fof_LasDamas_lum_function_mocks.png',
+                       'ECO_fof_LasDamas_xyz_mocks.png']
+    for fig_kk in fig_arr:
+        assert os.path.getsize(os.path.join(proj_dict['fig_dir'], fig_kk)) > 0
+    assert saved_dict == {  'ECO_fof_LasDamas_xyz_mocks.png'         : 3,
+                            'ECO_fof_LasDamas_lum_function_mocks.png': 1}
+    ## No figures are left open
+    assert len(emc.plt.get_fignums()) == 0
+
+def test_mocks_postprocess_single_pass(emc, param_dict_base, tmpdir,
+    monkeypatch):
+    """
+    Each catalogue is read once, and the figures and TAR file are created
+    """
+    param_dict = dict(param_dict_base)
+    param_dict['plot_dict'] = emc.plot_const()
+    proj_dict  = _proj_dict_create(tmpdir)
+    _catls_create(emc, proj_dict)
+    read_arr   = []
+    read_func  = emc.cu.read_pandas_file
+    def read_count(catl_kk, **kwargs):
+        read_arr.append(catl_kk)
+        return read_func(catl_kk, **kwargs)
+    monkeypatch.setattr(emc.cu, 'read_pandas_file', read_count)
+    emc.mocks_postprocess(param_dict, proj_dict, catl_ext='hdf5')
+    assert len(read_arr) == len(set(read_arr)) == 3
+    assert len(os.listdir(proj_dict['fig_dir'])) == 2
+    assert os.path.exists(os.path.join(proj_dict['tar_dir'],
+                            'ECO_fof_catls.tar.gz'))
+
+def test_simbox_plot_density_render(emc, param_dict_base, tmpdir,
+    monkeypatch):
+    """
+    The density rendering draws a single image per panel, with each 
+    occupied pixel in the mean color of the catalogues in it
+    """
+    imshow_arr = []
+    imshow_ax  = emc.matplotlib.axes.Axes.imshow
+    def imshow_spy(ax, img, *args, **kwargs):
+        imshow_arr.append(num.array(img))
+        return imshow_ax(ax, img, *args, **kwargs)
+    monkeypatch.setattr(emc.matplotlib.axes.Axes, 'imshow', imshow_spy)
+    param_dict = dict(param_dict_base)
+    param_dict['plot_dict'] = emc.plot_const()
+    proj_dict  = _proj_dict_create(tmpdir)
+    consumer   = emc.mockcatls_simbox_plot(param_dict, proj_dict, 1,
+                    fig_fmt='png', render='density', nbins=180)
+    next(consumer)
+    catl_pd = pd.DataFrame({'x_orig': [10.5, 100.5],
+                            'y_orig': [50.5, 100.5],
+                            'z_orig': [170.5, 100.5]})
+    consumer.send((0, 'catl_0', catl_pd))
+    try:
+        consumer.send(None)
+    except StopIteration:
+        pass
+    assert len(imshow_arr) == 3
+    ## Y-Z projection - Rows are `z`, columns are `y`
+    img_yz   = imshow_arr[2]
+    occ_bool = num.any(img_yz != 1., axis=-1)
+    assert sorted(map(tuple, num.argwhere(occ_bool))) == [(100, 100), (170, 50)]
@@ -0,0 +1,34 @@
+"""
+Tests of the group statistics of `statistics_vc`
+"""
+import numpy as num
+
+def test_group_argmax_ties_and_ungrouped(emc):
+    """
+    The largest value of each group is selected, rows with `groupid == -1`
+    are ignored, and ties are broken at random.
+    """
+    ids_arr  = num.array([ 0 ,  0 ,  1 , -1 ,  1 ,  1 ,  3 , -1 ])
+    vals_arr = num.array([ 1., 5., 2., 99., 7., 7., 4., 99.])
+    ## Element picked for group 1, for different seeds
+    pick_1_arr = []
+    for seed in range(50):
+        idx_arr = emc.cu.group_argmax(ids_arr, vals_arr, ngroups=5,
+                    rng=num.random.RandomState(seed))
+        ## Group 0 has a single maximum, group 2 and 4 have no members
+        assert idx_arr[0] == 1
+        assert idx_arr[2] == -1
+        assert idx_arr[3] == 6
+        assert idx_arr[4] == -1
+        ## Ungrouped rows are never selected
+        assert not num.isin([3, 7], idx_arr).any()
+        pick_1_arr.append(idx_arr[1])
+    ## Both tied elements of group 1 are picked
+    assert set(pick_1_arr) == set([4, 5])
+    ## Same seed, same choice
+    idx_1 = emc.cu.group_argmax(ids_arr, vals_arr,
+                rng=num.random.RandomState(3))
+    idx_2 = emc.cu.group_argmax(ids_arr, vals_arr,
+                rng=num.random.RandomState(3))
+    num.testing.assert_array_equal(idx_1, idx_2)
+    assert len(idx_1) == 4